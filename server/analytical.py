@@ -0,0 +1,242 @@
+from datetime import datetime
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+from horizons import State, Vector, TIMESTAMP_FORMAT, datetime_to_jd, step_epochs
+
+
+# In-process Sun/Moon positions from truncated analytical series
+# (Meeus, Astronomical Algorithms, ch. 25 and 47). Output matches what
+# get_horizons_xyz returns: geocentric, ecliptic J2000, km.
+# Measured against Horizons only near January 2026, where both bodies are
+# within 0.005 deg in longitude and latitude (bench/accuracy_report.py,
+# bench/horizons_samples.json). The series lose accuracy away from J2000;
+# record samples over a wider span with `accuracy_report.py --record`
+# before relying on them there.
+
+AU_KM = 149597870.7
+J2000 = 2451545.0
+
+# half-width of the central difference used for velocities, in days
+VELOCITY_DT = 60 / 86400
+
+# Moon longitude and distance terms (Meeus table 47.A, largest 32 of 60):
+# D, M, M', F, sum_l (1e-6 deg), sum_r (1e-3 km)
+MOON_LR_TERMS = np.array([
+    [0, 0, 1, 0, 6288774, -20905355],
+    [2, 0, -1, 0, 1274027, -3699111],
+    [2, 0, 0, 0, 658314, -2955968],
+    [0, 0, 2, 0, 213618, -569925],
+    [0, 1, 0, 0, -185116, 48888],
+    [0, 0, 0, 2, -114332, -3149],
+    [2, 0, -2, 0, 58793, 246158],
+    [2, -1, -1, 0, 57066, -152138],
+    [2, 0, 1, 0, 53322, -170733],
+    [2, -1, 0, 0, 45758, -204586],
+    [0, 1, -1, 0, -40923, -129620],
+    [1, 0, 0, 0, -34720, 108743],
+    [0, 1, 1, 0, -30383, 104755],
+    [2, 0, 0, -2, 15327, 10321],
+    [0, 0, 1, 2, -12528, 0],
+    [0, 0, 1, -2, 10980, 79661],
+    [4, 0, -1, 0, 10675, -34782],
+    [0, 0, 3, 0, 10034, -23210],
+    [4, 0, -2, 0, 8548, -21636],
+    [2, 1, -1, 0, -7888, 24208],
+    [2, 1, 0, 0, -6766, 30824],
+    [1, 0, -1, 0, -5163, -8379],
+    [1, 1, 0, 0, 4987, -16675],
+    [2, -1, 1, 0, 4036, -12831],
+    [2, 0, 2, 0, 3994, -10445],
+    [4, 0, 0, 0, 3861, -11650],
+    [2, 0, -3, 0, 3665, 14403],
+    [0, 1, -2, 0, -2689, -7003],
+    [2, 0, -1, 2, -2602, 0],
+    [2, -1, -2, 0, 2390, 10056],
+    [1, 0, 1, 0, -2348, 6322],
+    [2, -2, 0, 0, 2236, -9884],
+], dtype=float)
+
+# Moon latitude terms (Meeus table 47.B, largest 20 of 60):
+# D, M, M', F, sum_b (1e-6 deg)
+MOON_B_TERMS = np.array([
+    [0, 0, 0, 1, 5128122],
+    [0, 0, 1, 1, 280602],
+    [0, 0, 1, -1, 277693],
+    [2, 0, 0, -1, 173237],
+    [2, 0, -1, 1, 55413],
+    [2, 0, -1, -1, 46271],
+    [2, 0, 0, 1, 32573],
+    [0, 0, 2, 1, 17198],
+    [2, 0, 1, -1, 9266],
+    [0, 0, 2, -1, 8822],
+    [2, -1, 0, -1, 8216],
+    [2, 0, -2, -1, 4324],
+    [2, 0, 1, 1, 4200],
+    [2, 1, 0, -1, -3359],
+    [2, -1, -1, 1, 2463],
+    [2, -1, 0, 1, 2211],
+    [2, -1, -1, -1, 2065],
+    [0, 1, -1, -1, -1870],
+    [4, 0, -1, -1, 1828],
+    [0, 1, 0, 1, -1794],
+], dtype=float)
+
+
+def julian_centuries(jd: np.ndarray) -> np.ndarray:
+    return (jd - J2000) / 36525
+
+
+def precession_deg(T: np.ndarray) -> np.ndarray:
+    # general precession in longitude, mean equinox of date -> J2000
+    return (5029.0966 * T + 1.11113 * T * T) / 3600
+
+
+def spherical_to_xyz(lon_deg, lat_deg, r) -> np.ndarray:
+    lon = np.radians(lon_deg)
+    lat = np.radians(lat_deg)
+    return np.stack([
+        r * np.cos(lat) * np.cos(lon),
+        r * np.cos(lat) * np.sin(lon),
+        r * np.sin(lat),
+    ], axis=-1)
+
+
+def sun_xyz(jd: np.ndarray) -> np.ndarray:
+    """Geometric geocentric Sun, shape (n, 3)."""
+    T = julian_centuries(np.asarray(jd, dtype=float))
+
+    L0 = 280.46646 + 36000.76983 * T + 0.0003032 * T**2
+    M = np.radians(357.52911 + 35999.05029 * T - 0.0001537 * T**2)
+    e = 0.016708634 - 0.000042037 * T - 0.0000001267 * T**2
+
+    C = (
+        (1.914602 - 0.004817 * T - 0.000014 * T**2) * np.sin(M)
+        + (0.019993 - 0.000101 * T) * np.sin(2 * M)
+        + 0.000289 * np.sin(3 * M)
+    )
+
+    lon = L0 + C - precession_deg(T)
+    nu = M + np.radians(C)
+    r = 1.000001018 * (1 - e * e) / (1 + e * np.cos(nu)) * AU_KM
+
+    return spherical_to_xyz(lon, np.zeros_like(lon), r)
+
+
+def moon_xyz(jd: np.ndarray) -> np.ndarray:
+    """Geometric geocentric Moon, shape (n, 3)."""
+    T = julian_centuries(np.asarray(jd, dtype=float))
+
+    Lp = 218.3164477 + 481267.88123421 * T - 0.0015786 * T**2 + T**3 / 538841 - T**4 / 65194000
+    D = 297.8501921 + 445267.1114034 * T - 0.0018819 * T**2 + T**3 / 545868 - T**4 / 113065000
+    M = 357.5291092 + 35999.0502909 * T - 0.0001536 * T**2 + T**3 / 24490000
+    Mp = 134.9633964 + 477198.8675055 * T + 0.0087414 * T**2 + T**3 / 69699 - T**4 / 14712000
+    F = 93.2720950 + 483202.0175233 * T - 0.0036539 * T**2 - T**3 / 3526000 + T**4 / 863310000
+
+    A1 = np.radians(119.75 + 131.849 * T)
+    A2 = np.radians(53.09 + 479264.290 * T)
+    A3 = np.radians(313.45 + 481266.484 * T)
+    E = 1 - 0.002516 * T - 0.0000074 * T**2
+
+    # (n, 4) fundamental arguments in radians against (4, k) term multipliers
+    args = np.radians(np.stack([D, M, Mp, F], axis=-1))
+
+    lr = MOON_LR_TERMS
+    phase = args @ lr[:, :4].T
+    ecc = E[:, None] ** np.abs(lr[:, 1])
+    sum_l = (ecc * lr[:, 4] * np.sin(phase)).sum(axis=-1)
+    sum_r = (ecc * lr[:, 5] * np.cos(phase)).sum(axis=-1)
+
+    b = MOON_B_TERMS
+    phase = args @ b[:, :4].T
+    ecc = E[:, None] ** np.abs(b[:, 1])
+    sum_b = (ecc * b[:, 4] * np.sin(phase)).sum(axis=-1)
+
+    Lp_rad = np.radians(Lp)
+    F_rad = np.radians(F)
+    Mp_rad = np.radians(Mp)
+
+    sum_l += 3958 * np.sin(A1) + 1962 * np.sin(Lp_rad - F_rad) + 318 * np.sin(A2)
+    sum_b += (
+        -2235 * np.sin(Lp_rad)
+        + 382 * np.sin(A3)
+        + 175 * np.sin(A1 - F_rad)
+        + 175 * np.sin(A1 + F_rad)
+        + 127 * np.sin(Lp_rad - Mp_rad)
+        - 115 * np.sin(Lp_rad + Mp_rad)
+    )
+
+    lon = Lp + sum_l / 1e6 - precession_deg(T)
+    lat = sum_b / 1e6
+    r = 385000.56 + sum_r / 1000
+
+    return spherical_to_xyz(lon, lat, r)
+
+
+BODIES = {
+    "10": sun_xyz,
+    "301": moon_xyz,
+}
+
+
+def local_xyz_many(command: str, timestamps: Iterable[datetime]) -> np.ndarray:
+    """Vectorized over any number of instants, shape (n, 3)."""
+    if command not in BODIES:
+        raise ValueError(f"No local ephemeris for body {command}")
+
+    jd = np.array([datetime_to_jd(dt) for dt in timestamps], dtype=float)
+    return BODIES[command](jd)
+
+
+def get_local_xyz(command: str, timestamp: str, center: str = "399") -> Vector:
+    """Drop-in for get_horizons_xyz, geocentric Sun and Moon only."""
+    if center != "399":
+        raise ValueError("Local ephemeris is geocentric only")
+
+    dt = datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+    x, y, z = local_xyz_many(command, [dt])[0]
+    return float(x), float(y), float(z)
+
+
+def local_series(
+    command: str,
+    start: datetime,
+    stop: datetime,
+    step: str,
+) -> List[Tuple[datetime, Vector]]:
+    """Same shape as get_horizons_series."""
+    epochs = step_epochs(start, stop, step)
+    xyz = local_xyz_many(command, epochs)
+
+    return [
+        (epoch, (float(p[0]), float(p[1]), float(p[2])))
+        for epoch, p in zip(epochs, xyz)
+    ]
+
+
+def local_states(
+    command: str,
+    start: datetime,
+    stop: datetime,
+    step: str,
+) -> List[Tuple[datetime, State]]:
+    """
+    Same shape as get_horizons_states, so a StateGrid can be filled from
+    the local series. Velocities (km/s) are central differences.
+    """
+    if command not in BODIES:
+        raise ValueError(f"No local ephemeris for body {command}")
+
+    epochs = step_epochs(start, stop, step)
+
+    jd = np.array([datetime_to_jd(dt) for dt in epochs], dtype=float)
+    body = BODIES[command]
+
+    xyz = body(jd)
+    vel = (body(jd + VELOCITY_DT) - body(jd - VELOCITY_DT)) / (2 * VELOCITY_DT * 86400)
+
+    return [
+        (epoch, tuple(float(v) for v in p) + tuple(float(v) for v in dv))
+        for epoch, p, dv in zip(epochs, xyz, vel)
+    ]
@@ -1,22 +1,55 @@
-import math
-import re
-import urllib.parse
-from datetime import datetime, timezone, timedelta
-from typing import Tuple, Dict
-
-import requests
-from fastapi import FastAPI, Request, HTTPException, Query, Depends
+import asyncio
+import os
+import random
+from datetime import datetime, timedelta, timezone
+import calendar
+from typing import Dict
+
+from fastapi import FastAPI, Request, HTTPException, Query, Path, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-from fastapi.responses import JSONResponse
-
-from cachetools import TTLCache
-
-from models import LunarInfoQuery, LunarResponse, PlanetsResponse
-from type_info import TITHIs, MASAs, RASHIs, UPAVAASs, Ayana, Ritu
-from db import get_by_timestamp, insert_row, start_tunnel, stop_tunnel, close_connection
+from fastapi.responses import JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
+
+from models import (
+    LunarInfoQuery, LunarRangeQuery, TransitionsQuery, UpavaasNextQuery, GrahanaQuery,
+    LunarResponse, LunarRangeResponse, TransitionsResponse, CalendarResponse, UpavaasNextResponse,
+    GrahanaResponse,
+    PlanetsResponse,
+)
+from ephemeris import cartesian_to_longitude, classify_ephemeris, classify_series
+from horizons import (
+    get_horizons_tlist,
+    get_horizons_xyz_async, get_horizons_series_async, close_async_client,
+    get_horizons_states, get_horizons_states_async,
+    TIMESTAMP_FORMAT,
+)
+from batcher import HorizonsBatcher
+from interpolation import StateGrid
+from analytical import get_local_xyz, local_states, local_series
+from transitions import find_transitions, next_occurrences
+from grahana import find_grahanas
+from upavaas import rule_position
+from singleflight import SingleFlight
+import metrics
+import timing
+import profiling
+from breaker import CLOSED, OPEN, HALF_OPEN
+import horizons
+from swr import RefreshingCache, Revalidator
+from horizons_parser import HorizonsUnavailable
+from prewarm import NowWindow
+from shared_cache import (
+    SharedCache, connect as connect_shared_store, REDIS_URL, SHARED_CACHE_PREFIX, SHARED_CACHE_TIMEOUT,
+)
+from db import get_by_timestamp, get_by_range, insert_rows, start_tunnel, stop_tunnel, close_connection, PoolTimeout
+from write_behind import WriteBehind
+from responses import (
+    EncodedJSONResponse, encode, make_etag, etag_matches, cache_headers, not_modified,
+    STALE_HEADERS,
+)
 
 
 app = FastAPI(title="Lunar Calendar API")
@@ -29,237 +62,473 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(metrics.InFlightMiddleware)
+app.add_middleware(timing.ServerTimingMiddleware)
+app.add_middleware(profiling.ProfilerMiddleware)
+
+# entries this close to expiring are reloaded in the background on their next hit
+CACHE_REFRESH_AHEAD_SECONDS = int(os.getenv("CACHE_REFRESH_AHEAD_SECONDS", "1800"))
+
+# expired entries are kept to answer with (marked stale) while Horizons is down
+cache = RefreshingCache(maxsize=512, ttl=12 * 60 * 60, refresh_ahead=CACHE_REFRESH_AHEAD_SECONDS) #12hours
+
+# final /info and /planets bodies, validated and encoded once when stored
+encoded = RefreshingCache(
+    maxsize=512, ttl=12 * 60 * 60, refresh_ahead=CACHE_REFRESH_AHEAD_SECONDS, stale_maxsize=0
+)
+
+# with REDIS_URL set, bodies missing here are looked up in (and stored to) a
+# store every worker and node shares
+shared_store = connect_shared_store(REDIS_URL)
+shared = SharedCache(shared_store, (encoded, cache)) if shared_store is not None else None
+
+# computed rows are persisted in batches off the request path
+writer = WriteBehind(
+    insert_rows,
+    batch_size=int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "100")),
+    flush_interval=float(os.getenv("WRITE_BEHIND_FLUSH_SECONDS", "1")),
+    max_pending=int(os.getenv("WRITE_BEHIND_MAX_PENDING", "10000")),
+)
 
-http = requests.Session()
+# identical concurrent misses share one DB read / compute / insert
+inflight = SingleFlight()
 
-cache = TTLCache(maxsize=512, ttl=12 * 60 * 60) #12hours
+# reloads of near-expiry /info and /planets bodies, keyed like the request path
+revalidator = Revalidator(encoded, inflight)
+
+# concurrent misses within this window share one TLIST request per body
+batcher = HorizonsBatcher(
+    get_horizons_tlist,
+    window_ms=float(os.getenv("HORIZONS_BATCH_WINDOW_MS", "5"))
+)
+
+# Sun/Moon states on a regular grid; /info interpolates between nodes instead
+# of asking Horizons for every distinct second. 0 disables the grid.
+INTERPOLATION_STEP_MINUTES = int(os.getenv("INTERPOLATION_STEP_MINUTES", "60"))
+
+grid = (
+    StateGrid(
+        get_horizons_states,
+        get_horizons_states_async,
+        step_seconds=INTERPOLATION_STEP_MINUTES * 60
+    )
+    if INTERPOLATION_STEP_MINUTES > 0
+    else None
+)
+
+# where /info gets Sun and Moon vectors from:
+#   horizons      - NASA Horizons (through the grid or the batcher)
+#   local         - in-process analytical series, no network
+#   local+verify  - local, with a sample of answers checked against Horizons
+EPHEMERIS_PROVIDER = os.getenv("EPHEMERIS_PROVIDER", "horizons")
+EPHEMERIS_VERIFY_RATE = float(os.getenv("EPHEMERIS_VERIFY_RATE", "0.01"))
+EPHEMERIS_VERIFY_TOLERANCE_DEG = float(os.getenv("EPHEMERIS_VERIFY_TOLERANCE_DEG", "0.05"))
+
+if EPHEMERIS_PROVIDER not in ("horizons", "local", "local+verify"):
+    raise ValueError(f"Unknown EPHEMERIS_PROVIDER: {EPHEMERIS_PROVIDER}")
+
+# /info bodies differ by source (the series are good to ~0.01 deg), so the
+# source is part of their ETag and shared cache key: switching providers
+# must not leave clients, CDNs or other nodes with the other one's answers.
+# Only Horizons answers are persisted or read back; the DB is shared by
+# every node, and local mode makes no MySQL round trip at all.
+EPHEMERIS_SOURCE = "horizons" if EPHEMERIS_PROVIDER == "horizons" else "local"
+
+# what /info answers with when Horizons is unreachable and nothing is cached:
+#   local - the analytical series, marked stale
+#   none  - the 503
+STALE_FALLBACK = os.getenv("STALE_FALLBACK", "local")
+
+if STALE_FALLBACK not in ("local", "none"):
+    raise ValueError(f"Unknown STALE_FALLBACK: {STALE_FALLBACK}")
+
+verify_tasks = set()
+
+# per-IP counters live in this process unless a shared store is configured;
+# with several workers or nodes they must be shared or each limit is N times
+# too loose. If the store goes away, counting carries on in memory. The
+# check is a blocking call on the event loop, so it gets the shared cache's
+# short timeouts rather than the OS's.
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", REDIS_URL or "memory://")
 
 limiter = Limiter(
     key_func=get_remote_address,
-    default_limits=["120/minute"]
+    default_limits=["120/minute"],
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    storage_options={"socket_timeout": SHARED_CACHE_TIMEOUT, "socket_connect_timeout": SHARED_CACHE_TIMEOUT},
+    key_prefix=SHARED_CACHE_PREFIX,
+    in_memory_fallback_enabled=True,
 )
-# app.state.limiter = limiter # configure redis for multiple servers
+app.state.limiter = limiter
 
 
 # in app.py add these lifecycle handlers (place near other top-level definitions)
 @app.on_event("startup")
-def startup():
-    start_tunnel()
+async def startup():
+    await run_in_threadpool(start_tunnel)
+    writer.start()
+    now_window.start()
+    if shared is not None:
+        shared.start()
 
 @app.on_event("shutdown")
-def shutdown():
+async def shutdown():
+    await now_window.stop()
+    if shared is not None:
+        await shared.stop()
+    batcher.shutdown()
+    await close_async_client()
+    await run_in_threadpool(writer.shutdown)
     close_connection()
     stop_tunnel()
 
+RATE_LIMITED = metrics.counter("rate_limited_total", "Requests rejected by the per-IP limit, by route", ("route",))
+
+
 @app.exception_handler(RateLimitExceeded)
 def rate_limit_handler(request: Request, exc: RateLimitExceeded):
+    RATE_LIMITED.inc(getattr(request.scope.get("route"), "path", "unmatched"))
     return JSONResponse(
         status_code=429,
         content={"detail": "Rate limit exceeded"}
     )
 
+@app.exception_handler(PoolTimeout)
+def pool_timeout_handler(request: Request, exc: PoolTimeout):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database busy"}
+    )
+
 
-# ------------------ utilities ------------------
+# ------------------ core service ------------------
 
-def cartesian_to_latitude(x: float, y: float, z: float) -> float:
-    r = math.sqrt(x*x + y*y + z*z)
-    if r == 0:
-        return 0.0
-    value = max(-1.0, min(1.0, z / r))
-    return math.degrees(math.asin(value))
+async def fetch_horizons_pair_async(timestamp: str):
+    if grid is not None:
+        dt = datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+        # only reaches Horizons when the grid does not cover dt yet
+        await asyncio.gather(
+            grid.ensure_async("10", dt, dt),
+            grid.ensure_async("301", dt, dt),
+        )
+        return grid.lookup("10", dt), grid.lookup("301", dt)
+
+    # both bodies go into the same batch window; awaiting does not hold a worker
+    # (the batcher's thread makes the call, so it is timed here as one phase)
+    with timing.phase("horizons-batch"):
+        return await asyncio.gather(
+            asyncio.wrap_future(batcher.submit("10", timestamp)),
+            asyncio.wrap_future(batcher.submit("301", timestamp)),
+        )
 
 
-def cartesian_to_longitude(x: float, y: float, z: float) -> float:
-    lon = math.degrees(math.atan2(y, x))
-    return lon % 360
+def fetch_local_pair(timestamp: str):
+    return get_local_xyz("10", timestamp), get_local_xyz("301", timestamp)
 
-def get_ritu_from_longitude(lon: float) -> Ritu:
-    lon = lon % 360
 
-    if 0 <= lon < 60:
-        return Ritu.VASANTA
-    if 60 <= lon < 120:
-        return Ritu.GRISHMA
-    if 120 <= lon < 180:
-        return Ritu.VARSHA
-    if 180 <= lon < 240:
-        return Ritu.SHARAD
-    if 240 <= lon < 300:
-        return Ritu.HEMANTA
-    return Ritu.SHISHIRA
+def report_local_drift(timestamp: str, local_pair, horizons_pair):
+    for body, local_xyz, horizons_xyz in zip(("Sun", "Moon"), local_pair, horizons_pair):
+        drift = abs(cartesian_to_longitude(*local_xyz) - cartesian_to_longitude(*horizons_xyz))
+        drift = min(drift, 360 - drift)
+        if drift > EPHEMERIS_VERIFY_TOLERANCE_DEG:
+            print(f"local ephemeris drift: {body} off by {drift:.4f} deg at {timestamp}")
 
 
-def resolve_upavaas( *, tithi, paksha, masa, surya_lon ) -> list[dict]:
-    results: list[dict] = []
+async def verify_local_pair(timestamp: str, local_pair):
+    try:
+        horizons_pair = await fetch_horizons_pair_async(timestamp)
+    except HTTPException:
+        return
+    report_local_drift(timestamp, local_pair, horizons_pair)
 
-    for fd in UPAVAASs:
-        # --- tithi based ---
-        if fd.tithi and fd.tithi != tithi.name:
-            continue
 
-        if fd.paksha and fd.paksha != tithi.paksha:
-            continue
+def should_verify() -> bool:
+    return EPHEMERIS_PROVIDER == "local+verify" and random.random() < EPHEMERIS_VERIFY_RATE
 
-        if fd.masa and fd.masa != masa:
-            continue
 
-        # --- solar based ---
-        if fd.upavaas_type.name == "SOLAR_BASED":
-            if "Makara" in fd.name:
-                if not (270 <= surya_lon < 300):
-                    continue
+async def fetch_sun_moon_async(timestamp: str):
+    if EPHEMERIS_PROVIDER == "horizons":
+        return await fetch_horizons_pair_async(timestamp)
 
-        results.append({
-            "name": fd.name,
-            "description": fd.description
-        })
+    local_pair = fetch_local_pair(timestamp)
+    if should_verify():
+        # checked off the request path; the local answer is returned as is
+        task = asyncio.create_task(verify_local_pair(timestamp, local_pair))
+        verify_tasks.add(task)
+        task.add_done_callback(verify_tasks.discard)
+    return local_pair
 
-    return results
 
+COMPUTATIONS = metrics.counter("ephemeris_computations_total", "Sun/Moon snapshots computed, not read from a cache or the DB")
+STALE_SERVED = metrics.counter("stale_responses_total", "Answers marked stale because Horizons was unavailable, by endpoint", ("endpoint",))
 
-# ------------------ core service ------------------
 
-def get_horizons_xyz(command: str, timestamp: str, center: str="399") -> Tuple[float, float, float]:
-    dt_start = datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S")
-    dt_stop = dt_start + timedelta(minutes=1)
-
-    params = {
-        "format": "json",
-        "COMMAND": f"'{command}'",
-        "CENTER": f"'500@{center}'",
-        "EPHEM_TYPE": "'VECTORS'",
-        "START_TIME": f"'{dt_start.strftime("%Y-%m-%d %H:%M:%S")}'",
-        "STOP_TIME": f"'{dt_stop.strftime("%Y-%m-%d %H:%M:%S")}'",
-        "STEP_SIZE": "'1 m'",
-        "REF_PLANE": "'ECLIPTIC'",
-        "REF_SYSTEM": "'J2000'",
-        "OUT_UNITS": "'KM'",
-    }
+async def compute_ephemeris_async(timestamp: str) -> Dict:
+    COMPUTATIONS.inc()
 
-    query = urllib.parse.urlencode(params, safe="'@")
-    url = "https://ssd.jpl.nasa.gov/api/horizons.api?" + query
+    surya_xyz, chandra_xyz = await fetch_sun_moon_async(timestamp)
+    with timing.phase("classify"):
+        return classify_ephemeris(timestamp, surya_xyz, chandra_xyz)
 
-    try:
-        r = http.get(url, timeout=10)
-        r.raise_for_status()
-    except requests.RequestException:
-        raise HTTPException(
-            status_code=503,
-            detail="Ephemeris service unavailable"
+
+async def sun_moon_source_async(start: datetime, stop: datetime, step_seconds: int = 60 * 60):
+    """
+    Cheap (surya_xyz, chandra_xyz) lookups over [start, stop] for search
+    code that evaluates many instants. Horizons data is fetched up front,
+    one call per body, and every later evaluation is interpolated. Long
+    spans can pass a coarser step_seconds (see interpolation.error_bound_deg).
+    """
+    if EPHEMERIS_PROVIDER != "horizons":
+        # the series evaluated once per node, vectorized, then interpolated
+        source = StateGrid(local_states, step_seconds=step_seconds)
+        source.ensure("10", start, stop)
+        source.ensure("301", start, stop)
+    else:
+        if grid is not None and grid.step == step_seconds:
+            source = grid
+        else:
+            source = StateGrid(get_horizons_states, get_horizons_states_async, step_seconds=step_seconds)
+        await asyncio.gather(
+            source.ensure_async("10", start, stop),
+            source.ensure_async("301", start, stop),
         )
 
-    text = r.json().get("result", "")
-    match = re.search(r"\$\$SOE(.*?)\$\$EOE", text, re.S)
+    return lambda dt: (source.lookup("10", dt), source.lookup("301", dt))
+
 
-    if not match:
-        raise HTTPException(502, "Invalid ephemeris response")
+async def compute_ephemeris_range_async(start: str, stop: str, step: str) -> list[Dict]:
+    dt_start = datetime.strptime(start, TIMESTAMP_FORMAT)
+    dt_stop = datetime.strptime(stop, TIMESTAMP_FORMAT)
 
-    for line in match.group(1).splitlines():
-        m = re.search(
-            r"X\s*=\s*([-0-9.E+]+)\s*Y\s*=\s*([-0-9.E+]+)\s*Z\s*=\s*([-0-9.E+]+)",
-            line
+    if EPHEMERIS_PROVIDER != "horizons":
+        return classify_series(
+            local_series("10", dt_start, dt_stop, step),
+            local_series("301", dt_start, dt_stop, step),
         )
-        if m:
-            return float(m.group(1)), float(m.group(2)), float(m.group(3))
 
-    raise HTTPException(502, "Ephemeris parsing failed")
+    surya_rows, chandra_rows = await asyncio.gather(
+        get_horizons_series_async("10", dt_start, dt_stop, step),
+        get_horizons_series_async("301", dt_start, dt_stop, step),
+    )
 
+    return classify_series(surya_rows, chandra_rows)
 
-def compute_ephemeris(timestamp: str) -> Dict:
-    print('computing...')
 
-    surya_xyz = get_horizons_xyz("10", timestamp)
-    chandra_xyz = get_horizons_xyz("301", timestamp)
+def planet_entry(name: str, xyz) -> Dict:
+    return {
+        "name": name,
+        "xyz": xyz,
+        "longitude_deg": round(cartesian_to_longitude(*xyz), 4)
+    }
 
-    surya_lon = cartesian_to_longitude(*surya_xyz)
-    chandra_lon = cartesian_to_longitude(*chandra_xyz)
-    chandra_lat = cartesian_to_latitude(*chandra_xyz)
 
-    angle = (chandra_lon - surya_lon) % 360
+async def compute_all_planets_async(date: str) -> Dict:
+    # every body in flight at once: one round trip instead of one per planet
+    vectors = await asyncio.gather(*[
+        get_horizons_xyz_async(cmd, date, "10")
+        for cmd in PLANET_MAP.values()
+    ])
 
-    ayana = (
-        Ayana.UTTARAYANA
-        if surya_lon >= 270 or surya_lon < 90
-        else Ayana.DAKSHINAYANA
-    )
+    return {
+        "date": date,
+        "planets": [
+            planet_entry(name, xyz)
+            for name, xyz in zip(PLANET_MAP, vectors)
+        ]
+    }
 
-    angle_norm = angle % 360
-    surya_lon_norm = surya_lon % 360
-    chandra_lon_norm = chandra_lon % 360
 
-    tithi_index = min(int(angle_norm // 12), 29)
-    masa_index = min(int(surya_lon_norm // 30), 11)
-    surya_rashi_index = min(int(surya_lon_norm // 30), 11)
-    chandra_rashi_index = min(int(chandra_lon_norm // 30), 11)
+async def load_info(timestamp: str) -> Dict:
+    # return from db if present
+    if EPHEMERIS_SOURCE == "horizons":
+        row = await run_in_threadpool(get_by_timestamp, timestamp)
+        if row:
+            cache[timestamp] = row
+            return row
 
-    tithi = TITHIs[tithi_index]
-    masa = MASAs[masa_index]
-    surya_rashi = RASHIs[surya_rashi_index]
-    chandra_rashi = RASHIs[chandra_rashi_index]
+    # compute
+    data = await compute_ephemeris_async(timestamp)
 
-    # ---- eclipse detection ----
-    grahana = "None"
+    # cache now, store in the background
+    cache[timestamp] = data
+    if EPHEMERIS_SOURCE == "horizons":
+        with timing.phase("insert"):
+            writer.put(data)
 
-    # Strict astronomical thresholds
-    CONJUNCTION_THRESHOLD = 1.0     # degrees
-    OPPOSITION_THRESHOLD = 1.0      # degrees
-    NODE_LAT_THRESHOLD = 0.5        # degrees
+    return data
 
-    is_conjunction = angle_norm < CONJUNCTION_THRESHOLD or angle_norm > 360 - CONJUNCTION_THRESHOLD
-    is_opposition = abs(angle_norm - 180) < OPPOSITION_THRESHOLD
-    near_node = abs(chandra_lat) < NODE_LAT_THRESHOLD
 
-    if is_conjunction and near_node:
-        grahana = "Surya"
+async def load_calendar(year: int, month: int) -> Dict:
+    days = [
+        datetime(year, month, day).strftime(TIMESTAMP_FORMAT)
+        for day in range(1, calendar.monthrange(year, month)[1] + 1)
+    ]
 
-    elif is_opposition and near_node:
-        grahana = "Chandra"
+    found = {ts: cache[ts] for ts in days if ts in cache}
 
-    upavaas = resolve_upavaas(
-        tithi=tithi,
-        paksha=tithi.paksha,
-        masa=masa,
-        surya_lon=surya_lon
-    )
+    # one range scan for everything the cache did not have
+    if len(found) < len(days) and EPHEMERIS_SOURCE == "horizons":
+        stored = await run_in_threadpool(get_by_range, days[0], days[-1], 24 * 60 * 60)
+        found.update(stored)
 
-    return {
-        "timestamp": timestamp,
-        "ayana": ayana.value,
-        "ritu": get_ritu_from_longitude(surya_lon).value,
-        "masa": masa.value,
-        "paksha": tithi.paksha.value,
-        "tithi": tithi.name.value,
-        "phase": "Waxing" if angle_norm < 180 else "Waning",
-        "surya_rashi": surya_rashi.value,
-        "chandra_rashi": chandra_rashi.value,
-        "surya_longitude_deg": surya_lon,
-        "chandra_longitude_deg": chandra_lon,
-        "longitudinal_angle_deg": angle,
-        "grahana": grahana,
-        "surya_xyz": surya_xyz,
-        "chandra_xyz": chandra_xyz,
-        "upavaas": upavaas,
-    }
+    # then one ephemeris query per body spanning the remaining gaps
+    missing = [ts for ts in days if ts not in found]
+    if missing:
+        computed = await compute_ephemeris_range_async(missing[0], missing[-1], "1 d")
+        for data in computed:
+            if data["timestamp"] in found:
+                continue
+            found[data["timestamp"]] = data
+            if EPHEMERIS_SOURCE == "horizons":
+                writer.put(data)
 
+    for ts in days:
+        if ts in found:
+            cache[ts] = found[ts]
 
-def compute_all_planets(date: str) -> Dict:
-    planet_data = []
-    
-    for name, cmd in PLANET_MAP.items():
-        xyz = get_horizons_xyz(cmd, date, "10")
-        lon = cartesian_to_longitude(*xyz)
-        planet_data.append({
-            "name": name,
-            "xyz": xyz,
-            "longitude_deg": round(lon, 4)
-        })
-    
     return {
-        "date": date,
-        "planets": planet_data
+        "year": year,
+        "month": month,
+        "days": [found[ts] for ts in days if ts in found],
     }
 
 
+async def load_planets(cache_key: str, target_timestamp: str) -> Dict:
+    # compute_all_planets_async receives 'YYYY-MM-DDT00:00:00'
+    data = await compute_all_planets_async(target_timestamp)
+    cache[cache_key] = data
+
+    return data
+
+
+async def cached_body(cache_key: str) -> bytes | None:
+    """The encoded body from this process's cache, else from the shared store."""
+    with timing.phase("cache"):
+        body = encoded.get(cache_key)
+    if body is None and shared is not None:
+        with timing.phase("shared-cache"):
+            body = await shared.get(cache_key)
+        if body is not None:
+            encoded[cache_key] = body
+    return body
+
+
+async def store_body(cache_key: str, body: bytes):
+    encoded[cache_key] = body
+    if shared is not None:
+        with timing.phase("shared-cache"):
+            await shared.set(cache_key, body)
+
+
+async def reload_info(cache_key: str, timestamp: str) -> Dict:
+    data = await load_info(timestamp)
+    await store_body(cache_key, encode(LunarResponse, data))
+    return data
+
+
+async def reload_planets(cache_key: str, target_timestamp: str) -> Dict:
+    data = await load_planets(cache_key, target_timestamp)
+    await store_body(cache_key, encode(PlanetsResponse, data))
+    return data
+
+
+def stale_info(timestamp: str) -> Dict | None:
+    """The last answer for timestamp even if expired, else a local estimate."""
+    data = cache.stale(timestamp)
+    if data is None and STALE_FALLBACK == "local":
+        data = classify_ephemeris(timestamp, *fetch_local_pair(timestamp))
+    if data is None:
+        return None
+    return {**data, "stale": True}
+
+
+# requests without a timestamp snap to this resolution and are served from
+# snapshots computed ahead of time around now
+now_window = NowWindow(
+    compute_ephemeris_async,
+    resolution_seconds=int(os.getenv("NOW_RESOLUTION_SECONDS", "60")),
+    ahead=int(os.getenv("NOW_WINDOW_AHEAD", "10")),
+    behind=int(os.getenv("NOW_WINDOW_BEHIND", "2")),
+)
+
+
+# answers that follow the clock ("now", future instants) are only cached this long
+NOW_MAX_AGE_SECONDS = int(os.getenv("NOW_MAX_AGE_SECONDS", "300"))
+
+
+def max_age_for(timestamp: str, now: datetime, valid_until: datetime | None = None) -> int | None:
+    """
+    None (immutable) once timestamp is in the past and the request named it
+    explicitly; otherwise a short lifetime, ending at valid_until if that
+    comes sooner.
+    """
+    if valid_until is None and timestamp < now.strftime(TIMESTAMP_FORMAT):
+        return None
+
+    max_age = NOW_MAX_AGE_SECONDS
+    if valid_until is not None:
+        max_age = min(max_age, int((valid_until - now).total_seconds()))
+    return max_age
+
+
+# ------------------ metrics ------------------
+# read from the objects that already keep these numbers, only when scraped
+
+CACHE_LAYERS = {"encoded": encoded, "data": cache, "now_window": now_window}
+
+
+def cache_events():
+    for name, layer in CACHE_LAYERS.items():
+        yield (name, "hit"), layer.hits
+        yield (name, "miss"), layer.misses
+        if isinstance(layer, RefreshingCache):
+            yield (name, "eviction"), layer.evictions
+            yield (name, "expiration"), layer.expirations
+    if shared is not None:
+        yield ("shared", "hit"), shared.hits
+        yield ("shared", "miss"), shared.misses
+        yield ("shared", "error"), shared.errors
+        yield ("shared", "invalidation"), shared.l1_clears
+
+
+def cache_entries():
+    for name, layer in CACHE_LAYERS.items():
+        if isinstance(layer, RefreshingCache):
+            yield (name, "fresh"), layer.currsize
+            yield (name, "stale"), layer.stale_copies.currsize
+        else:
+            yield (name, "fresh"), len(layer.snapshots)
+
+
+metrics.collected("cache_events_total", "Lookups and removals per cache layer", "counter", ("cache", "event"), cache_events)
+metrics.collected("cache_entries", "Entries per cache layer", "gauge", ("cache", "kind"), cache_entries)
+metrics.collected(
+    "inflight_loads", "Distinct cache misses being loaded (DB or compute) right now", "gauge", (),
+    lambda: [((), len(inflight))],
+)
+metrics.collected(
+    "background_refreshes_total", "Near-expiry cache entries reloaded off the request path", "counter", ("outcome",),
+    lambda: [(("ok",), revalidator.refreshed), (("failed",), revalidator.failed)],
+)
+metrics.collected(
+    "write_behind_rows_total", "Rows handed to the write-behind queue, by outcome", "counter", ("outcome",),
+    lambda: [((k,), v) for k, v in writer.stats.items() if k not in ("retries", "batches")],
+)
+metrics.collected(
+    "write_behind_pending", "Rows waiting to be written", "gauge", (),
+    lambda: [((), writer.pending())],
+)
+metrics.collected(
+    "horizons_circuit_state", "1 for the circuit breaker's current state", "gauge", ("state",),
+    lambda: [((state,), int(horizons.breaker.state == state)) for state in (CLOSED, OPEN, HALF_OPEN)],
+)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
 # ------------------ API ------------------
 
 @app.get("/")
@@ -273,29 +542,204 @@ def index():
     status_code=200
 )
 @limiter.limit("60/minute")
-def lunar_angle(
+async def lunar_angle(
     request: Request,
     query: LunarInfoQuery = Depends()
 ):
+    now = datetime.now(timezone.utc)
+
+    valid_until = None
     timestamp = query.timestamp
     if timestamp is None:
-        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+        timestamp = now_window.slot(now)
+        valid_until = (
+            datetime.strptime(timestamp, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+            + timedelta(seconds=now_window.resolution)
+        )
 
-    if timestamp in cache:
-        return cache[timestamp]
+    cache_key = f"info_{EPHEMERIS_SOURCE}_{timestamp}"
 
-    # return from cache if present
-    row = get_by_timestamp(timestamp)
-    if row:
-        cache[timestamp] = row
-        return row
+    etag = make_etag("info", EPHEMERIS_SOURCE, timestamp)
+    headers = cache_headers(etag, max_age_for(timestamp, now, valid_until))
 
-    # compute
-    data = compute_ephemeris(timestamp)
+    # the client already has this body: no cache, DB or compute needed
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(headers)
 
-    # store and cache
-    insert_row(data)
-    cache[timestamp] = data
+    body = await cached_body(cache_key)
+    if body is not None:
+        revalidator.maybe_refresh(cache_key, cache_key, lambda: reload_info(cache_key, timestamp))
+        return EncodedJSONResponse(body, headers=headers)
+
+    with timing.phase("cache"):
+        data = now_window.get(timestamp) if query.timestamp is None else None
+        if data is None:
+            data = cache.get(timestamp)
+    if data is None:
+        try:
+            data = await inflight.do(cache_key, lambda: load_info(timestamp))
+        except HorizonsUnavailable:
+            data = stale_info(timestamp)
+            if data is None:
+                raise
+            STALE_SERVED.inc("info")
+            return EncodedJSONResponse(encode(LunarResponse, data), headers=STALE_HEADERS)
+
+    body = encode(LunarResponse, data)
+    await store_body(cache_key, body)
+
+    return EncodedJSONResponse(body, headers=headers)
+
+
+@app.get(
+    "/info/range",
+    response_model=LunarRangeResponse,
+    status_code=200
+)
+@limiter.limit("20/minute")
+async def lunar_angle_range(
+    request: Request,
+    query: LunarRangeQuery = Depends()
+):
+    cache_key = f"range_{query.start}_{query.stop}_{query.step}"
+
+    if cache_key in cache:
+        return cache[cache_key]
+
+    data = {
+        "start": query.start,
+        "stop": query.stop,
+        "step": query.step,
+        "snapshots": await compute_ephemeris_range_async(query.start, query.stop, query.step),
+    }
+    cache[cache_key] = data
+
+    return data
+
+
+@app.get(
+    "/transitions",
+    response_model=TransitionsResponse,
+    status_code=200
+)
+@limiter.limit("20/minute")
+async def transitions(
+    request: Request,
+    query: TransitionsQuery = Depends()
+):
+    cache_key = f"transitions_{query.start}_{query.stop}"
+
+    if cache_key in cache:
+        return cache[cache_key]
+
+    start = datetime.strptime(query.start, TIMESTAMP_FORMAT)
+    stop = datetime.strptime(query.stop, TIMESTAMP_FORMAT)
+
+    source = await sun_moon_source_async(start, stop)
+
+    data = {
+        "start": query.start,
+        "stop": query.stop,
+        "transitions": find_transitions(source, start, stop),
+    }
+    cache[cache_key] = data
+
+    return data
+
+
+@app.get(
+    "/calendar/{year}/{month}",
+    response_model=CalendarResponse,
+    status_code=200
+)
+@limiter.limit("30/minute")
+async def month_calendar(
+    request: Request,
+    year: int = Path(ge=1600, le=2500),
+    month: int = Path(ge=1, le=12),
+):
+    # one snapshot per day, at UTC midnight
+    cache_key = f"calendar_{year}_{month:02d}"
+
+    if cache_key in cache:
+        return cache[cache_key]
+
+    data = await inflight.do(cache_key, lambda: load_calendar(year, month))
+    cache[cache_key] = data
+
+    return data
+
+
+@app.get(
+    "/upavaas/next",
+    response_model=UpavaasNextResponse,
+    status_code=200
+)
+@limiter.limit("30/minute")
+async def upavaas_next(
+    request: Request,
+    query: UpavaasNextQuery = Depends()
+):
+    # "now" snaps to the now-window slot so repeated queries share a cache entry
+    after = query.after if query.after is not None else now_window.slot()
+    cache_key = f"upavaas_{query.name}_{after}_{query.count}"
+
+    if cache_key in cache:
+        return cache[cache_key]
+
+    occurrences = await next_occurrences(
+        sun_moon_source_async,
+        rule_position(query.name),
+        datetime.strptime(after, TIMESTAMP_FORMAT),
+        query.count,
+        # a yearly observance needs a year per occurrence, plus one spare
+        horizon=timedelta(days=366 * (query.count + 1)),
+    )
+
+    data = {
+        "name": query.name,
+        "after": after,
+        "occurrences": occurrences,
+    }
+    cache[cache_key] = data
+
+    return data
+
+
+# daily nodes interpolate to ~7e-4 deg, far inside the eclipse limits, and
+# keep a decade to a few thousand nodes per body
+GRAHANA_GRID_STEP = 24 * 60 * 60
+
+@app.get(
+    "/grahana",
+    response_model=GrahanaResponse,
+    status_code=200
+)
+@limiter.limit("10/minute")
+async def grahana_search(
+    request: Request,
+    query: GrahanaQuery = Depends()
+):
+    cache_key = f"grahana_{query.start}_{query.stop}"
+
+    if cache_key in cache:
+        return cache[cache_key]
+
+    start = datetime.strptime(query.start, TIMESTAMP_FORMAT)
+    stop = datetime.strptime(query.stop, TIMESTAMP_FORMAT)
+
+    # syzygy refinement and the proximity search look a little past both ends
+    margin = timedelta(days=3)
+    source = await sun_moon_source_async(start - margin, stop + margin, GRAHANA_GRID_STEP)
+
+    grahanas, _ = find_grahanas(source, start, stop)
+
+    data = {
+        "start": query.start,
+        "stop": query.stop,
+        "grahanas": grahanas,
+    }
+    cache[cache_key] = data
 
     return data
 
@@ -316,19 +760,24 @@ PLANET_MAP = {
 
 @app.get(
     "/planets",
-    # response_model=PlanetsResponse, # Uncomment if you want strict validation
+    response_model=PlanetsResponse,
     status_code=200
 )
 @limiter.limit("60/minute")
-def get_planets(
+async def get_planets(
     request: Request,
     query: LunarInfoQuery = Depends()
 ):
     input_date = query.timestamp
-    
+    now = datetime.now(timezone.utc)
+
+    valid_until = None
+
     # If no date provided, get today at midnight
     if input_date is None:
-        target_timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT00:00:00")
+        target_timestamp = now.strftime("%Y-%m-%dT00:00:00")
+        # the default moves on to the next day at midnight
+        valid_until = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
     else:
         # Force whatever string the user sent to midnight
         # We take the first 10 chars (YYYY-MM-DD) and append 00:00:00
@@ -337,12 +786,31 @@ def get_planets(
 
     # Cache key uses the normalized midnight timestamp
     cache_key = f"planets_{target_timestamp}"
-    
-    if cache_key in cache:
-        return cache[cache_key]
-
-    # compute_all_planets now receives 'YYYY-MM-DDT00:00:00'
-    data = compute_all_planets(target_timestamp)
-    cache[cache_key] = data
 
-    return data
\ No newline at end of file
+    etag = make_etag("planets", target_timestamp)
+    headers = cache_headers(etag, max_age_for(target_timestamp, now, valid_until))
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(headers)
+
+    body = await cached_body(cache_key)
+    if body is not None:
+        revalidator.maybe_refresh(cache_key, cache_key, lambda: reload_planets(cache_key, target_timestamp))
+        return EncodedJSONResponse(body, headers=headers)
+
+    with timing.phase("cache"):
+        data = cache.get(cache_key)
+    if data is None:
+        try:
+            data = await inflight.do(cache_key, lambda: load_planets(cache_key, target_timestamp))
+        except HorizonsUnavailable:
+            data = cache.stale(cache_key)
+            if data is None:
+                raise
+            STALE_SERVED.inc("planets")
+            return EncodedJSONResponse(encode(PlanetsResponse, {**data, "stale": True}), headers=STALE_HEADERS)
+
+    body = encode(PlanetsResponse, data)
+    await store_body(cache_key, body)
+
+    return EncodedJSONResponse(body, headers=headers)
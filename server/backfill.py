@@ -0,0 +1,235 @@
+# fills lunar_ephemeris ahead of time so live /info requests are database hits
+#
+#   python backfill.py 1900-01-01T00:00:00 2100-12-31T23:00:00 --step 1h
+#   python backfill.py ... --workers 8 --rate 2      at most 2 Horizons calls/s across all workers
+#   python backfill.py ... --provider local          dry run: analytical Sun/Moon, nothing written
+#
+# The span is cut into chunks of --chunk-rows samples; each chunk is one
+# Horizons series call per body and one batched insert. Finished chunks
+# are recorded in --checkpoint, so rerunning the same command resumes
+# where it stopped. Rows are upserted, so redoing a chunk is harmless.
+#
+# Only Horizons rows are written: the table is served as Horizons data
+# (see EPHEMERIS_SOURCE in app.py), so the lower-accuracy local series is
+# classified and counted, but not stored, and leaves no checkpoint.
+
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import List, Set, Tuple
+
+from fastapi import HTTPException
+
+from analytical import local_series
+from db import insert_rows, stop_tunnel, close_connection
+from ephemeris import classify_series
+from horizons import get_horizons_series, TIMESTAMP_FORMAT
+from models import STEP_UNITS
+
+
+RETRIES = 3
+BACKOFF = 2.0
+
+
+class RateLimiter:
+    """Spaces calls at least 1 / rate seconds apart, shared by all threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+
+        with self.lock:
+            now = time.monotonic()
+            at = max(self.next_at, now)
+            self.next_at = at + self.interval
+
+        if at > now:
+            time.sleep(at - now)
+
+
+def parse_step(step: str) -> Tuple[str, int]:
+    """'1h' or '1 h' -> ('1 h', 3600), the form Horizons and local_series take."""
+    m = re.fullmatch(r"\s*([1-9][0-9]*)\s*([mhd])\s*", step)
+    if not m:
+        raise ValueError(f"Invalid step {step!r}, use a count and m, h or d")
+
+    count, unit = m.groups()
+    return f"{count} {unit}", int(count) * STEP_UNITS[unit]
+
+
+def plan_chunks(
+    start: datetime,
+    stop: datetime,
+    step_seconds: int,
+    chunk_rows: int,
+) -> List[Tuple[datetime, datetime]]:
+    step = timedelta(seconds=step_seconds)
+
+    chunks = []
+    chunk_start = start
+    while chunk_start <= stop:
+        chunk_stop = min(chunk_start + step * (chunk_rows - 1), stop)
+        chunks.append((chunk_start, chunk_stop))
+        chunk_start = chunk_stop + step
+    return chunks
+
+
+# ------------------ checkpoint ------------------
+
+def load_checkpoint(path: str, plan: dict) -> Set[int]:
+    if not os.path.exists(path):
+        return set()
+
+    with open(path) as f:
+        saved = json.load(f)
+
+    if saved.get("plan") != plan:
+        raise SystemExit(
+            f"{path} belongs to a different run ({saved.get('plan')}); "
+            "pass another --checkpoint or delete it"
+        )
+    return set(saved["done"])
+
+
+def save_checkpoint(path: str, plan: dict, done: Set[int]):
+    # write then rename, so an interrupted save never leaves half a file
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"plan": plan, "done": sorted(done)}, f)
+    os.replace(tmp, path)
+
+
+# ------------------ work ------------------
+
+def fetch_series(provider: str, limiter: RateLimiter, command: str, start: datetime, stop: datetime, step: str):
+    if provider != "horizons":
+        return local_series(command, start, stop, step)
+
+    for attempt in range(RETRIES + 1):
+        limiter.wait()
+        try:
+            return get_horizons_series(command, start, stop, step)
+        except HTTPException as exc:
+            # 503 is the service being unreachable; a 502 will not improve on retry
+            if exc.status_code != 503 or attempt == RETRIES:
+                raise
+            time.sleep(BACKOFF * 2 ** attempt)
+
+
+def fill_chunk(provider: str, limiter: RateLimiter, start: datetime, stop: datetime, step: str) -> int:
+    surya_rows = fetch_series(provider, limiter, "10", start, stop, step)
+    chandra_rows = fetch_series(provider, limiter, "301", start, stop, step)
+
+    snapshots = classify_series(surya_rows, chandra_rows)
+    if provider == "horizons":
+        insert_rows(snapshots)
+    return len(snapshots)
+
+
+def backfill(
+    start: str,
+    stop: str,
+    step: str,
+    provider: str,
+    workers: int,
+    rate: float,
+    chunk_rows: int,
+    checkpoint: str,
+) -> int:
+    step, step_seconds = parse_step(step)
+    dt_start = datetime.strptime(start, TIMESTAMP_FORMAT)
+    dt_stop = datetime.strptime(stop, TIMESTAMP_FORMAT)
+
+    chunks = plan_chunks(dt_start, dt_stop, step_seconds, chunk_rows)
+    plan = {"start": start, "stop": stop, "step": step, "chunk_rows": chunk_rows}
+
+    persist = provider == "horizons"
+    if persist:
+        done = load_checkpoint(checkpoint, plan)
+    else:
+        done = set()
+        print(f"--provider {provider}: rows are classified but not written, only Horizons rows are stored")
+    todo = [i for i in range(len(chunks)) if i not in done]
+    print(f"{len(chunks)} chunks of up to {chunk_rows} rows, {len(done)} already done")
+
+    limiter = RateLimiter(rate)
+    failed = []
+    rows = 0
+    started = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(fill_chunk, provider, limiter, *chunks[i], step): i
+            for i in todo
+        }
+
+        for finished, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            chunk_start, chunk_stop = chunks[i]
+
+            try:
+                rows += future.result()
+            except Exception as exc:
+                failed.append(i)
+                print(f"chunk {chunk_start} .. {chunk_stop} failed: {exc!r}")
+                continue
+
+            done.add(i)
+            if persist:
+                save_checkpoint(checkpoint, plan, done)
+
+            elapsed = max(time.monotonic() - started, 1e-9)
+            eta = elapsed / finished * (len(todo) - finished)
+            print(
+                f"{len(done)}/{len(chunks)} chunks, {rows} rows, "
+                f"{rows / elapsed:.0f} rows/s, eta {eta:.0f}s, up to {chunk_stop}"
+            )
+
+    if failed:
+        print(f"{len(failed)} chunks failed; rerun the same command to retry them")
+    return len(failed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute lunar_ephemeris for a date range")
+    parser.add_argument("start", help="first instant, YYYY-MM-DDTHH:MM:SS (UTC)")
+    parser.add_argument("stop", help="last instant, inclusive")
+    parser.add_argument("--step", default="1h", help="sample spacing like 1m, 1h or 1d")
+    parser.add_argument(
+        "--provider",
+        choices=["horizons", "local"],
+        default="horizons",
+        help="local is a dry run: nothing is written",
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=1.0, help="Horizons calls per second over all workers, 0 for no limit")
+    parser.add_argument("--chunk-rows", type=int, default=1000)
+    parser.add_argument("--checkpoint", default="backfill.checkpoint.json")
+    args = parser.parse_args()
+
+    try:
+        failures = backfill(
+            args.start,
+            args.stop,
+            args.step,
+            args.provider,
+            args.workers,
+            args.rate,
+            args.chunk_rows,
+            args.checkpoint,
+        )
+    finally:
+        close_connection()
+        stop_tunnel()
+
+    raise SystemExit(1 if failures else 0)
@@ -0,0 +1,105 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from horizons_parser import HorizonsResponseError, HorizonsUnavailable
+
+from horizons import Vector, TIMESTAMP_FORMAT
+
+
+# Horizons accepts far longer lists, but the whole TLIST travels in the query string
+MAX_TLIST_SIZE = 100
+
+TlistFetch = Callable[[str, Iterable[datetime], str], Dict[datetime, Vector]]
+
+
+class HorizonsBatcher:
+    """
+    Collects single-timestamp lookups for a few milliseconds and sends
+    them as one TLIST request per (body, center). The requests of one
+    flush go out concurrently. Every caller gets a future for its own
+    row; a failed request fails all of its callers.
+    """
+
+    def __init__(self, fetch: TlistFetch, window_ms: float = 5.0, max_workers: int = 8):
+        self.fetch = fetch
+        self.window = window_ms / 1000
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="horizons-batch")
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, str], Dict[datetime, List[Future]]] = {}
+        self._timer = None
+        self._closed = False
+
+    def submit(self, command: str, timestamp: str, center: str = "399") -> Future:
+        dt = datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+        future = Future()
+
+        with self._lock:
+            if self._closed:
+                future.set_exception(HorizonsUnavailable())
+                return future
+
+            waiters = self._pending.setdefault((command, center), {})
+            waiters.setdefault(dt, []).append(future)
+
+            if self._timer is None:
+                self._timer = threading.Timer(self.window, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        return future
+
+    def _flush(self):
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            self._timer = None
+
+        for (command, center), waiters in pending.items():
+            epochs = sorted(waiters)
+            for i in range(0, len(epochs), MAX_TLIST_SIZE):
+                chunk = {dt: waiters[dt] for dt in epochs[i:i + MAX_TLIST_SIZE]}
+                try:
+                    task = self._executor.submit(self._resolve, command, center, chunk)
+                except RuntimeError:
+                    # shut down between submit() and this flush
+                    self._fail(chunk, HorizonsUnavailable())
+                    continue
+                # cancelled by shutdown() before it ran: its callers still get an answer
+                task.add_done_callback(lambda t, chunk=chunk: t.cancelled() and self._fail(chunk, HorizonsUnavailable()))
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            timer, self._timer = self._timer, None
+            pending, self._pending = self._pending, {}
+        if timer is not None:
+            timer.cancel()
+
+        # the window that timer would have flushed
+        for waiters in pending.values():
+            self._fail(waiters, HorizonsUnavailable())
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _fail(waiters: Dict[datetime, List[Future]], exc: Exception):
+        for futures in waiters.values():
+            for future in futures:
+                if not future.done():
+                    future.set_exception(exc)
+
+    def _resolve(self, command: str, center: str, waiters: Dict[datetime, List[Future]]):
+        try:
+            rows = self.fetch(command, waiters.keys(), center)
+        except Exception as exc:
+            self._fail(waiters, exc)
+            return
+
+        for dt, futures in waiters.items():
+            xyz = rows.get(dt)
+            for future in futures:
+                if xyz is None:
+                    future.set_exception(HorizonsResponseError(f"Ephemeris parsing failed: no row for {dt}"))
+                else:
+                    future.set_result(xyz)
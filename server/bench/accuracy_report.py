@@ -0,0 +1,82 @@
+# compares the local analytical ephemeris against recorded Horizons vectors
+# (bench/horizons_samples.json; so far two instants in January 2026, so the
+# report only speaks for that period)
+#
+#   python bench/accuracy_report.py
+#   python bench/accuracy_report.py --record 2026-01-01T00:00:00 2026-12-31T00:00:00 "7 d"
+
+import argparse
+import json
+import math
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from analytical import local_xyz_many
+from ephemeris import cartesian_to_latitude, cartesian_to_longitude
+from horizons import get_horizons_series, TIMESTAMP_FORMAT
+
+
+SAMPLES_PATH = os.path.join(os.path.dirname(__file__), "horizons_samples.json")
+
+
+def load_samples() -> list[dict]:
+    with open(SAMPLES_PATH) as f:
+        return json.load(f)
+
+
+def record(start: str, stop: str, step: str):
+    dt_start = datetime.strptime(start, TIMESTAMP_FORMAT)
+    dt_stop = datetime.strptime(stop, TIMESTAMP_FORMAT)
+
+    sun = dict(get_horizons_series("10", dt_start, dt_stop, step))
+    moon = dict(get_horizons_series("301", dt_start, dt_stop, step))
+
+    samples = {s["timestamp"]: s for s in load_samples()}
+    for epoch, xyz in sun.items():
+        if epoch in moon:
+            ts = epoch.strftime(TIMESTAMP_FORMAT)
+            samples[ts] = {"timestamp": ts, "sun": list(xyz), "moon": list(moon[epoch])}
+
+    with open(SAMPLES_PATH, "w") as f:
+        json.dump(sorted(samples.values(), key=lambda s: s["timestamp"]), f, indent=2)
+
+    print(f"{len(samples)} samples in {SAMPLES_PATH}")
+
+
+def angle_diff(a: float, b: float) -> float:
+    d = abs(a - b) % 360
+    return min(d, 360 - d)
+
+
+def report():
+    samples = load_samples()
+    epochs = [datetime.strptime(s["timestamp"], TIMESTAMP_FORMAT) for s in samples]
+
+    for body, key in (("10", "sun"), ("301", "moon")):
+        local = local_xyz_many(body, epochs)
+
+        lon_err, lat_err, dist_err = [], [], []
+        for xyz, sample in zip(local, samples):
+            ref = sample[key]
+            lon_err.append(angle_diff(cartesian_to_longitude(*xyz), cartesian_to_longitude(*ref)))
+            lat_err.append(abs(cartesian_to_latitude(*xyz) - cartesian_to_latitude(*ref)))
+            dist_err.append(abs(math.dist(xyz, (0, 0, 0)) - math.dist(ref, (0, 0, 0))))
+
+        print(f"{key:<5} samples={len(samples)}")
+        print(f"  longitude  max {max(lon_err):.5f} deg  mean {sum(lon_err) / len(lon_err):.5f} deg")
+        print(f"  latitude   max {max(lat_err):.5f} deg  mean {sum(lat_err) / len(lat_err):.5f} deg")
+        print(f"  distance   max {max(dist_err):.1f} km   mean {sum(dist_err) / len(dist_err):.1f} km")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local ephemeris accuracy against Horizons")
+    parser.add_argument("--record", nargs=3, metavar=("START", "STOP", "STEP"),
+                        help="fetch Horizons vectors for the span and add them to the samples")
+    args = parser.parse_args()
+
+    if args.record:
+        record(*args.record)
+    report()
@@ -0,0 +1,83 @@
+# scalar classify_ephemeris vs the vectorized batch classifier, and a check
+# that both classify every sample identically
+#
+# Every label, index and upavaas list must match exactly, the float
+# longitudes to within SNAPSHOT_FLOAT_TOLERANCE (see snapshot_differences).
+#
+#   python bench/bench_classify.py [samples]
+#
+# Samples are hourly analytical Sun/Moon vectors from 1950 on (10^6 hours
+# is about 114 years), so eclipse seasons and every tithi/rashi boundary
+# region are covered.
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from analytical import local_xyz_many
+from ephemeris import (
+    SNAPSHOT_FLOAT_FIELDS,
+    SNAPSHOT_FLOAT_TOLERANCE,
+    classified_snapshots,
+    classify_arrays,
+    classify_ephemeris,
+    snapshot_differences,
+)
+from horizons import TIMESTAMP_FORMAT
+
+
+CHUNK = 100_000
+
+
+def sample_vectors(n: int):
+    start = datetime(1950, 1, 1)
+    epochs = [start + timedelta(hours=i) for i in range(n)]
+
+    surya = np.concatenate([local_xyz_many("10", epochs[i:i + CHUNK]) for i in range(0, n, CHUNK)])
+    chandra = np.concatenate([local_xyz_many("301", epochs[i:i + CHUNK]) for i in range(0, n, CHUNK)])
+
+    timestamps = [dt.strftime(TIMESTAMP_FORMAT) for dt in epochs]
+    return timestamps, surya, chandra
+
+
+def main(n: int):
+    timestamps, surya, chandra = sample_vectors(n)
+    surya_xyz = [tuple(v) for v in surya.tolist()]
+    chandra_xyz = [tuple(v) for v in chandra.tolist()]
+
+    started = time.perf_counter()
+    scalar = [
+        classify_ephemeris(ts, s, c)
+        for ts, s, c in zip(timestamps, surya_xyz, chandra_xyz)
+    ]
+    scalar_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    classes = classify_arrays(surya, chandra)
+    arrays_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch = classified_snapshots(timestamps, surya_xyz, chandra_xyz)
+    batch_s = time.perf_counter() - started
+
+    assert len(batch) == len(scalar)
+    for ts, a, b in zip(timestamps, scalar, batch):
+        diff = snapshot_differences(a, b)
+        assert not diff, f"{ts}: {', '.join(diff)} differ"
+
+    last_bit = sum(a[key] != b[key] for a, b in zip(scalar, batch) for key in SNAPSHOT_FLOAT_FIELDS)
+    eclipses = int(np.count_nonzero(classes["grahana"]))
+    print(f"{n} samples classified identically, {eclipses} flagged grahana")
+    print(f"{last_bit} longitudes differ in the last bit only (<= {SNAPSHOT_FLOAT_TOLERANCE} deg)")
+    print(f"scalar classify_ephemeris   {scalar_s:7.2f} s   {scalar_s / n * 1e6:6.2f} us/sample")
+    print(f"classify_arrays (indices)   {arrays_s:7.2f} s   {arrays_s / n * 1e6:6.2f} us/sample   x{scalar_s / arrays_s:.0f}")
+    print(f"classified_snapshots        {batch_s:7.2f} s   {batch_s / n * 1e6:6.2f} us/sample   x{scalar_s / batch_s:.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
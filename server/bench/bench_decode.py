@@ -0,0 +1,88 @@
+# read-side decode cost and stored size per row, old JSON/VARCHAR layout vs typed layout
+#
+#   python bench/bench_decode.py [rows]
+
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from analytical import get_local_xyz
+from db import decode_row, encode_row, COLUMNS
+from ephemeris import classify_ephemeris
+from migrate_schema import decode_legacy_row
+
+
+def sample_snapshots(n: int) -> list[dict]:
+    start = datetime(2026, 1, 1)
+    snapshots = []
+    for i in range(n):
+        ts = (start + timedelta(hours=7 * i)).strftime("%Y-%m-%dT%H:%M:%S")
+        snapshots.append(classify_ephemeris(ts, get_local_xyz("10", ts), get_local_xyz("301", ts)))
+    return snapshots
+
+
+def legacy_row(data: dict) -> dict:
+    # what pymysql's DictCursor returns for the old layout
+    return {
+        "utc_stamp": datetime.strptime(data["timestamp"], "%Y-%m-%dT%H:%M:%S"),
+        **{k: data[k] for k in (
+            "ayana", "ritu", "masa", "paksha", "tithi", "phase", "surya_rashi", "chandra_rashi",
+            "surya_longitude_deg", "chandra_longitude_deg", "longitudinal_angle_deg", "grahana",
+        )},
+        "surya_xyz": json.dumps(data["surya_xyz"]),
+        "chandra_xyz": json.dumps(data["chandra_xyz"]),
+        "upavaas": json.dumps(data["upavaas"]),
+        "created_at": datetime.now(),
+    }
+
+
+def typed_row(data: dict) -> dict:
+    return dict(zip(COLUMNS, encode_row(data)))
+
+
+def legacy_size(row: dict) -> int:
+    # TIMESTAMP 4, DOUBLE 8 each, VARCHAR/JSON payload + 1 length byte
+    size = 4 + 4 + 3 * 8
+    for key in ("ayana", "ritu", "masa", "paksha", "tithi", "phase", "surya_rashi", "chandra_rashi",
+                "grahana", "surya_xyz", "chandra_xyz", "upavaas"):
+        size += len(str(row[key]).encode()) + 1
+    return size
+
+
+# DATETIME, TIMESTAMP, 7 TINYINT, 9 DOUBLE, 1 SMALLINT
+TYPED_SIZE = 5 + 4 + 7 + 9 * 8 + 2
+
+
+def per_row_us(fn, rows, repeat=5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for row in rows:
+            fn(row)
+        best = min(best, time.perf_counter() - started)
+    return best / len(rows) * 1e6
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    snapshots = sample_snapshots(n)
+
+    legacy = [legacy_row(s) for s in snapshots]
+    typed = [typed_row(s) for s in snapshots]
+
+    # the two layouts must decode to the same API payload
+    for old, new in zip(legacy, typed):
+        assert decode_legacy_row(old) == decode_row(new)
+
+    legacy_us = per_row_us(decode_legacy_row, legacy)
+    typed_us = per_row_us(decode_row, typed)
+    legacy_bytes = sum(legacy_size(r) for r in legacy) / n
+
+    print(f"rows: {n}")
+    print(f"legacy  decode {legacy_us:6.2f} us/row   ~{legacy_bytes:.0f} bytes/row")
+    print(f"typed   decode {typed_us:6.2f} us/row   ~{TYPED_SIZE} bytes/row")
+    print(f"speedup {legacy_us / typed_us:.2f}x, {legacy_bytes / TYPED_SIZE:.1f}x smaller")
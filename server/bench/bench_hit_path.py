@@ -0,0 +1,132 @@
+# requests/s on the cache-hit path of /info and /planets, before and after
+# caching encoded bodies
+#
+#   python bench/bench_hit_path.py [requests per round] [rounds]
+#
+# "before" replays the old handlers: return the cached dict and let FastAPI
+# validate it against the response model and serialize it on every request.
+# "after" is the real handler with its encoded body already cached. Only
+# these routes are mounted, on a bare app without the middleware stack
+# (Server-Timing, profiler, metrics, CORS), so what differs is the handler
+# and serialization alone; with the middleware in place its cost swamps
+# the difference. Requests go straight into the ASGI app, as an HTTP client
+# would add its own overhead. Every cache is warmed before timing, and the two sides
+# alternate over several rounds so drift hits both. The median of the
+# rounds is reported with the range of the ratio.
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import orjson
+from fastapi import Depends, FastAPI
+
+import app as server
+from analytical import get_local_xyz
+from ephemeris import classify_ephemeris
+from models import LunarInfoQuery, LunarResponse, PlanetsResponse
+
+
+TIMESTAMP = "2026-03-01T12:00:00"
+PLANETS_KEY = "planets_2026-03-01T00:00:00"
+WARMUP = 200
+
+
+def seed_cache():
+    server.cache[TIMESTAMP] = classify_ephemeris(
+        TIMESTAMP, get_local_xyz("10", TIMESTAMP), get_local_xyz("301", TIMESTAMP)
+    )
+    server.cache[PLANETS_KEY] = {
+        "date": "2026-03-01T00:00:00",
+        "planets": [
+            server.planet_entry(name, (1.0e8 + i, 2.0e7 - i, 3.0e5 * i))
+            for i, name in enumerate(server.PLANET_MAP)
+        ],
+    }
+
+
+def bench_app() -> FastAPI:
+    bench = FastAPI()
+    bench.state.limiter = server.limiter
+    bench.router.routes.extend(
+        route for route in server.app.router.routes
+        if getattr(route, "path", None) in ("/info", "/planets")
+    )
+
+    @bench.get("/legacy/info", response_model=LunarResponse)
+    async def info(query: LunarInfoQuery = Depends()):
+        return server.cache[query.timestamp]
+
+    @bench.get("/legacy/planets", response_model=PlanetsResponse)
+    async def planets(query: LunarInfoQuery = Depends()):
+        return server.cache[f"planets_{query.timestamp[:10]}T00:00:00"]
+
+    return bench
+
+
+async def get(app, path: str, query: str):
+    """One GET straight into the ASGI app: no HTTP client, no sockets."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query.encode(), "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    assert sent[0]["status"] == 200, sent[0]
+    return b"".join(m.get("body", b"") for m in sent[1:])
+
+
+async def requests_per_second(app, path: str, query: str, n: int) -> float:
+    started = time.perf_counter()
+    for _ in range(n):
+        await get(app, path, query)
+    return n / (time.perf_counter() - started)
+
+
+async def main(n: int, rounds: int):
+    # the hit path is what is measured, not the per-IP limit
+    server.limiter.enabled = False
+    seed_cache()
+
+    bench = bench_app()
+    query = f"timestamp={TIMESTAMP}"
+
+    for path in ("/info", "/planets"):
+        before_body = orjson.loads(await get(bench, "/legacy" + path, query))
+        after_body = orjson.loads(await get(bench, path, query))
+        assert before_body == after_body, f"{path} bodies differ"
+
+        await requests_per_second(bench, "/legacy" + path, query, WARMUP)
+        await requests_per_second(bench, path, query, WARMUP)
+
+        before, after = [], []
+        for _ in range(rounds):
+            before.append(await requests_per_second(bench, "/legacy" + path, query, n))
+            after.append(await requests_per_second(bench, path, query, n))
+
+        ratios = [a / b for a, b in zip(after, before)]
+        b, a = statistics.median(before), statistics.median(after)
+        print(
+            f"{path:9} before {b:7.0f} req/s ({1e6 / b:4.0f} us)   after {a:7.0f} req/s ({1e6 / a:4.0f} us)"
+            f"   x{statistics.median(ratios):.2f} (x{min(ratios):.2f}-x{max(ratios):.2f} over {rounds} rounds)"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 3000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 7,
+    ))
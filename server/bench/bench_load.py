@@ -0,0 +1,283 @@
+# Load and latency of /info and /planets against local stand-ins for
+# Horizons (bench/fake_horizons.py, over real HTTP) and MySQL
+# (bench/db_standin.py, behind db.py's own pool and queries), so runs are
+# reproducible and nothing leaves the machine.
+#
+#   python bench/bench_load.py
+#   python bench/bench_load.py --concurrency 1,16,64 --requests 2000 --latency-ms 150 --error-rate 0.02
+#   python bench/bench_load.py --json after.json --compare before.json
+#
+# Workloads, per endpoint and concurrency level:
+#   hit    requests spread over a small hot set, loaded once beforehand
+#   miss   every request a timestamp nobody asked for, caches and DB empty
+#   mixed  --hot-share of requests from the hot set, the rest misses
+#
+# Each run reports throughput, p50/p95/p99 latency, the cache hit ratio
+# (requests answered without a load of their own), Horizons calls and
+# errors at the stand-in, and DB statements. --json writes every run as
+# one record; --compare prints throughput and p99 against an earlier file.
+# Timestamps come from --seed, so two runs of a build issue the same
+# requests in the same order.
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+HOT_SET = 16
+
+# the span request timestamps are drawn from
+SPAN_START = datetime(1950, 1, 1)
+SPAN_DAYS = 150 * 365
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load benchmark with local Horizons and DB stand-ins")
+    parser.add_argument("--endpoints", default="info,planets")
+    parser.add_argument("--workloads", default="hit,miss,mixed")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated levels")
+    parser.add_argument("--requests", type=int, default=500, help="per run")
+    parser.add_argument("--hot-share", type=float, default=0.9, help="share of mixed requests from the hot set")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Horizons stand-in delay per query")
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--db-latency-ms", type=float, default=1.0, help="DB stand-in delay per statement")
+    parser.add_argument("--replay", help="recorded Horizons results (see fake_horizons.py --record)")
+    parser.add_argument("--grid-minutes", type=int, help="INTERPOLATION_STEP_MINUTES for this run, 0 disables the grid")
+    parser.add_argument("--vector-store", help="VECTOR_STORE_PATH for this run; off by default")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write the results here")
+    parser.add_argument("--compare", help="results of an earlier run to compare against")
+    return parser.parse_args()
+
+
+ARGS = parse_args()
+
+# read when app is imported
+os.environ["VECTOR_STORE_PATH"] = ARGS.vector_store or ""
+if ARGS.grid_minutes is not None:
+    os.environ["INTERPOLATION_STEP_MINUTES"] = str(ARGS.grid_minutes)
+
+import httpx
+
+import app as server
+import db
+import horizons
+from breaker import CircuitBreaker
+from db_standin import StandInDatabase
+from fake_horizons import FakeHorizons
+
+
+# ------------------ requests ------------------
+
+class Paths:
+    """Request paths for one endpoint, from a seeded generator."""
+
+    def __init__(self, endpoint: str, seed: int):
+        self.endpoint = endpoint
+        self.random = random.Random(seed)
+        self.used = set()
+        self.hot = [self.fresh() for _ in range(HOT_SET)]
+
+    def fresh(self) -> str:
+        while True:
+            if self.endpoint == "planets":
+                instant = SPAN_START + timedelta(days=self.random.randrange(SPAN_DAYS))
+            else:
+                instant = SPAN_START + timedelta(seconds=self.random.randrange(SPAN_DAYS * 86400))
+            if instant not in self.used:
+                self.used.add(instant)
+                return f"/{self.endpoint}?timestamp={instant.strftime(horizons.TIMESTAMP_FORMAT)}"
+
+    def workload(self, name: str, n: int, hot_share: float) -> List[str]:
+        if name == "hit":
+            return [self.random.choice(self.hot) for _ in range(n)]
+        if name == "miss":
+            return [self.fresh() for _ in range(n)]
+        return [
+            self.random.choice(self.hot) if self.random.random() < hot_share else self.fresh()
+            for _ in range(n)
+        ]
+
+
+# ------------------ measurement ------------------
+
+class LoadCounter:
+    """Wraps app.load_info / app.load_planets: every call is a cache miss."""
+
+    def __init__(self):
+        self.loads = 0
+
+    def wrap(self, load):
+        async def counted(*args):
+            self.loads += 1
+            return await load(*args)
+        return counted
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def drive(client: httpx.AsyncClient, paths: List[str], concurrency: int):
+    latencies = []
+    statuses: Dict[str, int] = {}
+    position = iter(range(len(paths)))
+
+    async def worker():
+        for i in position:
+            started = time.perf_counter()
+            r = await client.get(paths[i])
+            latencies.append(time.perf_counter() - started)
+            statuses[str(r.status_code)] = statuses.get(str(r.status_code), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return time.perf_counter() - started, sorted(latencies), statuses
+
+
+def reset_state(database: StandInDatabase):
+    for cache in (server.cache, server.encoded):
+        cache.clear()
+        cache.stale_copies.clear()
+    if server.grid is not None:
+        server.grid.nodes.clear()
+    database.clear()
+    # the previous run's failures must not keep this one's circuit open
+    horizons.breaker = CircuitBreaker(horizons.breaker.failure_threshold, horizons.breaker.reset_seconds)
+
+
+async def run(client, endpoint, workload, concurrency, database, fake, counter) -> Dict:
+    reset_state(database)
+    paths = Paths(endpoint, ARGS.seed)
+
+    if workload != "miss":
+        # the hot set is loaded, and persisted, before anything is measured
+        for path in paths.hot:
+            await client.get(path)
+        await asyncio.to_thread(flush_writes)
+
+    requests = paths.workload(workload, ARGS.requests, ARGS.hot_share)
+
+    fake.reset()
+    database.reset_stats()
+    counter.loads = 0
+
+    seconds, latencies, statuses = await drive(client, requests, concurrency)
+    upstream = fake.snapshot()
+    statements = database.snapshot()
+
+    return {
+        "endpoint": endpoint,
+        "workload": workload,
+        "concurrency": concurrency,
+        "requests": len(requests),
+        "seconds": round(seconds, 4),
+        "throughput_rps": round(len(requests) / seconds, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1e3, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1e3, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1e3, 3),
+        "cache_hit_ratio": round(1 - counter.loads / len(requests), 4),
+        "statuses": statuses,
+        "horizons_calls": upstream["calls"],
+        "horizons_errors": upstream["errors"],
+        "horizons_epochs": upstream["epochs"],
+        "db_selects": statements["selects"] + statements["range_selects"],
+        "db_rows_written": statements["rows_written"],
+    }
+
+
+def flush_writes():
+    deadline = time.monotonic() + 10
+    while server.writer.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+# ------------------ report ------------------
+
+def print_run(result: Dict):
+    print(
+        f"{result['endpoint']:8} {result['workload']:6} c={result['concurrency']:<4}"
+        f" {result['throughput_rps']:9.1f} req/s"
+        f"  p50 {result['p50_ms']:8.2f}  p95 {result['p95_ms']:8.2f}  p99 {result['p99_ms']:8.2f} ms"
+        f"  hit {result['cache_hit_ratio']:6.1%}"
+        f"  horizons {result['horizons_calls']:5} ({result['horizons_errors']} err)"
+        f"  db {result['db_selects']:5}"
+    )
+
+
+def print_comparison(results: List[Dict], path: str):
+    with open(path) as f:
+        baseline = {
+            (r["endpoint"], r["workload"], r["concurrency"]): r
+            for r in json.load(f)["runs"]
+        }
+
+    print(f"\nagainst {path}")
+    for result in results:
+        before = baseline.get((result["endpoint"], result["workload"], result["concurrency"]))
+        if before is None:
+            continue
+        throughput = result["throughput_rps"] / before["throughput_rps"] - 1
+        p99 = result["p99_ms"] / before["p99_ms"] - 1 if before["p99_ms"] else 0.0
+        print(
+            f"{result['endpoint']:8} {result['workload']:6} c={result['concurrency']:<4}"
+            f" throughput {throughput:+7.1%}   p99 {p99:+7.1%}"
+            f"   horizons {before['horizons_calls']} -> {result['horizons_calls']}"
+        )
+
+
+async def main():
+    # the service is measured, not the per-IP limit
+    server.limiter.enabled = False
+
+    fake = FakeHorizons(
+        latency_ms=ARGS.latency_ms, jitter_ms=ARGS.jitter_ms, error_rate=ARGS.error_rate,
+        replay=ARGS.replay, seed=ARGS.seed,
+    )
+    horizons.HORIZONS_URL = fake.start()
+
+    database = StandInDatabase(latency_ms=ARGS.db_latency_ms)
+    db.pool = db.ConnectionPool(database.connect, size=db.POOL_SIZE, timeout=db.POOL_TIMEOUT)
+
+    counter = LoadCounter()
+    server.load_info = counter.wrap(server.load_info)
+    server.load_planets = counter.wrap(server.load_planets)
+    server.writer.start()
+
+    results = []
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        for endpoint in ARGS.endpoints.split(","):
+            for workload in ARGS.workloads.split(","):
+                for concurrency in (int(c) for c in ARGS.concurrency.split(",")):
+                    result = await run(client, endpoint, workload, concurrency, database, fake, counter)
+                    print_run(result)
+                    results.append(result)
+
+    await horizons.close_async_client()
+    server.batcher.shutdown()
+    server.writer.shutdown()
+    fake.stop()
+
+    if ARGS.json:
+        config = {k: v for k, v in vars(ARGS).items() if k not in ("json", "compare")}
+        with open(ARGS.json, "w") as f:
+            json.dump({"created": datetime.now().isoformat(timespec="seconds"), "config": config, "runs": results}, f, indent=2)
+        print(f"\n{len(results)} runs written to {ARGS.json}")
+
+    if ARGS.compare:
+        print_comparison(results, ARGS.compare)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
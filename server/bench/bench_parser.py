@@ -0,0 +1,121 @@
+# Horizons result parsing: the old regex parser on the text layout vs
+# horizons_parser.parse_csv on the CSV_FORMAT=YES layout
+#
+#   python bench/bench_parser.py [rows]
+#   python bench/bench_parser.py --file result.txt     time parse_csv on a saved CSV result
+#
+# Both layouts are rendered from the same analytical vectors, line for
+# line as Horizons prints them, so the two parsers see the same rows.
+
+import argparse
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from analytical import local_xyz_many
+from horizons import datetime_to_jd
+from horizons_parser import parse_csv, jd_to_datetime
+
+
+HEADER = "*" * 79 + "\nEphemeris / API_USER\n" + "*" * 79 + "\n"
+
+# the parser this module replaced, kept here as the baseline
+EPOCH_RE = re.compile(r"^\s*([0-9]+\.[0-9]+)\s*=")
+XYZ_RE = re.compile(
+    r"X\s*=\s*([-0-9.E+]+)\s*Y\s*=\s*([-0-9.E+]+)\s*Z\s*=\s*([-0-9.E+]+)"
+)
+
+
+def legacy_parse_vectors(text: str):
+    match = re.search(r"\$\$SOE(.*?)\$\$EOE", text, re.S)
+
+    rows = []
+    epoch = None
+
+    for line in match.group(1).splitlines():
+        m = EPOCH_RE.match(line)
+        if m:
+            epoch = jd_to_datetime(float(m.group(1)))
+            continue
+
+        m = XYZ_RE.search(line)
+        if m and epoch is not None:
+            rows.append((epoch, (float(m.group(1)), float(m.group(2)), float(m.group(3)))))
+            epoch = None
+
+    return rows
+
+
+def render(n: int):
+    start = datetime(2026, 1, 1)
+    epochs = [start + timedelta(hours=i) for i in range(n)]
+    xyz = local_xyz_many("301", epochs)
+    jds = [datetime_to_jd(dt) for dt in epochs]
+
+    text_rows = []
+    csv_rows = []
+    for dt, jd, (x, y, z) in zip(epochs, jds, xyz.tolist()):
+        date = dt.strftime("%Y-%b-%d %H:%M:%S.0000")
+        # default VEC_TABLE=3: state, then LT/RG/RR
+        text_rows.append(
+            f"{jd:.9f} = A.D. {date} TDB \n"
+            f" X ={x: .15E} Y ={y: .15E} Z ={z: .15E}\n"
+            f" VX={0.0: .15E} VY={0.0: .15E} VZ={0.0: .15E}\n"
+            f" LT={1.0: .15E} RG={x: .15E} RR={0.0: .15E}"
+        )
+        csv_rows.append(f"{jd:.9f}, A.D. {date}, {x: .15E}, {y: .15E}, {z: .15E},")
+
+    text = HEADER + "$$SOE\n" + "\n".join(text_rows) + "\n$$EOE\n"
+    csv = HEADER + "$$SOE\n" + "\n".join(csv_rows) + "\n$$EOE\n"
+    return text, csv
+
+
+def timed(fn, *args, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("rows", type=int, nargs="?", default=5000)
+    parser.add_argument("--file", help="a saved CSV_FORMAT=YES result")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file) as f:
+            csv = f.read()
+        table = parse_csv(csv)
+        seconds = timed(parse_csv, csv)
+        print(f"{len(table)} rows, parse_csv {seconds * 1e3:.2f} ms ({seconds / len(table) * 1e6:.2f} us/row)")
+        return
+
+    text, csv = render(args.rows)
+
+    legacy = legacy_parse_vectors(text)
+    table = parse_csv(csv)
+    assert [epoch for epoch, _ in legacy] == table.epochs()
+    assert np.allclose(np.array([xyz for _, xyz in legacy]), table.values, rtol=0, atol=1e-6)
+
+    legacy_s = timed(legacy_parse_vectors, text)
+    csv_s = timed(parse_csv, csv)
+    rows_s = timed(lambda: parse_csv(csv).rows())
+
+    n = args.rows
+    print(f"{n} rows, text {len(text) / 1e6:.2f} MB vs csv {len(csv) / 1e6:.2f} MB")
+    print(f"legacy regex parser     {legacy_s * 1e3:7.2f} ms   {legacy_s / n * 1e6:5.2f} us/row")
+    print(f"parse_csv (array)       {csv_s * 1e3:7.2f} ms   {csv_s / n * 1e6:5.2f} us/row   x{legacy_s / csv_s:.1f}")
+    print(f"parse_csv().rows()      {rows_s * 1e3:7.2f} ms   {rows_s / n * 1e6:5.2f} us/row   x{legacy_s / rows_s:.1f}")
+
+
+if __name__ == "__main__":
+    main()
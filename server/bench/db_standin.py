@@ -0,0 +1,123 @@
+# In-memory stand-in for the lunar_ephemeris table, behind a pymysql-like
+# connection, so db.py's pool, codec and queries run unchanged without the
+# SSH tunnel or MySQL:
+#
+#   standin = StandInDatabase(latency_ms=2)
+#   db.pool = db.ConnectionPool(standin.connect, size=db.POOL_SIZE)
+#
+# Only the statements db.py issues are understood: SELECT_SQL by primary
+# key or by range, and INSERT_SQL upserts. Rows are kept as the column
+# tuples encode_row produces, the way MySQL would store them.
+
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from db import COLUMNS, INSERT_SQL, SELECT_SQL
+
+
+class StandInDatabase:
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.lock = threading.Lock()
+        self.rows: Dict[datetime, tuple] = {}
+        self.stats = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {"connects": 0, "selects": 0, "range_selects": 0, "inserts": 0, "rows_written": 0}
+
+    def snapshot(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.stats)
+
+    def clear(self):
+        with self.lock:
+            self.rows.clear()
+
+    def connect(self) -> "StandInConnection":
+        with self.lock:
+            self.stats["connects"] += 1
+        return StandInConnection(self)
+
+    # ------------------ statements ------------------
+
+    def round_trip(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def select(self, sql: str, args: tuple) -> List[dict]:
+        self.round_trip()
+
+        if sql == SELECT_SQL + " WHERE utc_stamp = %s":
+            with self.lock:
+                self.stats["selects"] += 1
+                row = self.rows.get(args[0])
+            return [dict(zip(COLUMNS, row))] if row else []
+
+        if sql.startswith(SELECT_SQL + " WHERE utc_stamp BETWEEN"):
+            start, stop, origin, step = args
+            with self.lock:
+                self.stats["range_selects"] += 1
+                stamps = sorted(self.rows)
+                found = [
+                    self.rows[ts] for ts in stamps[bisect_left(stamps, start):bisect_right(stamps, stop)]
+                    if int((ts - origin).total_seconds()) % step == 0
+                ]
+            return [dict(zip(COLUMNS, row)) for row in found]
+
+        raise NotImplementedError(f"stand-in does not understand: {sql[:80]}")
+
+    def upsert(self, sql: str, rows: List[tuple]):
+        if sql != INSERT_SQL:
+            raise NotImplementedError(f"stand-in does not understand: {sql[:80]}")
+
+        self.round_trip()
+        with self.lock:
+            self.stats["inserts"] += 1
+            self.stats["rows_written"] += len(rows)
+            for row in rows:
+                self.rows[row[0]] = tuple(row)
+
+
+class StandInConnection:
+    open = True
+
+    def __init__(self, database: StandInDatabase):
+        self.database = database
+
+    def cursor(self) -> "StandInCursor":
+        return StandInCursor(self.database)
+
+    def ping(self, reconnect: bool = False):
+        pass
+
+    def close(self):
+        self.open = False
+
+
+class StandInCursor:
+    def __init__(self, database: StandInDatabase):
+        self.database = database
+        self._rows: List[dict] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql: str, args: tuple = ()):
+        self._rows = self.database.select(sql, args)
+
+    def executemany(self, sql: str, rows: List[tuple]):
+        self.database.upsert(sql, rows)
+
+    def fetchone(self) -> Optional[dict]:
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self) -> List[dict]:
+        return self._rows
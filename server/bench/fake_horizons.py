@@ -0,0 +1,277 @@
+# Local stand-in for the Horizons API, for benchmarks and offline runs
+#
+#   python bench/fake_horizons.py [--port 8765] [--latency-ms 300] [--error-rate 0.01]
+#   HORIZONS_URL=http://127.0.0.1:8765/api/horizons.api uvicorn app:app
+#
+#   python bench/fake_horizons.py --record bench/horizons_recordings.json
+#       proxies every query to the real Horizons and saves the results
+#
+# Queries found in --replay (default bench/horizons_recordings.json, if it
+# exists) are answered with the recorded `result` payload. Anything else
+# is rendered from the local analytical series in the same CSV layout, so
+# every workload can run without the network. Only the geocentric Sun and
+# Moon are real; planets (center 10) move on circular orbits with their
+# mean elements, plausible for load tests and nothing else.
+#
+# GET /stats returns call, error and replay counters as JSON; POST
+# /stats/reset zeroes them.
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.parse
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+import numpy as np
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from analytical import BODIES, VELOCITY_DT
+from horizons import datetime_to_jd, step_epochs
+from horizons_parser import jd_to_datetime
+
+
+UPSTREAM_URL = "https://ssd.jpl.nasa.gov/api/horizons.api"
+RECORDINGS_PATH = os.path.join(os.path.dirname(__file__), "horizons_recordings.json")
+
+HEADER = "*" * 79 + "\nEphemeris / API_USER (local stand-in)\n" + "*" * 79 + "\n"
+
+# heliocentric mean distance (km), sidereal period (days), longitude at J2000 (deg)
+PLANETS = {
+    "199": (57.909e6, 87.969, 252.25),
+    "299": (108.209e6, 224.701, 181.98),
+    "499": (227.939e6, 686.980, 355.43),
+    "599": (778.479e6, 4332.59, 34.35),
+    "699": (1433.53e6, 10759.22, 50.08),
+    "799": (2870.97e6, 30688.5, 314.06),
+    "899": (4500.0e6, 60182.0, 304.35),
+}
+
+# the parameters that decide a result; 'format' and quoting do not
+QUERY_KEYS = ("COMMAND", "CENTER", "VEC_TABLE", "START_TIME", "STOP_TIME", "STEP_SIZE", "TLIST")
+
+
+def query_key(params: Dict[str, str]) -> str:
+    return "&".join(f"{k}={params[k].strip(chr(39))}" for k in QUERY_KEYS if k in params)
+
+
+# ------------------ synthesized results ------------------
+
+def planet_xyz(command: str, jd: np.ndarray) -> np.ndarray:
+    if command == "10":
+        return np.zeros((len(jd), 3))
+    if command == "399":
+        return -BODIES["10"](jd)
+
+    distance, period, lon0 = PLANETS[command]
+    angle = np.radians(lon0 + 360 * (jd - 2451545.0) / period)
+    return np.stack([distance * np.cos(angle), distance * np.sin(angle), np.zeros_like(angle)], axis=1)
+
+
+def body_xyz(command: str, center: str, jd: np.ndarray) -> np.ndarray:
+    if center == "399" and command in BODIES:
+        return BODIES[command](jd)
+    if center == "10":
+        return planet_xyz(command, jd)
+    raise ValueError(f"no stand-in ephemeris for {command} around {center}")
+
+
+def query_epochs(params: Dict[str, str]) -> np.ndarray:
+    if "TLIST" in params:
+        return np.array([float(v.strip("'")) for v in params["TLIST"].split()])
+
+    start = datetime.strptime(params["START_TIME"].strip("'"), "%Y-%m-%d %H:%M:%S")
+    stop = datetime.strptime(params["STOP_TIME"].strip("'"), "%Y-%m-%d %H:%M:%S")
+    epochs = step_epochs(start, stop, params["STEP_SIZE"].strip("'"))
+    return np.array([datetime_to_jd(dt) for dt in epochs])
+
+
+def render_result(params: Dict[str, str]) -> str:
+    command = params["COMMAND"].strip("'")
+    center = params["CENTER"].strip("'").split("@")[-1]
+    velocity = params.get("VEC_TABLE", "'1'").strip("'") == "2"
+
+    jd = query_epochs(params)
+    xyz = body_xyz(command, center, jd)
+    if velocity:
+        vel = (body_xyz(command, center, jd + VELOCITY_DT) - body_xyz(command, center, jd - VELOCITY_DT)) / (2 * VELOCITY_DT * 86400)
+        xyz = np.concatenate([xyz, vel], axis=1)
+
+    rows = []
+    for day, values in zip(jd.tolist(), xyz.tolist()):
+        date = jd_to_datetime(day).strftime("%Y-%b-%d %H:%M:%S.0000")
+        rows.append(f"{day:.9f}, A.D. {date}, " + ", ".join(f"{v: .15E}" for v in values) + ",")
+
+    return HEADER + "$$SOE\n" + "\n".join(rows) + "\n$$EOE\n"
+
+
+# ------------------ server ------------------
+
+class FakeHorizons:
+    """
+    The stand-in as an object: start() serves on a background thread and
+    returns the API URL to point horizons.HORIZONS_URL at.
+    """
+
+    def __init__(
+        self,
+        port: int = 0,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        replay: Optional[str] = None,
+        record: Optional[str] = None,
+        seed: int = 0,
+    ):
+        self.port = port
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.record_path = record
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+        self.recordings: Dict[str, str] = {}
+        if replay and os.path.exists(replay):
+            with open(replay) as f:
+                self.recordings = {r["query"]: r["result"] for r in json.load(f)}
+
+        self.stats = {}
+        self.reset()
+        self._server = None
+
+    def reset(self):
+        with self.lock:
+            self.stats = {"calls": 0, "errors": 0, "replayed": 0, "synthesized": 0, "recorded": 0, "epochs": 0}
+
+    def snapshot(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.stats)
+
+    def count(self, key: str, n: int = 1):
+        with self.lock:
+            self.stats[key] += n
+
+    def answer(self, params: Dict[str, str]) -> tuple:
+        """(status, JSON body) for one query, after the configured delay."""
+        self.count("calls")
+
+        with self.lock:
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            failed = self.random.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        if failed:
+            self.count("errors")
+            return 503, {"message": "injected failure"}
+
+        key = query_key(params)
+        result = self.recordings.get(key)
+        if result is not None:
+            self.count("replayed")
+        elif self.record_path:
+            r = requests.get(UPSTREAM_URL, params=params, timeout=30)
+            result = r.json().get("result", "")
+            with self.lock:
+                self.recordings[key] = result
+            self.count("recorded")
+        else:
+            try:
+                result = render_result(params)
+            except (KeyError, ValueError) as exc:
+                return 200, {"error": str(exc)}
+            self.count("synthesized")
+
+        if "$$SOE" in result:
+            self.count("epochs", result.count("\n", result.find("$$SOE"), result.find("$$EOE")) - 1)
+        return 200, {"signature": {"source": "local stand-in"}, "result": result}
+
+    def save(self):
+        if not self.record_path:
+            return
+        with self.lock:
+            recordings = [{"query": k, "result": v} for k, v in sorted(self.recordings.items())]
+        with open(self.record_path, "w") as f:
+            json.dump(recordings, f, indent=1)
+
+    def handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def send_json(self, status: int, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                url = urllib.parse.urlsplit(self.path)
+                if url.path == "/stats":
+                    return self.send_json(200, fake.snapshot())
+                params = dict(urllib.parse.parse_qsl(url.query))
+                self.send_json(*fake.answer(params))
+
+            def do_POST(self):
+                if self.path == "/stats/reset":
+                    fake.reset()
+                    return self.send_json(200, fake.snapshot())
+                self.send_json(404, {})
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/api/horizons.api"
+
+    def start(self) -> str:
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), self.handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True, name="fake-horizons").start()
+        return self.url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        self.save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Horizons API stand-in")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="uniform extra delay on top of --latency-ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of queries answered with a 503")
+    parser.add_argument("--replay", default=RECORDINGS_PATH, help="recorded results to answer with")
+    parser.add_argument("--record", help="proxy to Horizons and save every result here on exit")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    fake = FakeHorizons(
+        args.port, args.latency_ms, args.jitter_ms, args.error_rate,
+        replay=args.replay, record=args.record, seed=args.seed,
+    )
+    print(f"serving {fake.start()} ({len(fake.recordings)} recorded results)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# In-memory stand-in for the Redis server behind shared_cache.py, with the
+# redis.asyncio client methods SharedCache calls, so the shared cache can
+# be exercised without a Redis:
+#
+#   store = StandInRedis(latency_ms=0.5)
+#   worker_a = SharedCache(store, (cache_a,))
+#   worker_b = SharedCache(store, (cache_b,))   # same store: a second worker
+#
+# Values come back as bytes, the way redis-py returns them, and keys set
+# with ex= expire on the stand-in's clock. down = True makes every call
+# raise ConnectionError, as an unreachable server would. The rate limiter
+# has its own stand-in: RATE_LIMIT_STORAGE_URI=memory://.
+
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+
+class StandInRedis:
+    def __init__(self, latency_ms: float = 0.0, clock: Callable[[], float] = time.monotonic):
+        self.latency = latency_ms / 1000
+        self.clock = clock
+        self.lock = threading.Lock()
+        # key -> (value, expires at or None)
+        self.data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self.down = False
+        self.stats = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {"gets": 0, "sets": 0, "incrs": 0}
+
+    def snapshot(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.stats)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+    async def round_trip(self, command: str):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.down:
+            raise ConnectionError("stand-in Redis is down")
+        with self.lock:
+            self.stats[command] += 1
+
+    def _live(self, key: str) -> Optional[bytes]:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and self.clock() >= expires_at:
+            del self.data[key]
+            return None
+        return value
+
+    # ------------------ commands ------------------
+
+    async def get(self, key: str) -> Optional[bytes]:
+        await self.round_trip("gets")
+        with self.lock:
+            return self._live(key)
+
+    async def set(self, key: str, value, ex: Optional[int] = None) -> bool:
+        await self.round_trip("sets")
+        if isinstance(value, str):
+            value = value.encode()
+        with self.lock:
+            self.data[key] = (bytes(value), self.clock() + ex if ex else None)
+        return True
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        await self.round_trip("incrs")
+        with self.lock:
+            value = int(self._live(key) or 0) + amount
+            # INCR keeps an existing TTL
+            expires_at = self.data[key][1] if key in self.data else None
+            self.data[key] = (str(value).encode(), expires_at)
+        return value
+
+    async def aclose(self):
+        pass
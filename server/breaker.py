@@ -0,0 +1,93 @@
+import math
+import threading
+import time
+from typing import Callable, Dict
+
+from horizons_parser import HorizonsCircuitOpen
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Stops calling an upstream that keeps failing.
+
+    closed     every call goes through; failure_threshold failures in a
+               row open the circuit
+    open       calls fail at once with HorizonsCircuitOpen until
+               reset_seconds have passed
+    half_open  one trial call goes through, the rest still fail fast;
+               its success closes the circuit, its failure opens it again
+
+    Thread-safe: sync queries run on worker threads, async ones on the loop.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial = False
+
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self.clock() - self._opened_at >= self.reset_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def before_call(self):
+        """Raises HorizonsCircuitOpen when the call must not go out."""
+        with self._lock:
+            if self._state == OPEN:
+                waited = self.clock() - self._opened_at
+                if waited < self.reset_seconds:
+                    self.rejected += 1
+                    raise HorizonsCircuitOpen(math.ceil(self.reset_seconds - waited))
+                self._state = HALF_OPEN
+
+            if self._state == HALF_OPEN:
+                if self._trial:
+                    self.rejected += 1
+                    raise HorizonsCircuitOpen(math.ceil(self.reset_seconds))
+                self._trial = True
+
+    def after_call(self, ok: bool):
+        """Verdict on a call that before_call let through."""
+        with self._lock:
+            if ok:
+                self._state = CLOSED
+                self._failures = 0
+                self._trial = False
+                return
+
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.opened += 1
+                self._state = OPEN
+                self._opened_at = self.clock()
+                self._trial = False
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "failures": self._failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
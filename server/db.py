@@ -1,53 +1,89 @@
 import os
-import json
-from datetime import datetime as datetime_type
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict
 from datetime import datetime
 import pymysql
 from sshtunnel import SSHTunnelForwarder
 from dotenv import load_dotenv
 
+from type_info import TITHIs, MASAs, RASHIs, AYANAs, RITUs, GRAHANAs, UPAVAASs
+import metrics
+import timing
+
 load_dotenv()
 
 _tunnel = None
-_connection = None
+_tunnel_lock = threading.Lock()
+
+POOL_SIZE = int(os.getenv("MYSQL_POOL_SIZE", "8"))
+POOL_TIMEOUT = float(os.getenv("MYSQL_POOL_TIMEOUT", "5"))
+# idle connections older than this are pinged before reuse
+POOL_HEALTH_CHECK = float(os.getenv("MYSQL_POOL_HEALTH_CHECK", "30"))
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+# client errors meaning the connection itself is gone: can't connect (2003),
+# server has gone away (2006), lost connection during a query (2013, 2055).
+# pymysql raises OperationalError for these, but also for any server error
+# it has no better class for (1292, an out-of-range value, among them).
+CONNECTION_ERRNOS = {2003, 2006, 2013, 2055}
+
+
+def is_connection_error(exc: BaseException) -> bool:
+    if isinstance(exc, pymysql.err.InterfaceError):
+        return True
+    return isinstance(exc, pymysql.err.OperationalError) and bool(exc.args) and exc.args[0] in CONNECTION_ERRNOS
 
 
 def start_tunnel():
     global _tunnel
 
-    if _tunnel is not None and _tunnel.is_active:
+    # no SSH host: MySQL is reached directly (a local server, see open_connection)
+    if not os.getenv("SSH_HOST"):
         return
 
-    _tunnel = SSHTunnelForwarder(
-        (os.getenv("SSH_HOST"), 22),
-        ssh_username=os.getenv("MYSQL_USER"),
-        ssh_password=os.getenv("MYSQL_SSH_PASSWORD"),
-        remote_bind_address=(
-            os.getenv("MYSQL_HOST"),
-            3306,
-        ),
-    )
-    _tunnel.start()
+    with _tunnel_lock:
+        if _tunnel is not None and _tunnel.is_active:
+            return
+
+        _tunnel = SSHTunnelForwarder(
+            (os.getenv("SSH_HOST"), 22),
+            ssh_username=os.getenv("MYSQL_USER"),
+            ssh_password=os.getenv("MYSQL_SSH_PASSWORD"),
+            remote_bind_address=(
+                os.getenv("MYSQL_HOST"),
+                3306,
+            ),
+        )
+        _tunnel.start()
 
 
 def stop_tunnel():
     global _tunnel
-    if _tunnel is not None and _tunnel.is_active:
-        _tunnel.stop()
-    _tunnel = None
-
 
-def get_connection():
-    global _connection
+    with _tunnel_lock:
+        if _tunnel is not None and _tunnel.is_active:
+            _tunnel.stop()
+        _tunnel = None
 
-    if _connection is not None and _connection.open:
-        return _connection
 
-    start_tunnel()
+def open_connection():
+    if os.getenv("SSH_HOST"):
+        # (re)starts the tunnel if it dropped; its local port may change
+        start_tunnel()
+        host, port = "127.0.0.1", _tunnel.local_bind_port
+    else:
+        host, port = os.getenv("MYSQL_HOST", "127.0.0.1"), int(os.getenv("MYSQL_PORT", "3306"))
 
-    _connection = pymysql.connect(
-        host="127.0.0.1",
-        port=_tunnel.local_bind_port,
+    return pymysql.connect(
+        host=host,
+        port=port,
         user=os.getenv("MYSQL_USER"),
         password=os.getenv("MYSQL_PASSWORD"),
         database=os.getenv("MYSQL_DB"),
@@ -58,91 +94,323 @@ def get_connection():
         read_timeout=30,
         write_timeout=30,
     )
-    return _connection
+
+
+class ConnectionPool:
+    """
+    Bounded pool of pymysql connections. A connection is used by one
+    thread at a time; callers wait up to `timeout` seconds for one to
+    free up. Connections idle for longer than `health_check` are pinged
+    before reuse, and broken ones are replaced.
+    """
+
+    def __init__(self, connect, size: int = 8, timeout: float = 5.0, health_check: float = 30.0):
+        self.connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.health_check = health_check
+
+        self._lock = threading.Lock()
+        # notified whenever a connection is released or a slot frees up
+        self._available = threading.Condition(self._lock)
+        # (connection, idle since), most recently released last
+        self._idle = []
+        self._created = 0
+
+        self.stats = {
+            "checkouts": 0,
+            "timeouts": 0,
+            "reconnects": 0,
+            "discarded": 0,
+            "wait_seconds": 0.0,
+        }
+
+    def _open(self):
+        """Connects in a slot acquire() reserved; frees the slot on failure."""
+        try:
+            return self.connect()
+        except Exception:
+            with self._available:
+                self._created -= 1
+                self._available.notify()
+            raise
+
+    def _discard(self, conn):
+        with self._available:
+            self._created -= 1
+            self.stats["discarded"] += 1
+            # a waiter can open a new connection in the freed slot
+            self._available.notify()
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _healthy(self, conn, idle_since: float) -> bool:
+        if not conn.open:
+            return False
+        if time.monotonic() - idle_since < self.health_check:
+            return True
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except pymysql.err.Error:
+            return False
+
+    def _take(self, deadline: float):
+        """An idle (connection, idle since), or None for a reserved slot to open."""
+        with self._available:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._created < self.size:
+                    self._created += 1
+                    return None
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats["timeouts"] += 1
+                    raise PoolTimeout(f"No database connection free after {self.timeout}s")
+                self._available.wait(remaining)
+
+    def acquire(self):
+        started = time.monotonic()
+
+        while True:
+            idle = self._take(started + self.timeout)
+            if idle is None:
+                conn = self._open()
+                break
+
+            conn, idle_since = idle
+            if self._healthy(conn, idle_since):
+                break
+
+            self._discard(conn)
+            with self._lock:
+                self.stats["reconnects"] += 1
+
+        with self._lock:
+            self.stats["checkouts"] += 1
+            self.stats["wait_seconds"] += time.monotonic() - started
+        return conn
+
+    def release(self, conn, broken: bool = False):
+        if broken or not conn.open:
+            self._discard(conn)
+            return
+
+        with self._available:
+            self._idle.append((conn, time.monotonic()))
+            self._available.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        except BaseException as exc:
+            self.release(conn, broken=is_connection_error(exc))
+            raise
+        else:
+            self.release(conn)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            created = self._created
+            idle = len(self._idle)
+            stats = dict(self.stats)
+        return {
+            "size": self.size,
+            "open": created,
+            "idle": idle,
+            "in_use": created - idle,
+            **stats,
+        }
+
+
+pool = ConnectionPool(
+    open_connection,
+    size=POOL_SIZE,
+    timeout=POOL_TIMEOUT,
+    health_check=POOL_HEALTH_CHECK,
+)
+
+
+def pool_metrics() -> dict:
+    return pool.metrics()
+
+
+DB_SECONDS = metrics.histogram(
+    "db_query_seconds",
+    "Database statements by query, including the wait for a pooled connection",
+    ("query",),
+    buckets=metrics.DB_BUCKETS,
+)
+
+
+def pool_samples(keys):
+    values = pool_metrics()
+    return [((key,), values[key]) for key in keys]
+
+
+metrics.collected(
+    "db_pool_connections", "Pooled MySQL connections by state", "gauge", ("state",),
+    lambda: pool_samples(("open", "idle", "in_use")),
+)
+metrics.collected(
+    "db_pool_events_total", "Pool checkouts, timeouts, reconnects and discarded connections", "counter", ("event",),
+    lambda: pool_samples(("checkouts", "timeouts", "reconnects", "discarded")),
+)
+metrics.collected(
+    "db_pool_wait_seconds_total", "Time spent waiting for a pooled connection", "counter", (),
+    lambda: [((), pool_metrics()["wait_seconds"])],
+)
 
 
 def close_connection():
-    global _connection
-    if _connection is not None:
-        _connection.close()
-    _connection = None
+    pool.close()
+
+
+# ------------------ row codec ------------------
+
+TITHI_CODES = {(t.paksha.value, t.name.value): i for i, t in enumerate(TITHIs)}
+MASA_CODES = {m.value: i for i, m in enumerate(MASAs)}
+RASHI_CODES = {r.value: i for i, r in enumerate(RASHIs)}
+AYANA_CODES = {a.value: i for i, a in enumerate(AYANAs)}
+RITU_CODES = {r.value: i for i, r in enumerate(RITUs)}
+GRAHANA_CODES = {g: i for i, g in enumerate(GRAHANAs)}
+UPAVAAS_BITS = {u.name: 1 << i for i, u in enumerate(UPAVAASs)}
+
+COLUMNS = (
+    "utc_stamp", "ayana", "ritu", "masa", "tithi", "surya_rashi", "chandra_rashi",
+    "surya_longitude_deg", "chandra_longitude_deg", "longitudinal_angle_deg", "grahana",
+    "surya_x", "surya_y", "surya_z", "chandra_x", "chandra_y", "chandra_z", "upavaas",
+)
+
+
+def encode_row(data: dict) -> tuple:
+    """API dict -> column values, in COLUMNS order."""
+    raw_ts = data.get("timestamp") or data.get("date")
+    utc_stamp = datetime.strptime(raw_ts, "%Y-%m-%dT%H:%M:%S") if isinstance(raw_ts, str) else raw_ts
+
+    upavaas = 0
+    for fd in data.get("upavaas", []):
+        upavaas |= UPAVAAS_BITS[fd["name"]]
+
+    return (
+        utc_stamp,
+        AYANA_CODES[data["ayana"]],
+        RITU_CODES[data["ritu"]],
+        MASA_CODES[data["masa"]],
+        TITHI_CODES[(data["paksha"], data["tithi"])],
+        RASHI_CODES[data["surya_rashi"]],
+        RASHI_CODES[data["chandra_rashi"]],
+        data["surya_longitude_deg"],
+        data["chandra_longitude_deg"],
+        data["longitudinal_angle_deg"],
+        GRAHANA_CODES[data.get("grahana", "None")],
+        *data["surya_xyz"],
+        *data["chandra_xyz"],
+        upavaas,
+    )
+
+
+@lru_cache(maxsize=None)
+def upavaas_for_bits(bits: int) -> tuple:
+    return tuple(
+        {"name": fd.name, "description": fd.description}
+        for fd, bit in zip(UPAVAASs, UPAVAAS_BITS.values())
+        if bits & bit
+    )
+
+
+def decode_row(row: dict) -> dict:
+    """Typed columns -> API dict."""
+    tithi = TITHIs[row["tithi"]]
+
+    return {
+        "timestamp": row["utc_stamp"].strftime("%Y-%m-%dT%H:%M:%S"),
+        "ayana": AYANAs[row["ayana"]].value,
+        "ritu": RITUs[row["ritu"]].value,
+        "masa": MASAs[row["masa"]].value,
+        "paksha": tithi.paksha.value,
+        "tithi": tithi.name.value,
+        # shukla paksha is exactly the waxing half of the lunation
+        "phase": "Waxing" if row["tithi"] < 15 else "Waning",
+        "surya_rashi": RASHIs[row["surya_rashi"]].value,
+        "chandra_rashi": RASHIs[row["chandra_rashi"]].value,
+        "surya_longitude_deg": row["surya_longitude_deg"],
+        "chandra_longitude_deg": row["chandra_longitude_deg"],
+        "longitudinal_angle_deg": row["longitudinal_angle_deg"],
+        "grahana": GRAHANAs[row["grahana"]],
+        "surya_xyz": (row["surya_x"], row["surya_y"], row["surya_z"]),
+        "chandra_xyz": (row["chandra_x"], row["chandra_y"], row["chandra_z"]),
+        "upavaas": list(upavaas_for_bits(row["upavaas"])),
+    }
+
+
+# ------------------ queries ------------------
+
+SELECT_SQL = "SELECT " + ", ".join(COLUMNS) + " FROM lunar_ephemeris"
+
+# Notice how this is wrapped in () instead of """.
+# This guarantees NO hidden indentation spaces are sent to MySQL.
+INSERT_SQL = (
+    "INSERT INTO lunar_ephemeris (" + ", ".join(COLUMNS) + ") "
+    "VALUES (" + ", ".join(["%s"] * len(COLUMNS)) + ") "
+    "ON DUPLICATE KEY UPDATE "
+    + ", ".join(f"{c}=VALUES({c})" for c in COLUMNS[1:])
+)
 
 
 def get_by_timestamp(timestamp: str):
     formatted_time = datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S")
 
-    conn = get_connection()
-    # AND grahana <> 'None'
-    with conn.cursor() as cur:
-        cur.execute(
-            "SELECT * FROM lunar_ephemeris WHERE utc_stamp = %s AND upavaas IS NOT NULL",
-            (formatted_time,),
-        )
+    with DB_SECONDS.time("by_timestamp"), timing.phase("db"), pool.connection() as conn, conn.cursor() as cur:
+        cur.execute(SELECT_SQL + " WHERE utc_stamp = %s", (formatted_time,))
         row = cur.fetchone()
-        if not row:
-            return None
 
-        row.pop("created_at", None)
+    if not row:
+        return None
 
-        # normalize
-        if isinstance(row["utc_stamp"], datetime_type):
-            row["utc_stamp"] = row["utc_stamp"].isoformat()
+    return decode_row(row)
 
-        # normalize JSON -> tuple
-        row["surya_xyz"] = tuple(json.loads(row["surya_xyz"]))
-        row["chandra_xyz"] = tuple(json.loads(row["chandra_xyz"]))
 
-        # normalize upavaas JSON -> list
-        upavaas_raw = row.get("upavaas")
-        if upavaas_raw is None or upavaas_raw == "null":
-            return None
-        elif isinstance(upavaas_raw, str):
-            row["upavaas"] = json.loads(upavaas_raw)
-        else:
-            row["upavaas"] = upavaas_raw
+def get_by_range(start: str, stop: str, step_seconds: int = 1) -> Dict[str, dict]:
+    """
+    Every stored row on the start + k * step grid within [start, stop],
+    keyed by timestamp, from a single range scan of the primary key.
+    """
+    dt_start = datetime.strptime(start, "%Y-%m-%dT%H:%M:%S")
+    dt_stop = datetime.strptime(stop, "%Y-%m-%dT%H:%M:%S")
 
-        return row
+    with DB_SECONDS.time("by_range"), timing.phase("db"), pool.connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            SELECT_SQL
+            + " WHERE utc_stamp BETWEEN %s AND %s"
+            " AND MOD(TIMESTAMPDIFF(SECOND, %s, utc_stamp), %s) = 0"
+            " ORDER BY utc_stamp",
+            (dt_start, dt_stop, dt_start, step_seconds),
+        )
+        rows = cur.fetchall()
 
+    decoded = (decode_row(row) for row in rows)
+    return {data["timestamp"]: data for data in decoded}
 
-def insert_row(data: dict):
-    conn = get_connection()
 
-    data = data.copy()
-    raw_ts = data.get("timestamp") or data.get("date")
-    
-    # Standardize to string format if it isn't already a datetime object
-    if isinstance(raw_ts, str):
-        data["utc_stamp"] = raw_ts.replace("T", " ")
-    else:
-        data["utc_stamp"] = raw_ts
-
-    data["grahana"] = data.get("grahana", "None")
-    
-    # Ensure JSON fields are strings without double-encoding
-    data["surya_xyz"] = json.dumps(data["surya_xyz"]) if not isinstance(data["surya_xyz"], str) else data["surya_xyz"]
-    data["chandra_xyz"] = json.dumps(data["chandra_xyz"]) if not isinstance(data["chandra_xyz"], str) else data["chandra_xyz"]
-    data["upavaas"] = json.dumps(data.get("upavaas", [])) if not isinstance(data.get("upavaas"), str) else data.get("upavaas")
-
-    with conn.cursor() as cur:
-        # Notice how this is wrapped in () instead of """. 
-        # This guarantees NO hidden indentation spaces are sent to MySQL.
-        sql = (
-            "INSERT INTO lunar_ephemeris ("
-            "utc_stamp, ayana, ritu, masa, paksha, tithi, phase, "
-            "surya_rashi, chandra_rashi, surya_longitude_deg, chandra_longitude_deg, "
-            "longitudinal_angle_deg, grahana, surya_xyz, chandra_xyz, upavaas"
-            ") VALUES ("
-            "%(utc_stamp)s, %(ayana)s, %(ritu)s, %(masa)s, %(paksha)s, %(tithi)s, %(phase)s, "
-            "%(surya_rashi)s, %(chandra_rashi)s, %(surya_longitude_deg)s, %(chandra_longitude_deg)s, "
-            "%(longitudinal_angle_deg)s, %(grahana)s, %(surya_xyz)s, %(chandra_xyz)s, %(upavaas)s"
-            ") ON DUPLICATE KEY UPDATE "
-            "ayana=VALUES(ayana), ritu=VALUES(ritu), masa=VALUES(masa), "
-            "paksha=VALUES(paksha), tithi=VALUES(tithi), phase=VALUES(phase), "
-            "surya_rashi=VALUES(surya_rashi), chandra_rashi=VALUES(chandra_rashi), "
-            "surya_longitude_deg=VALUES(surya_longitude_deg), chandra_longitude_deg=VALUES(chandra_longitude_deg), "
-            "longitudinal_angle_deg=VALUES(longitudinal_angle_deg), grahana=VALUES(grahana), "
-            "surya_xyz=VALUES(surya_xyz), chandra_xyz=VALUES(chandra_xyz), upavaas=VALUES(upavaas)"
-        )
-        cur.execute(sql, data)
+def insert_rows(rows: list[dict]):
+    """One multi-row upsert; autocommit is on, so no explicit commit."""
+    if not rows:
+        return
+
+    encoded = [encode_row(data) for data in rows]
 
-    conn.commit()
\ No newline at end of file
+    with DB_SECONDS.time("insert"), pool.connection() as conn, conn.cursor() as cur:
+        cur.executemany(INSERT_SQL, encoded)
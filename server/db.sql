@@ -1,26 +1,36 @@
+-- Enum columns hold the position in the matching list of type_info.py:
+--   ayana -> AYANAs, ritu -> RITUs, masa -> MASAs, tithi -> TITHIs (0-29,
+--   paksha and phase follow from it), *_rashi -> RASHIs, grahana -> GRAHANAs.
+-- upavaas is a bitmask over UPAVAASs (bit i set = UPAVAASs[i] applies).
+-- Rows in the older JSON/VARCHAR layout are converted by migrate_schema.py.
+-- utc_stamp holds UTC as DATETIME: TIMESTAMP stops at 1970-2038, while
+-- /calendar and backfill.py cover 1600-2500 (migrate_schema.py --widen-stamp
+-- converts a table created with TIMESTAMP).
 CREATE TABLE lunar_ephemeris (
-    utc_stamp TIMESTAMP PRIMARY KEY,
+    utc_stamp DATETIME PRIMARY KEY,
 
-    ayana VARCHAR(32) NOT NULL,
-    ritu VARCHAR(32) NOT NULL,
-    masa VARCHAR(32) NOT NULL,
-    paksha VARCHAR(32) NOT NULL,
-    tithi VARCHAR(32) NOT NULL,
-    phase VARCHAR(16) NOT NULL,
+    ayana TINYINT UNSIGNED NOT NULL,
+    ritu TINYINT UNSIGNED NOT NULL,
+    masa TINYINT UNSIGNED NOT NULL,
+    tithi TINYINT UNSIGNED NOT NULL,
 
-    surya_rashi VARCHAR(32) NOT NULL,
-    chandra_rashi VARCHAR(32) NOT NULL,
+    surya_rashi TINYINT UNSIGNED NOT NULL,
+    chandra_rashi TINYINT UNSIGNED NOT NULL,
 
     surya_longitude_deg DOUBLE PRECISION NOT NULL,
     chandra_longitude_deg DOUBLE PRECISION NOT NULL,
     longitudinal_angle_deg DOUBLE PRECISION NOT NULL,
 
-    grahana VARCHAR(32) NOT NULL DEFAULT 'None',
+    grahana TINYINT UNSIGNED NOT NULL DEFAULT 0,
 
-    surya_xyz JSON NOT NULL,
-    chandra_xyz JSON NOT NULL,
+    surya_x DOUBLE PRECISION NOT NULL,
+    surya_y DOUBLE PRECISION NOT NULL,
+    surya_z DOUBLE PRECISION NOT NULL,
+    chandra_x DOUBLE PRECISION NOT NULL,
+    chandra_y DOUBLE PRECISION NOT NULL,
+    chandra_z DOUBLE PRECISION NOT NULL,
 
-    upavaas JSON NOT NULL DEFAULT 'None',
+    upavaas SMALLINT UNSIGNED NOT NULL DEFAULT 0,
 
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
\ No newline at end of file
+);
@@ -0,0 +1,268 @@
+import math
+from datetime import datetime
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from type_info import TITHIs, MASAs, RASHIs, AYANAs, RITUs, GRAHANAs, Ayana, Ritu
+from upavaas import upavaas_at, tithi_position, MASA_POSITIONS
+from horizons import Vector, TIMESTAMP_FORMAT
+import timing
+
+
+# ------------------ utilities ------------------
+
+def cartesian_to_latitude(x: float, y: float, z: float) -> float:
+    r = math.sqrt(x*x + y*y + z*z)
+    if r == 0:
+        return 0.0
+    value = max(-1.0, min(1.0, z / r))
+    return math.degrees(math.asin(value))
+
+
+def cartesian_to_longitude(x: float, y: float, z: float) -> float:
+    lon = math.degrees(math.atan2(y, x))
+    return lon % 360
+
+def get_ritu_from_longitude(lon: float) -> Ritu:
+    lon = lon % 360
+
+    if 0 <= lon < 60:
+        return Ritu.VASANTA
+    if 60 <= lon < 120:
+        return Ritu.GRISHMA
+    if 120 <= lon < 180:
+        return Ritu.VARSHA
+    if 180 <= lon < 240:
+        return Ritu.SHARAD
+    if 240 <= lon < 300:
+        return Ritu.HEMANTA
+    return Ritu.SHISHIRA
+
+
+def resolve_upavaas( *, tithi, paksha, masa, surya_lon ) -> list[dict]:
+    # paksha is carried by tithi; the rules are looked up, not scanned
+    return upavaas_at(tithi_position(tithi), MASA_POSITIONS[masa], surya_lon)
+
+
+# ------------------ classification ------------------
+
+def classify_ephemeris(timestamp: str, surya_xyz: Vector, chandra_xyz: Vector) -> Dict:
+    surya_lon = cartesian_to_longitude(*surya_xyz)
+    chandra_lon = cartesian_to_longitude(*chandra_xyz)
+    chandra_lat = cartesian_to_latitude(*chandra_xyz)
+
+    angle = (chandra_lon - surya_lon) % 360
+
+    ayana = (
+        Ayana.UTTARAYANA
+        if surya_lon >= 270 or surya_lon < 90
+        else Ayana.DAKSHINAYANA
+    )
+
+    angle_norm = angle % 360
+    surya_lon_norm = surya_lon % 360
+    chandra_lon_norm = chandra_lon % 360
+
+    tithi_index = min(int(angle_norm // 12), 29)
+    masa_index = min(int(surya_lon_norm // 30), 11)
+    surya_rashi_index = min(int(surya_lon_norm // 30), 11)
+    chandra_rashi_index = min(int(chandra_lon_norm // 30), 11)
+
+    tithi = TITHIs[tithi_index]
+    masa = MASAs[masa_index]
+    surya_rashi = RASHIs[surya_rashi_index]
+    chandra_rashi = RASHIs[chandra_rashi_index]
+
+    # ---- eclipse detection ----
+    grahana = "None"
+
+    # Strict astronomical thresholds
+    CONJUNCTION_THRESHOLD = 1.0     # degrees
+    OPPOSITION_THRESHOLD = 1.0      # degrees
+    NODE_LAT_THRESHOLD = 0.5        # degrees
+
+    is_conjunction = angle_norm < CONJUNCTION_THRESHOLD or angle_norm > 360 - CONJUNCTION_THRESHOLD
+    is_opposition = abs(angle_norm - 180) < OPPOSITION_THRESHOLD
+    near_node = abs(chandra_lat) < NODE_LAT_THRESHOLD
+
+    if is_conjunction and near_node:
+        grahana = "Surya"
+
+    elif is_opposition and near_node:
+        grahana = "Chandra"
+
+    with timing.phase("upavaas"):
+        upavaas = resolve_upavaas(
+            tithi=tithi,
+            paksha=tithi.paksha,
+            masa=masa,
+            surya_lon=surya_lon
+        )
+
+    return {
+        "timestamp": timestamp,
+        "ayana": ayana.value,
+        "ritu": get_ritu_from_longitude(surya_lon).value,
+        "masa": masa.value,
+        "paksha": tithi.paksha.value,
+        "tithi": tithi.name.value,
+        "phase": "Waxing" if angle_norm < 180 else "Waning",
+        "surya_rashi": surya_rashi.value,
+        "chandra_rashi": chandra_rashi.value,
+        "surya_longitude_deg": surya_lon,
+        "chandra_longitude_deg": chandra_lon,
+        "longitudinal_angle_deg": angle,
+        "grahana": grahana,
+        "surya_xyz": surya_xyz,
+        "chandra_xyz": chandra_xyz,
+        "upavaas": upavaas,
+    }
+
+
+# ------------------ batch classification ------------------
+
+PHASEs = ["Waxing", "Waning"]
+
+
+def classify_arrays(surya_xyz: np.ndarray, chandra_xyz: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    classify_ephemeris over (n, 3) arrays in one vectorized pass. Longitudes,
+    latitude and angle come back in degrees; everything else is an index
+    into TITHIs, MASAs, RASHIs, RITUs, AYANAs, PHASEs or GRAHANAs (paksha
+    0 is Shukla). The arithmetic mirrors the scalar path step for step, so
+    both give the same answers; tests/test_classify.py checks it.
+    """
+    surya_xyz = np.asarray(surya_xyz, dtype=float)
+    chandra_xyz = np.asarray(chandra_xyz, dtype=float)
+
+    surya_lon = np.degrees(np.arctan2(surya_xyz[:, 1], surya_xyz[:, 0])) % 360
+    chandra_lon = np.degrees(np.arctan2(chandra_xyz[:, 1], chandra_xyz[:, 0])) % 360
+
+    x, y, z = chandra_xyz[:, 0], chandra_xyz[:, 1], chandra_xyz[:, 2]
+    r = np.sqrt(x*x + y*y + z*z)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        chandra_lat = np.where(r == 0, 0.0, np.degrees(np.arcsin(np.clip(z / r, -1.0, 1.0))))
+
+    angle = (chandra_lon - surya_lon) % 360
+
+    # x % 360 rounds to 360.0 just below 0; like the scalar path, take
+    # % 360 again before indexing so that lands on 0, not the last index
+    angle_norm = angle % 360
+    surya_norm = surya_lon % 360
+    chandra_norm = chandra_lon % 360
+
+    tithi = np.minimum(angle_norm // 12, 29).astype(np.int8)
+    surya_rashi = np.minimum(surya_norm // 30, 11).astype(np.int8)
+    chandra_rashi = np.minimum(chandra_norm // 30, 11).astype(np.int8)
+
+    # same thresholds as classify_ephemeris
+    is_conjunction = (angle_norm < 1.0) | (angle_norm > 360 - 1.0)
+    is_opposition = np.abs(angle_norm - 180) < 1.0
+    near_node = np.abs(chandra_lat) < 0.5
+
+    grahana = np.zeros(len(angle), dtype=np.int8)
+    grahana[is_opposition & near_node] = GRAHANAs.index("Chandra")
+    grahana[is_conjunction & near_node] = GRAHANAs.index("Surya")
+
+    return {
+        "surya_lon": surya_lon,
+        "chandra_lon": chandra_lon,
+        "chandra_lat": chandra_lat,
+        "angle": angle,
+        "tithi": tithi,
+        "paksha": tithi // 15,
+        # masa follows the solar rashi
+        "masa": surya_rashi,
+        "surya_rashi": surya_rashi,
+        "chandra_rashi": chandra_rashi,
+        "ritu": np.minimum(surya_norm // 60, 5).astype(np.int8),
+        "ayana": np.where((surya_lon >= 270) | (surya_lon < 90), 0, 1).astype(np.int8),
+        "phase": (angle_norm >= 180).astype(np.int8),
+        "grahana": grahana,
+    }
+
+
+def classified_snapshots(
+    timestamps: Sequence[str],
+    surya_xyz: Sequence[Vector],
+    chandra_xyz: Sequence[Vector],
+) -> List[Dict]:
+    """The classify_ephemeris dicts for many instants, classified in one batch."""
+    if not timestamps:
+        return []
+
+    c = {key: values.tolist() for key, values in classify_arrays(surya_xyz, chandra_xyz).items()}
+
+    snapshots = []
+    for i, timestamp in enumerate(timestamps):
+        tithi_index = c["tithi"][i]
+        masa_index = c["masa"][i]
+        tithi = TITHIs[tithi_index]
+        masa = MASAs[masa_index]
+        surya_lon = c["surya_lon"][i]
+
+        snapshots.append({
+            "timestamp": timestamp,
+            "ayana": AYANAs[c["ayana"][i]].value,
+            "ritu": RITUs[c["ritu"][i]].value,
+            "masa": masa.value,
+            "paksha": tithi.paksha.value,
+            "tithi": tithi.name.value,
+            "phase": PHASEs[c["phase"][i]],
+            "surya_rashi": RASHIs[c["surya_rashi"][i]].value,
+            "chandra_rashi": RASHIs[c["chandra_rashi"][i]].value,
+            "surya_longitude_deg": surya_lon,
+            "chandra_longitude_deg": c["chandra_lon"][i],
+            "longitudinal_angle_deg": c["angle"][i],
+            "grahana": GRAHANAs[c["grahana"][i]],
+            "surya_xyz": surya_xyz[i],
+            "chandra_xyz": chandra_xyz[i],
+            "upavaas": upavaas_at(tithi_index, masa_index, surya_lon),
+        })
+
+    return snapshots
+
+
+# NumPy's arctan2 may round differently from math.atan2 in the last bit
+SNAPSHOT_FLOAT_TOLERANCE = 1e-9
+SNAPSHOT_FLOAT_FIELDS = ("surya_longitude_deg", "chandra_longitude_deg", "longitudinal_angle_deg")
+
+
+def snapshot_differences(scalar: Dict, batch: Dict) -> List[str]:
+    """
+    Fields where a classified_snapshots dict differs from classify_ephemeris's
+    for the same instant. Labels, indices and upavaas lists must match
+    exactly; longitudes to within SNAPSHOT_FLOAT_TOLERANCE degrees around
+    the circle, since at an exact conjunction one path can say 360.0 and
+    the other 0.0.
+    """
+    diff = [
+        key for key in scalar
+        if key not in SNAPSHOT_FLOAT_FIELDS and scalar[key] != batch[key]
+    ]
+    diff += [
+        key for key in SNAPSHOT_FLOAT_FIELDS
+        if abs((scalar[key] - batch[key] + 180) % 360 - 180) > SNAPSHOT_FLOAT_TOLERANCE
+    ]
+    return diff
+
+
+def classify_series(
+    surya_rows: List[Tuple[datetime, Vector]],
+    chandra_rows: List[Tuple[datetime, Vector]],
+) -> List[Dict]:
+    """classify_ephemeris for every epoch present in both series."""
+    chandra_by_epoch = dict(chandra_rows)
+
+    paired = [
+        (epoch, surya_xyz, chandra_by_epoch[epoch])
+        for epoch, surya_xyz in surya_rows
+        if epoch in chandra_by_epoch
+    ]
+
+    return classified_snapshots(
+        [epoch.strftime(TIMESTAMP_FORMAT) for epoch, _, _ in paired],
+        [surya_xyz for _, surya_xyz, _ in paired],
+        [chandra_xyz for _, _, chandra_xyz in paired],
+    )
@@ -0,0 +1,223 @@
+import math
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from ephemeris import cartesian_to_latitude, cartesian_to_longitude
+from horizons import Vector, TIMESTAMP_FORMAT, datetime_to_jd
+from horizons_parser import jd_to_datetime
+from transitions import VectorSource
+
+
+# Eclipses are searched lunation by lunation. Every mean new and full moon
+# is first screened on the Moon's mean argument of latitude, which needs
+# no ephemeris at all: away from a node no eclipse is possible. The few
+# that pass (about 60 a decade) are refined to the syzygy by secant
+# iteration on the elongation (about 4 evaluations), screened on the
+# Sun-Moon separation there, and the instant of greatest proximity is
+# solved from the relative motion (2 more). A decade costs ~350 source
+# evaluations.
+
+MEAN_ELONGATION_RATE = 360 / 29.530589  # deg/day
+
+TOLERANCE = timedelta(seconds=1)
+MAX_ITERATIONS = 20
+
+# Meeus, Astronomical Algorithms, ch. 49 and 54: mean phases by lunation
+# number k (new moons whole, full moons halves, 0 = 2000-01-06), and the
+# screen on the Moon's argument of latitude F there
+MEAN_PHASE_EPOCH_JDE = 2451550.09766
+SYNODIC_MONTH_DAYS = 29.530588861
+# no eclipse when |sin F| exceeds this
+NODE_SCREEN = 0.36
+
+# greatest proximity is solved from the offsets this far apart
+PROXIMITY_STEP = timedelta(minutes=10)
+
+EARTH_RADIUS_KM = 6378.14
+MOON_RADIUS_KM = 1737.4
+SUN_RADIUS_KM = 696000.0
+# enlargement of the Earth's shadow by its atmosphere (Danjon)
+SHADOW_ENLARGEMENT = 1.02
+
+
+def wrap180(deg: float) -> float:
+    return (deg + 180) % 360 - 180
+
+
+def separation_deg(a: Vector, b: Vector) -> float:
+    cross = (
+        a[1] * b[2] - a[2] * b[1],
+        a[2] * b[0] - a[0] * b[2],
+        a[0] * b[1] - a[1] * b[0],
+    )
+    dot = a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+    return math.degrees(math.atan2(math.sqrt(sum(c * c for c in cross)), dot))
+
+
+def norm(v: Vector) -> float:
+    return math.sqrt(v[0] * v[0] + v[1] * v[1] + v[2] * v[2])
+
+
+class SyzygyProbe:
+    """Counts source evaluations; each instant is looked up at most once."""
+
+    def __init__(self, source: VectorSource):
+        self.source = source
+        self.memo: Dict[datetime, Tuple[Vector, Vector]] = {}
+        self.evaluations = 0
+
+    def __call__(self, dt: datetime) -> Tuple[Vector, Vector]:
+        dt = dt.replace(microsecond=0)
+        pair = self.memo.get(dt)
+        if pair is None:
+            pair = self.source(dt)
+            self.memo[dt] = pair
+            self.evaluations += 1
+        return pair
+
+    def elongation(self, dt: datetime) -> float:
+        surya_xyz, chandra_xyz = self(dt)
+        return (cartesian_to_longitude(*chandra_xyz) - cartesian_to_longitude(*surya_xyz)) % 360
+
+    def against(self, dt: datetime, lunar: bool) -> Tuple[Vector, Vector]:
+        """(Sun, Moon), or for a lunar eclipse (centre of the Earth's shadow, Moon)."""
+        surya_xyz, chandra_xyz = self(dt)
+        if lunar:
+            surya_xyz = (-surya_xyz[0], -surya_xyz[1], -surya_xyz[2])
+        return surya_xyz, chandra_xyz
+
+    def separation(self, dt: datetime, lunar: bool) -> float:
+        return separation_deg(*self.against(dt, lunar))
+
+    def offset(self, dt: datetime, lunar: bool) -> Vector:
+        """The Moon's direction minus the Sun's (or the shadow's), unit vectors."""
+        a, b = self.against(dt, lunar)
+        na, nb = norm(a), norm(b)
+        return (b[0] / nb - a[0] / na, b[1] / nb - a[1] / na, b[2] / nb - a[2] / na)
+
+
+def mean_phase(k: float) -> Tuple[datetime, float]:
+    """Instant of mean phase k, and sin F there."""
+    T = k / 1236.85
+    jde = MEAN_PHASE_EPOCH_JDE + SYNODIC_MONTH_DAYS * k + 0.00015437 * T * T
+    F = 160.7108 + 390.67050284 * k - 0.0016118 * T * T
+    return jd_to_datetime(jde), math.sin(math.radians(F))
+
+
+def refine_syzygy(probe: SyzygyProbe, guess: datetime, target: float) -> datetime:
+    """Instant (to TOLERANCE) where the elongation equals target, by secant."""
+    t0 = guess
+    f0 = wrap180(probe.elongation(t0) - target)
+    t1 = t0 - timedelta(days=f0 / MEAN_ELONGATION_RATE)
+
+    for _ in range(MAX_ITERATIONS):
+        if abs(t1 - t0) < TOLERANCE:
+            break
+        f1 = wrap180(probe.elongation(t1) - target)
+        if f1 == f0:
+            break
+        step = (t1 - t0) * (f1 / (f1 - f0))
+        t0, f0 = t1, f1
+        t1 = t1 - step
+
+    return t1.replace(microsecond=0)
+
+
+def greatest_proximity(probe: SyzygyProbe, syzygy: datetime, lunar: bool) -> datetime:
+    """
+    Closest approach around a syzygy. Over the hour or so between the two,
+    the Moon moves on a nearly straight line relative to the Sun or the
+    shadow, so the offsets at two instants fix its track; the foot of the
+    perpendicular is within a few seconds of the true minimum.
+    """
+    d0 = probe.offset(syzygy, lunar)
+    d1 = probe.offset(syzygy + PROXIMITY_STEP, lunar)
+    w = (d1[0] - d0[0], d1[1] - d0[1], d1[2] - d0[2])
+
+    steps = -(d0[0] * w[0] + d0[1] * w[1] + d0[2] * w[2]) / (w[0] * w[0] + w[1] * w[1] + w[2] * w[2])
+    return (syzygy + PROXIMITY_STEP * steps).replace(microsecond=0)
+
+
+def eclipse_type(surya_xyz: Vector, chandra_xyz: Vector, separation: float, lunar: bool) -> Optional[str]:
+    """
+    Geocentric eclipse limits from the parallaxes and semidiameters at
+    that instant (Meeus, Astronomical Algorithms, ch. 54). None if the
+    bodies pass too far apart for any eclipse.
+    """
+    d_sun = norm(surya_xyz)
+    d_moon = norm(chandra_xyz)
+
+    sun_parallax = math.degrees(math.asin(EARTH_RADIUS_KM / d_sun))
+    moon_parallax = math.degrees(math.asin(EARTH_RADIUS_KM / d_moon))
+    sun_radius = math.degrees(math.asin(SUN_RADIUS_KM / d_sun))
+    moon_radius = math.degrees(math.asin(MOON_RADIUS_KM / d_moon))
+
+    if lunar:
+        penumbra = SHADOW_ENLARGEMENT * (moon_parallax + sun_parallax + sun_radius)
+        umbra = SHADOW_ENLARGEMENT * (moon_parallax + sun_parallax - sun_radius)
+
+        if separation < umbra - moon_radius:
+            return "total"
+        if separation < umbra + moon_radius:
+            return "partial"
+        if separation < penumbra + moon_radius:
+            return "penumbral"
+        return None
+
+    # the shadow axis reaches the Earth: central somewhere on the surface
+    if separation < moon_parallax - sun_parallax:
+        return "total" if moon_radius >= sun_radius else "annular"
+    if separation < moon_parallax - sun_parallax + sun_radius + moon_radius:
+        return "partial"
+    return None
+
+
+def eclipse_limit_deg(lunar: bool) -> float:
+    # loose upper bounds on the limits above over the Moon's distance range
+    return 1.8 if lunar else 1.6
+
+
+def find_grahanas(source: VectorSource, start: datetime, stop: datetime) -> Tuple[List[Dict], int]:
+    """
+    Every solar (Surya) and lunar (Chandra) eclipse whose syzygy falls in
+    [start, stop], at its time of greatest proximity, and the number of
+    source evaluations it took. The source must cover a few days either
+    side of [start, stop].
+    """
+    probe = SyzygyProbe(source)
+
+    # mean phases run up to ~14 h from the true ones; start a phase early
+    k = math.floor((datetime_to_jd(start) - MEAN_PHASE_EPOCH_JDE) / SYNODIC_MONTH_DAYS * 2) / 2 - 0.5
+
+    grahanas = []
+
+    while True:
+        guess, sin_f = mean_phase(k)
+        lunar = k % 1 != 0
+        k += 0.5
+
+        if guess > stop + timedelta(days=1):
+            break
+        if abs(sin_f) > NODE_SCREEN:
+            continue
+
+        syzygy = refine_syzygy(probe, guess, 180.0 if lunar else 0.0)
+        if not (start <= syzygy <= stop) or probe.separation(syzygy, lunar) >= eclipse_limit_deg(lunar):
+            continue
+
+        at = greatest_proximity(probe, syzygy, lunar)
+        surya_xyz, chandra_xyz = probe(at)
+        separation = probe.separation(at, lunar)
+        kind = eclipse_type(surya_xyz, chandra_xyz, separation, lunar)
+
+        if kind is not None:
+            grahanas.append({
+                "grahana": "Chandra" if lunar else "Surya",
+                "type": kind,
+                "timestamp": at.strftime(TIMESTAMP_FORMAT),
+                "syzygy": syzygy.strftime(TIMESTAMP_FORMAT),
+                "separation_deg": round(separation, 4),
+                "chandra_latitude_deg": round(cartesian_to_latitude(*chandra_xyz), 4),
+            })
+
+    return grahanas, probe.evaluations
@@ -0,0 +1,361 @@
+import asyncio
+import os
+import time
+import urllib.parse
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+import httpx
+import requests
+
+from horizons_parser import (
+    parse_csv, JD_UNIX_EPOCH, VectorTable,
+    HorizonsError, HorizonsUnavailable, HorizonsCircuitOpen, HorizonsResponseError, HorizonsParseError,
+)
+from breaker import CircuitBreaker
+from vector_store import get_store, VECTOR_STORE_PATH
+import metrics
+import timing
+
+
+HORIZONS_URL = os.getenv("HORIZONS_URL", "https://ssd.jpl.nasa.gov/api/horizons.api")
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+HORIZONS_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+Vector = Tuple[float, float, float]
+# position (km) followed by velocity (km/s)
+State = Tuple[float, float, float, float, float, float]
+
+HORIZONS_TIMEOUT = float(os.getenv("HORIZONS_TIMEOUT", "10"))
+HORIZONS_MAX_CONNECTIONS = int(os.getenv("HORIZONS_MAX_CONNECTIONS", "20"))
+HORIZONS_MAX_KEEPALIVE = int(os.getenv("HORIZONS_MAX_KEEPALIVE", "10"))
+
+http = requests.Session()
+
+# shared by sync and async queries: an outage fails both fast
+breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv("HORIZONS_BREAKER_FAILURES", "5")),
+    reset_seconds=float(os.getenv("HORIZONS_BREAKER_RESET_SECONDS", "30")),
+)
+
+_async_http = None
+
+HORIZONS_SECONDS = metrics.histogram(
+    "horizons_request_seconds", "Horizons API round trips, by body ID", ("body",)
+)
+HORIZONS_ERRORS = metrics.counter(
+    "horizons_errors_total",
+    "Horizons queries that returned no vectors, by body ID and kind "
+    "(circuit_open, unavailable, response, parse)",
+    ("body", "kind"),
+)
+
+
+# ------------------ request ------------------
+
+def build_params(command: str, center: str, vec_table: str = "1", **extra: str) -> dict:
+    params = {
+        "format": "json",
+        "COMMAND": f"'{command}'",
+        "CENTER": f"'500@{center}'",
+        "EPHEM_TYPE": "'VECTORS'",
+        "REF_PLANE": "'ECLIPTIC'",
+        "REF_SYSTEM": "'J2000'",
+        # km and km/s; "KM" alone may mean km/day velocities, which would
+        # break the Hermite interpolation in interpolation.py
+        "OUT_UNITS": "'KM-S'",
+        "CSV_FORMAT": "'YES'",
+        # 1: position only, 2: position and velocity
+        "VEC_TABLE": f"'{vec_table}'",
+    }
+    params.update(extra)
+    return params
+
+
+def build_url(params: dict) -> str:
+    query = urllib.parse.urlencode(params, safe="'@")
+    return HORIZONS_URL + "?" + query
+
+
+def read_result(payload: dict) -> str:
+    if payload.get("error"):
+        raise HorizonsResponseError(f"Invalid ephemeris response: {payload['error']}")
+    return payload.get("result", "")
+
+
+def request_result(params: dict) -> str:
+    url = build_url(params)
+    breaker.before_call()
+
+    # an answer that is not an ephemeris still means Horizons is up
+    ok = False
+    started = time.perf_counter()
+    try:
+        r = http.get(url, timeout=HORIZONS_TIMEOUT)
+        r.raise_for_status()
+        ok = True
+    except requests.RequestException:
+        raise HorizonsUnavailable()
+    finally:
+        breaker.after_call(ok)
+        observe_request(params, time.perf_counter() - started)
+
+    return read_result(r.json())
+
+
+def get_async_client() -> httpx.AsyncClient:
+    global _async_http
+
+    if _async_http is None or _async_http.is_closed:
+        _async_http = httpx.AsyncClient(
+            timeout=HORIZONS_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=HORIZONS_MAX_CONNECTIONS,
+                max_keepalive_connections=HORIZONS_MAX_KEEPALIVE,
+            ),
+        )
+    return _async_http
+
+
+async def close_async_client():
+    global _async_http
+    if _async_http is not None:
+        await _async_http.aclose()
+    _async_http = None
+
+
+async def request_result_async(params: dict) -> str:
+    url = build_url(params)
+    breaker.before_call()
+
+    ok = False
+    started = time.perf_counter()
+    try:
+        r = await get_async_client().get(url)
+        r.raise_for_status()
+        ok = True
+    except httpx.HTTPError:
+        raise HorizonsUnavailable()
+    finally:
+        breaker.after_call(ok)
+        observe_request(params, time.perf_counter() - started)
+
+    return read_result(r.json())
+
+
+def body_of(params: dict) -> str:
+    return params["COMMAND"].strip("'")
+
+
+def observe_request(params: dict, seconds: float):
+    body = body_of(params)
+    HORIZONS_SECONDS.observe(seconds, body)
+    timing.record(f"horizons-{body}", seconds)
+
+
+def error_kind(exc: HorizonsError) -> str:
+    if isinstance(exc, HorizonsCircuitOpen):
+        return "circuit_open"
+    if isinstance(exc, HorizonsUnavailable):
+        return "unavailable"
+    if isinstance(exc, HorizonsParseError):
+        return "parse"
+    return "response"
+
+
+def query_table(params: dict) -> VectorTable:
+    """request_result then parse_csv, failures counted per body."""
+    try:
+        result = request_result(params)
+        with timing.phase("parse"):
+            return parse_csv(result, params["VEC_TABLE"].strip("'"))
+    except HorizonsError as exc:
+        HORIZONS_ERRORS.inc(body_of(params), error_kind(exc))
+        raise
+
+
+async def query_table_async(params: dict) -> VectorTable:
+    try:
+        result = await request_result_async(params)
+        with timing.phase("parse"):
+            return parse_csv(result, params["VEC_TABLE"].strip("'"))
+    except HorizonsError as exc:
+        HORIZONS_ERRORS.inc(body_of(params), error_kind(exc))
+        raise
+
+
+# ------------------ epochs ------------------
+
+def datetime_to_jd(dt: datetime) -> float:
+    return (dt - datetime(1970, 1, 1)).total_seconds() / 86400 + JD_UNIX_EPOCH
+
+
+def step_epochs(start: datetime, stop: datetime, step: str) -> List[datetime]:
+    """Instants Horizons would return for START/STOP/STEP_SIZE."""
+    count, unit = step.split()
+    unit_name = {"m": "minutes", "h": "hours", "d": "days"}[unit]
+    delta = timedelta(**{unit_name: int(count)})
+
+    epochs = []
+    t = start
+    while t <= stop:
+        epochs.append(t)
+        t += delta
+    return epochs
+
+
+# ------------------ stored vectors ------------------
+# Every query below answers from the on-disk vector store when it holds all
+# the rows asked for, and appends whatever it had to fetch.
+
+def stored_series(command: str, start: datetime, stop: datetime, step: str, center: str, velocity: bool = False):
+    store = get_store()
+    if store is None:
+        return None
+
+    epochs = step_epochs(start, stop, step)
+    rows = store.get_many(command, center, epochs, velocity)
+    return list(zip(epochs, rows)) if rows is not None else None
+
+
+def stored_xyz(command: str, center: str, dt: datetime):
+    store = get_store()
+    return store.get(command, center, dt) if store is not None else None
+
+
+def store_rows(command: str, center: str, rows):
+    store = get_store()
+    if store is not None:
+        store.put(command, center, rows)
+    return rows
+
+
+async def off_loop(fn, *args, **kwargs):
+    """
+    Store access from async code: opening the file, flock (which waits for
+    another worker's append) and writes would otherwise block the loop.
+    """
+    if not VECTOR_STORE_PATH:
+        return fn(*args, **kwargs)
+    return await asyncio.to_thread(fn, *args, **kwargs)
+
+
+# ------------------ queries ------------------
+
+def series_params(command: str, start: datetime, stop: datetime, step: str, center: str, vec_table: str = "1") -> dict:
+    return build_params(
+        command,
+        center,
+        vec_table,
+        START_TIME=f"'{start.strftime(HORIZONS_TIME_FORMAT)}'",
+        STOP_TIME=f"'{stop.strftime(HORIZONS_TIME_FORMAT)}'",
+        STEP_SIZE=f"'{step}'",
+    )
+
+
+def tlist_params(command: str, timestamps: Iterable[datetime], center: str) -> dict:
+    tlist = " ".join(f"'{datetime_to_jd(dt):.9f}'" for dt in sorted(set(timestamps)))
+
+    return build_params(
+        command,
+        center,
+        TLIST=tlist,
+        TLIST_TYPE="'JD'",
+    )
+
+
+def get_horizons_series(
+    command: str,
+    start: datetime,
+    stop: datetime,
+    step: str,
+    center: str = "399"
+) -> List[Tuple[datetime, Vector]]:
+    """One START/STOP/STEP_SIZE call, every sample in the span."""
+    stored = stored_series(command, start, stop, step, center)
+    if stored is not None:
+        return stored
+
+    params = series_params(command, start, stop, step, center)
+    return store_rows(command, center, query_table(params).rows())
+
+
+def get_horizons_states(
+    command: str,
+    start: datetime,
+    stop: datetime,
+    step: str,
+    center: str = "399"
+) -> List[Tuple[datetime, State]]:
+    stored = stored_series(command, start, stop, step, center, velocity=True)
+    if stored is not None:
+        return stored
+
+    params = series_params(command, start, stop, step, center, vec_table="2")
+    return store_rows(command, center, query_table(params).rows())
+
+
+def get_horizons_tlist(
+    command: str,
+    timestamps: Iterable[datetime],
+    center: str = "399"
+) -> Dict[datetime, Vector]:
+    """One discrete-time TLIST call, rows keyed by epoch, for the epochs not stored yet."""
+    rows = {}
+    missing = []
+
+    for dt in set(timestamps):
+        xyz = stored_xyz(command, center, dt)
+        if xyz is None:
+            missing.append(dt)
+        else:
+            rows[dt] = xyz
+
+    if missing:
+        params = tlist_params(command, missing, center)
+        rows.update(store_rows(command, center, query_table(params).rows()))
+    return rows
+
+
+# ------------------ async queries ------------------
+
+async def get_horizons_series_async(
+    command: str,
+    start: datetime,
+    stop: datetime,
+    step: str,
+    center: str = "399"
+) -> List[Tuple[datetime, Vector]]:
+    stored = await off_loop(stored_series, command, start, stop, step, center)
+    if stored is not None:
+        return stored
+
+    params = series_params(command, start, stop, step, center)
+    return await off_loop(store_rows, command, center, (await query_table_async(params)).rows())
+
+
+async def get_horizons_states_async(
+    command: str,
+    start: datetime,
+    stop: datetime,
+    step: str,
+    center: str = "399"
+) -> List[Tuple[datetime, State]]:
+    stored = await off_loop(stored_series, command, start, stop, step, center, velocity=True)
+    if stored is not None:
+        return stored
+
+    params = series_params(command, start, stop, step, center, vec_table="2")
+    return await off_loop(store_rows, command, center, (await query_table_async(params)).rows())
+
+
+async def get_horizons_xyz_async(command: str, timestamp: str, center: str = "399") -> Vector:
+    dt_start = datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+    xyz = await off_loop(stored_xyz, command, center, dt_start)
+    if xyz is not None:
+        return xyz
+
+    dt_stop = dt_start + timedelta(minutes=1)
+    rows = await get_horizons_series_async(command, dt_start, dt_stop, "1 m", center)
+    return rows[0][1]
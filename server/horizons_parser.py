@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Tuple
+
+import numpy as np
+from fastapi import HTTPException
+
+
+# Parser for Horizons VECTORS results requested with CSV_FORMAT=YES.
+# One pass over the $$SOE..$$EOE block, one line split per row, rows
+# collected into a float array. Errors are typed; they stay HTTPExceptions
+# so request handlers and existing callers treat them as before.
+
+SOE = "$$SOE"
+EOE = "$$EOE"
+
+# julian day of the unix epoch, used to turn row epochs back into datetimes
+JD_UNIX_EPOCH = 2440587.5
+
+# VEC_TABLE value -> numeric columns after the calendar date
+VEC_TABLE_COLUMNS = {"1": 3, "2": 6}
+
+
+class HorizonsError(HTTPException):
+    """Anything that went wrong getting vectors out of Horizons."""
+
+
+class HorizonsUnavailable(HorizonsError):
+    def __init__(self, detail: str = "Ephemeris service unavailable"):
+        super().__init__(status_code=503, detail=detail)
+
+
+class HorizonsCircuitOpen(HorizonsUnavailable):
+    """Failed fast: Horizons has been failing and is not being called for a while."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Ephemeris service unavailable, retry later")
+        self.headers = {"Retry-After": str(retry_after)}
+
+
+class HorizonsResponseError(HorizonsError):
+    """Horizons answered, but not with an ephemeris (bad target, bad time span...)."""
+
+    def __init__(self, detail: str = "Invalid ephemeris response"):
+        super().__init__(status_code=502, detail=detail)
+
+
+class HorizonsParseError(HorizonsResponseError):
+    def __init__(self, reason: str, line: int):
+        self.reason = reason
+        self.line = line
+        super().__init__(f"Ephemeris parsing failed: {reason} (line {line})")
+
+
+class VectorTable(NamedTuple):
+    """Every row of one result: jd (n,) and values (n, 3) or (n, 6) in km, km/s."""
+
+    jd: np.ndarray
+    values: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.jd)
+
+    def epochs(self) -> List[datetime]:
+        return [jd_to_datetime(jd) for jd in self.jd.tolist()]
+
+    def rows(self) -> List[Tuple[datetime, tuple]]:
+        """(epoch, xyz) or (epoch, state) tuples, the shape the query functions return."""
+        return [
+            (jd_to_datetime(jd), tuple(values))
+            for jd, values in zip(self.jd.tolist(), self.values.tolist())
+        ]
+
+
+def jd_to_datetime(jd: float) -> datetime:
+    seconds = round((jd - JD_UNIX_EPOCH) * 86400)
+    return datetime(1970, 1, 1) + timedelta(seconds=seconds)
+
+
+def horizons_message(text: str) -> str:
+    # Horizons explains a refused request in the text before where $$SOE would be
+    for line in text.strip().splitlines():
+        line = line.strip()
+        if line and not line.startswith("*"):
+            return line[:200]
+    return "empty response"
+
+
+def parse_csv(text: str, vec_table: str = "1") -> VectorTable:
+    """
+    Rows of a CSV_FORMAT=YES result: 'JD, A.D. date, X, Y, Z[, VX, VY, VZ], ...'
+    Columns past the ones VEC_TABLE asked for are ignored.
+    """
+    columns = VEC_TABLE_COLUMNS[vec_table]
+
+    start = text.find(SOE)
+    if start < 0:
+        raise HorizonsResponseError(f"Invalid ephemeris response: {horizons_message(text)}")
+
+    # line numbers in errors count from 1 at the top of the result
+    soe_line = text.count("\n", 0, start) + 1
+
+    stop = text.find(EOE, start)
+    if stop < 0:
+        raise HorizonsParseError("missing $$EOE", soe_line)
+
+    block = text[start + len(SOE):stop].splitlines()
+
+    jd = []
+    values = []
+
+    for offset, line in enumerate(block):
+        if not line.strip():
+            continue
+
+        fields = line.split(",")
+        if len(fields) < 2 + columns:
+            raise HorizonsParseError(f"expected {2 + columns} columns, got {len(fields)}", soe_line + offset)
+
+        try:
+            jd.append(float(fields[0]))
+            values.extend(float(field) for field in fields[2:2 + columns])
+        except ValueError:
+            raise HorizonsParseError("non-numeric value", soe_line + offset)
+
+    if not jd:
+        raise HorizonsParseError("no rows between $$SOE and $$EOE", soe_line)
+
+    return VectorTable(
+        np.array(jd, dtype=float),
+        np.array(values, dtype=float).reshape(-1, columns),
+    )
@@ -0,0 +1,145 @@
+import math
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from horizons import State, Vector
+
+
+EPOCH = datetime(1970, 1, 1)
+
+StatesFetch = Callable[[str, datetime, datetime, str], List[Tuple[datetime, State]]]
+StatesFetchAsync = Callable[[str, datetime, datetime, str], Awaitable[List[Tuple[datetime, State]]]]
+
+# Bound on the 4th time derivative of the geocentric Moon position (km/s^4):
+# mean motion n = 2.66e-6 rad/s at apogee distance 4.06e5 km gives n^4 r = 2.0e-17,
+# the variation/evection terms at 2n add under 50% on top of that.
+MOON_FOURTH_DERIVATIVE = 3.0e-17
+MOON_MIN_DISTANCE = 3.56e5  # km, perigee
+
+
+def error_bound_deg(step_seconds: float) -> float:
+    """
+    Worst-case angular error of cubic Hermite interpolation on a grid of
+    this spacing, |e| <= h^4 / 384 * max|x''''|, taken for the Moon at
+    perigee. The Sun's geocentric vector is far smoother than the
+    Moon's, so this bounds both bodies.
+
+    Hourly grid: ~2e-9 degrees. Daily grid: ~7e-4 degrees.
+    """
+    km = step_seconds ** 4 / 384 * MOON_FOURTH_DERIVATIVE
+    return math.degrees(km / MOON_MIN_DISTANCE)
+
+
+def hermite(t: float, h: float, p0: State, p1: State) -> Vector:
+    """Cubic Hermite between two states, t in seconds from p0, h the spacing."""
+    s = t / h
+    s2 = s * s
+    s3 = s2 * s
+
+    h00 = 2 * s3 - 3 * s2 + 1
+    h10 = (s3 - 2 * s2 + s) * h
+    h01 = -2 * s3 + 3 * s2
+    h11 = (s3 - s2) * h
+
+    return (
+        h00 * p0[0] + h10 * p0[3] + h01 * p1[0] + h11 * p1[3],
+        h00 * p0[1] + h10 * p0[4] + h01 * p1[1] + h11 * p1[4],
+        h00 * p0[2] + h10 * p0[5] + h01 * p1[2] + h11 * p1[5],
+    )
+
+
+class StateGrid:
+    """
+    Body states (position and velocity) on a regular grid, filled from
+    Horizons one chunk of nodes per call. Any instant between two stored
+    nodes is answered locally with cubic Hermite interpolation, accurate
+    to error_bound_deg(step_seconds).
+    """
+
+    def __init__(
+        self,
+        fetch: StatesFetch,
+        fetch_async: Optional[StatesFetchAsync] = None,
+        step_seconds: int = 60 * 60,
+        chunk_nodes: int = 48,
+        max_nodes: int = 200_000,
+    ):
+        self.fetch = fetch
+        self.fetch_async = fetch_async
+        self.step = step_seconds
+        self.chunk = chunk_nodes
+        self.max_nodes = max_nodes
+        self.nodes: Dict[str, Dict[int, State]] = {}
+
+    @property
+    def error_bound_deg(self) -> float:
+        return error_bound_deg(self.step)
+
+    def _offset(self, dt: datetime) -> float:
+        return (dt - EPOCH).total_seconds()
+
+    def _node_time(self, k: int) -> datetime:
+        return EPOCH + timedelta(seconds=k * self.step)
+
+    def lookup(self, command: str, dt: datetime) -> Optional[Vector]:
+        nodes = self.nodes.get(command)
+        if not nodes:
+            return None
+
+        t = self._offset(dt)
+        k = math.floor(t / self.step)
+
+        p0 = nodes.get(k)
+        if p0 is None:
+            return None
+
+        dt0 = t - k * self.step
+        if dt0 == 0:
+            return p0[:3]
+
+        p1 = nodes.get(k + 1)
+        if p1 is None:
+            return None
+
+        return hermite(dt0, self.step, p0, p1)
+
+    def missing_span(self, command: str, start: datetime, stop: datetime) -> Optional[Tuple[datetime, datetime]]:
+        """Chunk-aligned span of nodes to fetch so [start, stop] is covered."""
+        nodes = self.nodes.get(command, {})
+
+        k0 = math.floor(self._offset(start) / self.step)
+        k1 = math.ceil(self._offset(stop) / self.step)
+
+        missing = [k for k in range(k0, k1 + 1) if k not in nodes]
+        if not missing:
+            return None
+
+        first = (missing[0] // self.chunk) * self.chunk
+        last = (missing[-1] // self.chunk + 1) * self.chunk
+        return self._node_time(first), self._node_time(last)
+
+    def store(self, command: str, rows: List[Tuple[datetime, State]]):
+        nodes = self.nodes.setdefault(command, {})
+
+        for epoch, state in rows:
+            t = self._offset(epoch)
+            if t % self.step == 0:
+                nodes[int(t // self.step)] = state
+
+        # oldest fills go first
+        while len(nodes) > self.max_nodes:
+            del nodes[next(iter(nodes))]
+
+    @property
+    def step_size(self) -> str:
+        return f"{self.step // 60} m"
+
+    def ensure(self, command: str, start: datetime, stop: datetime):
+        span = self.missing_span(command, start, stop)
+        if span is not None:
+            self.store(command, self.fetch(command, span[0], span[1], self.step_size))
+
+    async def ensure_async(self, command: str, start: datetime, stop: datetime):
+        span = self.missing_span(command, start, stop)
+        if span is not None:
+            self.store(command, await self.fetch_async(command, span[0], span[1], self.step_size))
@@ -0,0 +1,235 @@
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+# In-process metrics in the Prometheus text exposition format, without a
+# client library. Counters, gauges and histograms are updated under one
+# small lock each; anything that already keeps its own numbers (caches,
+# the DB pool, the write-behind queue, the circuit breaker) is read by a
+# collector only when /metrics is scraped, so it costs nothing per request.
+# Every worker process exposes its own numbers; the scraper adds them up.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# seconds; Horizons answers in tenths of a second to seconds, the DB in milliseconds
+UPSTREAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+Labels = Tuple[str, ...]
+# (suffixed name, label names, label values, value)
+Sample = Tuple[str, Sequence[str], Sequence[str], float]
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def format_sample(name: str, label_names: Sequence[str], label_values: Sequence[str], value: float) -> str:
+    if not label_names:
+        return f"{name} {format_value(value)}"
+    labels = ",".join(f'{k}="{escape(str(v))}"' for k, v in zip(label_names, label_values))
+    return f"{name}{{{labels}}} {format_value(value)}"
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        for label_values, value in values:
+            yield self.name, self.labels, label_values, value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *label_values: str, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, *label_values: str, value: float):
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = UPSTREAM_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # per label values: a count per bucket (last one is +Inf), sum, count
+        self._values: Dict[Labels, List] = {}
+
+    def observe(self, value: float, *label_values: str):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def time(self, *label_values: str) -> "Timer":
+        return Timer(self, label_values)
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = [(k, (list(v[0]), v[1], v[2])) for k, v in self._values.items()]
+
+        names = self.labels + ("le",)
+        for label_values, (counts, total, count) in values:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                yield f"{self.name}_bucket", names, label_values + (format_value(bound),), cumulative
+            yield f"{self.name}_sum", self.labels, label_values, total
+            yield f"{self.name}_count", self.labels, label_values, count
+
+
+class Timer:
+    """with histogram.time(labels...): observes the block's duration, even if it raises."""
+
+    __slots__ = ("histogram", "label_values", "started")
+
+    def __init__(self, histogram: Histogram, label_values: Labels):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.label_values)
+        return False
+
+
+class Collected(Metric):
+    """A metric whose samples are read from elsewhere at scrape time."""
+
+    def __init__(self, name: str, help: str, kind: str, labels: Sequence[str], read: Callable[[], Iterable[Tuple[Labels, float]]]):
+        super().__init__(name, help, labels)
+        self.kind = kind
+        self.read = read
+
+    def samples(self) -> Iterable[Sample]:
+        for label_values, value in self.read():
+            yield self.name, self.labels, label_values, value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric {metric.name} registered twice")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            try:
+                samples = list(metric.samples())
+            except Exception as exc:
+                # one broken collector must not take the whole scrape down
+                lines.append(f"# {metric.name} unavailable: {exc!r}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(format_sample(*sample) for sample in samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help, labels))
+
+
+def gauge(name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, help, labels))
+
+
+def histogram(name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = UPSTREAM_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, help, labels, buckets))
+
+
+def collected(name: str, help: str, kind: str, labels: Sequence[str], read: Callable[[], Iterable[Tuple[Labels, float]]]) -> Collected:
+    return REGISTRY.register(Collected(name, help, kind, labels, read))
+
+
+# ------------------ HTTP ------------------
+
+HTTP_IN_FLIGHT = gauge("http_requests_in_flight", "Requests being handled right now")
+HTTP_REQUESTS = counter("http_requests_total", "Requests handled, by status code", ("status",))
+
+
+class InFlightMiddleware:
+    """Plain ASGI middleware: the in-flight gauge and a count per status, nothing else."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = "500"
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            HTTP_REQUESTS.inc(status)
@@ -0,0 +1,172 @@
+# converts lunar_ephemeris from the JSON/VARCHAR layout to the typed layout in db.sql
+#
+#   python migrate_schema.py                 copy into lunar_ephemeris_v2, then swap tables
+#   python migrate_schema.py --no-swap       copy only, leave the live table alone
+#   python migrate_schema.py --widen-stamp   typed table created with utc_stamp TIMESTAMP
+#                                            -> DATETIME, in place
+#
+#   --time-zone ZONE                         zone the old app's sessions ran in,
+#                                            default the server's @@global.time_zone
+#
+# After the swap the old rows stay in lunar_ephemeris_legacy until dropped by hand.
+# The old app wrote naive UTC datetimes into TIMESTAMP columns from sessions
+# in the server's default zone, and MySQL converts TIMESTAMPs through the
+# session zone on the way in and out. Rows are read, and --widen-stamp
+# converts, in that same zone, which gives back the values as written;
+# forcing UTC here would shift every row by the server's offset.
+
+import argparse
+import json
+import os
+import time
+
+from db import pool, encode_row, COLUMNS, stop_tunnel, close_connection
+
+
+LEGACY_TABLE = "lunar_ephemeris"
+TARGET_TABLE = "lunar_ephemeris_v2"
+BACKUP_TABLE = "lunar_ephemeris_legacy"
+
+
+def decode_legacy_row(row: dict) -> dict:
+    """A row of the old layout -> API dict."""
+    upavaas = row.get("upavaas")
+    if upavaas is None or upavaas in ("null", "None"):
+        upavaas = []
+    elif isinstance(upavaas, str):
+        upavaas = json.loads(upavaas)
+
+    return {
+        "timestamp": row["utc_stamp"].strftime("%Y-%m-%dT%H:%M:%S"),
+        "ayana": row["ayana"],
+        "ritu": row["ritu"],
+        "masa": row["masa"],
+        "paksha": row["paksha"],
+        "tithi": row["tithi"],
+        "phase": row["phase"],
+        "surya_rashi": row["surya_rashi"],
+        "chandra_rashi": row["chandra_rashi"],
+        "surya_longitude_deg": row["surya_longitude_deg"],
+        "chandra_longitude_deg": row["chandra_longitude_deg"],
+        "longitudinal_angle_deg": row["longitudinal_angle_deg"],
+        "grahana": row["grahana"] or "None",
+        "surya_xyz": tuple(json.loads(row["surya_xyz"])),
+        "chandra_xyz": tuple(json.loads(row["chandra_xyz"])),
+        "upavaas": upavaas,
+    }
+
+
+def create_target(cur):
+    with open(os.path.join(os.path.dirname(__file__), "db.sql")) as f:
+        ddl = f.read()
+
+    # db.sql describes the live table; build the copy under another name
+    ddl = ddl.replace(f"CREATE TABLE {LEGACY_TABLE} (", f"CREATE TABLE IF NOT EXISTS {TARGET_TABLE} (")
+    ddl = "\n".join(line for line in ddl.splitlines() if not line.startswith("--"))
+    cur.execute(ddl)
+
+
+def use_zone(cur, zone):
+    """Runs the session in zone, or the server's default zone when None."""
+    if zone is None:
+        cur.execute("SET time_zone = @@global.time_zone")
+    else:
+        cur.execute("SET time_zone = %s", (zone,))
+    cur.execute("SELECT @@session.time_zone AS zone")
+    return cur.fetchone()["zone"]
+
+
+def widen_stamp(zone=None):
+    """utc_stamp TIMESTAMP (1970-2038) -> DATETIME, for tables made from an older db.sql."""
+    with pool.connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            "SELECT DATA_TYPE FROM information_schema.COLUMNS"
+            " WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = 'utc_stamp'",
+            (LEGACY_TABLE,),
+        )
+        row = cur.fetchone()
+        if row is None or row["DATA_TYPE"].lower() != "timestamp":
+            print(f"{LEGACY_TABLE}.utc_stamp is already {row and row['DATA_TYPE']}, nothing to do")
+            return
+
+        zone = use_zone(cur, zone)
+        cur.execute(f"ALTER TABLE {LEGACY_TABLE} MODIFY utc_stamp DATETIME NOT NULL")
+    print(f"{LEGACY_TABLE}.utc_stamp is now DATETIME, converted in time zone {zone}")
+
+
+def migrate(batch_size: int, swap: bool, zone=None):
+    with pool.connection() as conn, conn.cursor() as cur:
+        create_target(cur)
+        zone = use_zone(cur, zone)
+    print(f"reading {LEGACY_TABLE} in time zone {zone}")
+
+    insert_sql = (
+        f"INSERT INTO {TARGET_TABLE} (" + ", ".join(COLUMNS) + ") "
+        "VALUES (" + ", ".join(["%s"] * len(COLUMNS)) + ") "
+        "ON DUPLICATE KEY UPDATE " + ", ".join(f"{c}=VALUES({c})" for c in COLUMNS[1:])
+    )
+
+    copied = 0
+    skipped = 0
+    last = None
+    started = time.monotonic()
+
+    while True:
+        with pool.connection() as conn, conn.cursor() as cur:
+            use_zone(cur, zone)
+            # keyset pagination on the primary key
+            if last is None:
+                cur.execute(
+                    f"SELECT * FROM {LEGACY_TABLE} ORDER BY utc_stamp LIMIT %s",
+                    (batch_size,),
+                )
+            else:
+                cur.execute(
+                    f"SELECT * FROM {LEGACY_TABLE} WHERE utc_stamp > %s ORDER BY utc_stamp LIMIT %s",
+                    (last, batch_size),
+                )
+            rows = cur.fetchall()
+
+            if not rows:
+                break
+
+            encoded = []
+            for row in rows:
+                try:
+                    encoded.append(encode_row(decode_legacy_row(row)))
+                except (KeyError, TypeError, ValueError) as exc:
+                    skipped += 1
+                    print(f"skipping {row['utc_stamp']}: {exc!r}")
+
+            cur.executemany(insert_sql, encoded)
+
+        copied += len(encoded)
+        last = rows[-1]["utc_stamp"]
+        rate = copied / max(time.monotonic() - started, 1e-9)
+        print(f"copied {copied} rows (skipped {skipped}), {rate:.0f} rows/s, up to {last}")
+
+    if swap:
+        with pool.connection() as conn, conn.cursor() as cur:
+            # atomic in MySQL: readers see either the old or the new table
+            cur.execute(
+                f"RENAME TABLE {LEGACY_TABLE} TO {BACKUP_TABLE}, {TARGET_TABLE} TO {LEGACY_TABLE}"
+            )
+        print(f"swapped: {LEGACY_TABLE} is now the typed layout, old rows in {BACKUP_TABLE}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate lunar_ephemeris to the typed column layout")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--no-swap", action="store_true", help="copy rows but keep the live table")
+    parser.add_argument("--widen-stamp", action="store_true", help="only convert utc_stamp to DATETIME")
+    parser.add_argument("--time-zone", help="session zone the rows were written in, default @@global.time_zone")
+    args = parser.parse_args()
+
+    try:
+        if args.widen_stamp:
+            widen_stamp(args.time_zone)
+        else:
+            migrate(args.batch_size, swap=not args.no_swap, zone=args.time_zone)
+    finally:
+        close_connection()
+        stop_tunnel()
@@ -1,7 +1,19 @@
+import re
 from datetime import datetime
-from pydantic import BaseModel, Field, field_validator
+from fastapi import HTTPException
+from pydantic import BaseModel, Field, field_validator, model_validator
 from typing import Tuple
 
+from type_info import UPAVAASs
+
+
+# Horizons STEP_SIZE units -> seconds
+STEP_UNITS = {"m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+MAX_RANGE_SAMPLES = 1000
+MAX_TRANSITION_SPAN_DAYS = 366
+MAX_UPAVAAS_COUNT = 12
+MAX_GRAHANA_SPAN_DAYS = 25 * 366
+
 
 class LunarInfoQuery(BaseModel):
     timestamp: str | None = Field(
@@ -25,6 +37,188 @@ class LunarInfoQuery(BaseModel):
                 detail="Invalid format. Expected YYYY-MM-DDTHH:MM:SS"
             )
 
+class LunarRangeQuery(BaseModel):
+    start: str = Field(
+        description="UTC start timestamp in ISO 8601 format (YYYY-MM-DDTHH:MM:SS)"
+    )
+    stop: str = Field(
+        description="UTC stop timestamp in ISO 8601 format (YYYY-MM-DDTHH:MM:SS)"
+    )
+    step: str = Field(
+        default="1d",
+        description="Sample spacing as <count><unit>, unit one of m, h, d (e.g. 6h)"
+    )
+
+    @field_validator("start", "stop")
+    @classmethod
+    def validate_timestamp(cls, v: str) -> str:
+        try:
+            dt = datetime.strptime(v, "%Y-%m-%dT%H:%M:%S")
+            return dt.strftime("%Y-%m-%dT%H:%M:%S")
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid format. Expected YYYY-MM-DDTHH:MM:SS"
+            )
+
+    @field_validator("step")
+    @classmethod
+    def validate_step(cls, v: str) -> str:
+        m = re.fullmatch(r"\s*([1-9][0-9]*)\s*([mhd])\s*", v)
+        if not m:
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid step. Expected <count><unit> with unit m, h or d"
+            )
+        # normalized to the Horizons STEP_SIZE spelling
+        return f"{m.group(1)} {m.group(2)}"
+
+    @model_validator(mode="after")
+    def validate_span(self):
+        span = (
+            datetime.strptime(self.stop, "%Y-%m-%dT%H:%M:%S")
+            - datetime.strptime(self.start, "%Y-%m-%dT%H:%M:%S")
+        ).total_seconds()
+
+        if span <= 0:
+            raise HTTPException(
+                status_code=400,
+                detail="stop must be after start"
+            )
+
+        if span // self.step_seconds + 1 > MAX_RANGE_SAMPLES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Range too large. At most {MAX_RANGE_SAMPLES} samples per request"
+            )
+
+        return self
+
+    @property
+    def step_seconds(self) -> int:
+        count, unit = self.step.split()
+        return int(count) * STEP_UNITS[unit]
+
+class TransitionsQuery(BaseModel):
+    start: str = Field(
+        description="UTC start timestamp in ISO 8601 format (YYYY-MM-DDTHH:MM:SS)"
+    )
+    stop: str = Field(
+        description="UTC stop timestamp in ISO 8601 format (YYYY-MM-DDTHH:MM:SS)"
+    )
+
+    @field_validator("start", "stop")
+    @classmethod
+    def validate_timestamp(cls, v: str) -> str:
+        try:
+            dt = datetime.strptime(v, "%Y-%m-%dT%H:%M:%S")
+            return dt.strftime("%Y-%m-%dT%H:%M:%S")
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid format. Expected YYYY-MM-DDTHH:MM:SS"
+            )
+
+    @model_validator(mode="after")
+    def validate_span(self):
+        span = (
+            datetime.strptime(self.stop, "%Y-%m-%dT%H:%M:%S")
+            - datetime.strptime(self.start, "%Y-%m-%dT%H:%M:%S")
+        )
+
+        if span.total_seconds() <= 0:
+            raise HTTPException(
+                status_code=400,
+                detail="stop must be after start"
+            )
+
+        if span.days > MAX_TRANSITION_SPAN_DAYS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Range too large. At most {MAX_TRANSITION_SPAN_DAYS} days per request"
+            )
+
+        return self
+
+class UpavaasNextQuery(BaseModel):
+    name: str = Field(
+        description="Observance name, e.g. Ekadashi (case-insensitive)"
+    )
+    after: str | None = Field(
+        default=None,
+        description="UTC timestamp in ISO 8601 format (YYYY-MM-DDTHH:MM:SS), default now"
+    )
+    count: int = Field(default=1, ge=1, le=MAX_UPAVAAS_COUNT)
+
+    @field_validator("name")
+    @classmethod
+    def validate_name(cls, v: str) -> str:
+        names = [u.name for u in UPAVAASs]
+        for name in names:
+            if name.lower() == v.strip().lower():
+                return name
+
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown upavaas. Expected one of: {', '.join(names)}"
+        )
+
+    @field_validator("after")
+    @classmethod
+    def validate_timestamp(cls, v: str | None) -> str | None:
+        if v is None:
+            return v
+
+        try:
+            dt = datetime.strptime(v, "%Y-%m-%dT%H:%M:%S")
+            return dt.strftime("%Y-%m-%dT%H:%M:%S")
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid format. Expected YYYY-MM-DDTHH:MM:SS"
+            )
+
+class GrahanaQuery(BaseModel):
+    start: str = Field(
+        description="UTC start timestamp in ISO 8601 format (YYYY-MM-DDTHH:MM:SS)"
+    )
+    stop: str = Field(
+        description="UTC stop timestamp in ISO 8601 format (YYYY-MM-DDTHH:MM:SS)"
+    )
+
+    @field_validator("start", "stop")
+    @classmethod
+    def validate_timestamp(cls, v: str) -> str:
+        try:
+            dt = datetime.strptime(v, "%Y-%m-%dT%H:%M:%S")
+            return dt.strftime("%Y-%m-%dT%H:%M:%S")
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid format. Expected YYYY-MM-DDTHH:MM:SS"
+            )
+
+    @model_validator(mode="after")
+    def validate_span(self):
+        span = (
+            datetime.strptime(self.stop, "%Y-%m-%dT%H:%M:%S")
+            - datetime.strptime(self.start, "%Y-%m-%dT%H:%M:%S")
+        )
+
+        if span.total_seconds() <= 0:
+            raise HTTPException(
+                status_code=400,
+                detail="stop must be after start"
+            )
+
+        if span.days > MAX_GRAHANA_SPAN_DAYS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Range too large. At most {MAX_GRAHANA_SPAN_DAYS} days per request"
+            )
+
+        return self
+
 class FastingInfo(BaseModel):
     name: str
     description: str
@@ -53,6 +247,61 @@ class LunarResponse(BaseModel):
 
     upavaas: list[FastingInfo]
 
+    # true when Horizons was unreachable and this is an older or approximate answer
+    stale: bool = False
+
+
+class LunarRangeResponse(BaseModel):
+    start: str
+    stop: str
+    step: str
+    snapshots: list[LunarResponse]
+
+
+class Transition(BaseModel):
+    event: str
+    timestamp: str
+    previous: str
+    current: str
+
+
+class TransitionsResponse(BaseModel):
+    start: str
+    stop: str
+    transitions: list[Transition]
+
+
+class CalendarResponse(BaseModel):
+    year: int
+    month: int
+    days: list[LunarResponse]
+
+
+class UpavaasOccurrence(BaseModel):
+    start: str
+    end: str
+
+
+class UpavaasNextResponse(BaseModel):
+    name: str
+    after: str
+    occurrences: list[UpavaasOccurrence]
+
+
+class Grahana(BaseModel):
+    grahana: str
+    type: str
+    timestamp: str
+    syzygy: str
+    separation_deg: float
+    chandra_latitude_deg: float
+
+
+class GrahanaResponse(BaseModel):
+    start: str
+    stop: str
+    grahanas: list[Grahana]
+
 
 class PlanetCoordinate(BaseModel):
     name: str
@@ -60,5 +309,6 @@ class PlanetCoordinate(BaseModel):
     longitude_deg: float
 
 class PlanetsResponse(BaseModel):
-    timestamp: str
-    planets: list[PlanetCoordinate]
\ No newline at end of file
+    date: str
+    planets: list[PlanetCoordinate]
+    stale: bool = False
\ No newline at end of file
@@ -0,0 +1,86 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional
+
+from horizons import TIMESTAMP_FORMAT
+
+
+class NowWindow:
+    """
+    Snapshots for a rolling window of instants around now, on a fixed
+    resolution, computed ahead of time by a background task. Requests
+    without a timestamp are snapped to the current slot and answered
+    from here.
+    """
+
+    def __init__(
+        self,
+        compute: Callable[[str], Awaitable[Dict]],
+        resolution_seconds: int = 60,
+        ahead: int = 10,
+        behind: int = 2,
+    ):
+        self.compute = compute
+        self.resolution = max(1, resolution_seconds)
+        self.ahead = ahead
+        self.behind = behind
+        self.snapshots: Dict[str, Dict] = {}
+        self._task = None
+
+        self.hits = 0
+        self.misses = 0
+
+    def slot(self, now: Optional[datetime] = None) -> str:
+        now = now or datetime.now(timezone.utc)
+        seconds = int(now.timestamp())
+        snapped = datetime.fromtimestamp(seconds - seconds % self.resolution, timezone.utc)
+        return snapped.strftime(TIMESTAMP_FORMAT)
+
+    def get(self, slot: str) -> Optional[Dict]:
+        snapshot = self.snapshots.get(slot)
+        if snapshot is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return snapshot
+
+    def window(self, now: Optional[datetime] = None) -> list[str]:
+        current = datetime.strptime(self.slot(now), TIMESTAMP_FORMAT)
+        step = timedelta(seconds=self.resolution)
+        return [
+            (current + i * step).strftime(TIMESTAMP_FORMAT)
+            for i in range(-self.behind, self.ahead + 1)
+        ]
+
+    async def refresh(self):
+        slots = self.window()
+
+        for slot in slots:
+            if slot not in self.snapshots:
+                self.snapshots[slot] = await self.compute(slot)
+
+        # slots that fell behind the window
+        keep = set(slots)
+        for slot in [s for s in self.snapshots if s not in keep]:
+            del self.snapshots[slot]
+
+    async def run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as exc:
+                print(f"now window refresh failed: {exc!r}")
+            await asyncio.sleep(self.resolution)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import random
+import re
+import sys
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional
+
+
+# Opt-in sampling profiler for single requests, switched on without a
+# redeploy: a request carrying `X-Profile: <PROFILE_TOKEN>` is profiled, and
+# so is a random PROFILE_SAMPLE_RATE share of all traffic. Both are off by
+# default. A background thread samples Python stacks every
+# PROFILE_INTERVAL_MS until the response starts, and the counts are written
+# to PROFILE_DIR in the collapsed-stack format flamegraph.pl and speedscope
+# read. The response names the file in an X-Profile header.
+#
+# The event loop thread is sampled even while it waits (time spent awaiting
+# Horizons shows up under select); other threads only while they run, so
+# idle pool workers do not drown the profile. One request is profiled at a
+# time per worker, and anything else the loop runs meanwhile (concurrent
+# requests) is in its samples too.
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+# innermost frames of a thread that is parked, not working
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+_active = threading.Lock()
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def is_idle(frame) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_FRAMES
+
+
+class StackSampler:
+    """Counts each thread's Python stack, sampled from a thread of its own."""
+
+    def __init__(self, target: int, interval: float):
+        self.target = target
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self.run, daemon=True, name="stack-sampler")
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def run(self):
+        own = threading.get_ident()
+
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            self.samples += 1
+
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (ident != self.target and is_idle(frame)):
+                    continue
+
+                stack = []
+                while frame is not None:
+                    stack.append(frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.counts[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+
+def should_profile(headers) -> bool:
+    if PROFILE_TOKEN:
+        for name, value in headers:
+            if name == b"x-profile" and value.decode("latin-1") == PROFILE_TOKEN:
+                return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def profile_name(path: str) -> str:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root"
+    return f"{stamp}-{slug}.folded"
+
+
+def write_profile(name: str, collapsed: str):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with open(os.path.join(PROFILE_DIR, name), "w") as f:
+        f.write(collapsed)
+
+
+class ProfilerMiddleware:
+    """Plain ASGI middleware: profiles the requests should_profile picks."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not should_profile(scope["headers"])
+            # another request is being profiled already
+            or not _active.acquire(blocking=False)
+        ):
+            return await self.app(scope, receive, send)
+
+        sampler: Optional[StackSampler] = StackSampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000)
+
+        async def finish() -> Optional[str]:
+            nonlocal sampler
+            if sampler is None:
+                return None
+            sampler.stop()
+            _active.release()
+            done, sampler = sampler, None
+
+            if not done.counts:
+                return None
+            name = profile_name(scope["path"])
+            await asyncio.to_thread(write_profile, name, done.collapsed())
+            return name
+
+        async def send_profile(message):
+            if message["type"] == "http.response.start":
+                name = await finish()
+                if name is not None:
+                    message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile", name.encode())]}
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_profile)
+        finally:
+            await finish()
@@ -0,0 +1,78 @@
+import hashlib
+from typing import Any, Dict, Optional, Type
+
+import orjson
+from pydantic import BaseModel
+from starlette.responses import Response
+
+import timing
+
+
+# Bump when a change to the computation or the response shape alters the
+# body served for a timestamp; every ETag handed out so far then stops
+# matching.
+DATA_VERSION = "2"
+
+# a year, the longest lifetime HTTP caches are expected to honour
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+class EncodedJSONResponse(Response):
+    """Sends bytes that are already JSON as they are; nothing is re-validated."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return orjson.dumps(content)
+
+
+def encode(model: Type[BaseModel], data: Any) -> bytes:
+    """
+    Validate data against model once and return the final response body.
+    Serializing the validated model keeps the output identical to what
+    FastAPI would send for response_model=model.
+    """
+    with timing.phase("serialize"):
+        return orjson.dumps(model.model_validate(data).model_dump(mode="json"))
+
+
+def make_etag(*parts: str) -> str:
+    """
+    Strong validator for the body served under these parts (endpoint,
+    ephemeris source where bodies depend on it, normalized timestamp). It
+    is known before the body is, so a
+    conditional request can be answered without a lookup or a compute.
+    """
+    digest = hashlib.sha1(":".join((DATA_VERSION,) + parts).encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def cache_headers(etag: str, max_age: Optional[int] = None) -> Dict[str, str]:
+    """No max_age means the body never changes."""
+    if max_age is None:
+        cache_control = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    else:
+        cache_control = f"public, max-age={max(0, max_age)}"
+
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+
+# an answer served in place of a fresh one (see app.stale_info) is never cached
+STALE_HEADERS = {"Cache-Control": "no-store"}
+
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
@@ -0,0 +1,203 @@
+import argparse
+import asyncio
+import os
+import time
+from typing import Callable, Optional, Sequence
+
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import RedisError
+except ImportError:  # only needed when REDIS_URL is set
+    aioredis = None
+    RedisError = OSError
+
+from responses import DATA_VERSION
+
+
+# Encoded response bodies shared by every worker and node through a
+# Redis-protocol store (L2), behind each process's own in-memory caches
+# (L1: app.encoded, with app.cache under it). A miss in L1 asks L2 before
+# loading anything, and whatever a worker loads is written to both, so N
+# workers load a timestamp once instead of N times.
+#
+# Keys are namespaced as <prefix>:<DATA_VERSION>:<generation>:<key>:
+#   - bumping DATA_VERSION (a computation or response change) orphans every
+#     entry at deploy time; orphans expire with their TTL
+#   - invalidate() increments the generation stored under
+#     <prefix>:generation, which does the same without a deploy; every
+#     worker polls it and clears its L1 within check_seconds
+#
+# The store is an optimization only. When it cannot be reached a lookup
+# is a miss and a write is skipped, and the store is left alone for
+# retry_seconds so an outage costs one timeout, not one per request.
+
+REDIS_URL = os.getenv("REDIS_URL", "")
+SHARED_CACHE_PREFIX = os.getenv("SHARED_CACHE_PREFIX", "lunar")
+SHARED_CACHE_TTL_SECONDS = int(os.getenv("SHARED_CACHE_TTL_SECONDS", str(12 * 60 * 60)))
+SHARED_CACHE_TIMEOUT = float(os.getenv("SHARED_CACHE_TIMEOUT", "0.1"))
+SHARED_CACHE_CHECK_SECONDS = float(os.getenv("SHARED_CACHE_CHECK_SECONDS", "5"))
+SHARED_CACHE_RETRY_SECONDS = float(os.getenv("SHARED_CACHE_RETRY_SECONDS", "5"))
+
+# raised by the client or a stand-in when the store is unreachable
+STORE_ERRORS = (RedisError, OSError, asyncio.TimeoutError)
+
+
+class SharedCache:
+    """
+    L2 for an in-process cache. `client` is anything with redis.asyncio's
+    get / set(ex=) / incr (a redis.asyncio.Redis, or bench/redis_standin.py);
+    `l1` are the in-process caches cleared when the generation moves on.
+    """
+
+    def __init__(
+        self,
+        client,
+        l1: Sequence = (),
+        ttl: int = SHARED_CACHE_TTL_SECONDS,
+        prefix: str = SHARED_CACHE_PREFIX,
+        check_seconds: float = SHARED_CACHE_CHECK_SECONDS,
+        retry_seconds: float = SHARED_CACHE_RETRY_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.client = client
+        self.l1 = l1
+        self.ttl = ttl
+        self.prefix = prefix
+        self.check_seconds = check_seconds
+        self.retry_seconds = retry_seconds
+        self.clock = clock
+
+        self.generation: Optional[int] = None
+        self._down_until = 0.0
+        self._task = None
+
+        # read by the /metrics collector
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+        self.l1_clears = 0
+
+    @property
+    def generation_key(self) -> str:
+        return f"{self.prefix}:generation"
+
+    def key(self, key: str) -> str:
+        return f"{self.prefix}:{DATA_VERSION}:{self.generation}:{key}"
+
+    # ------------------ store access ------------------
+
+    def available(self) -> bool:
+        return self.generation is not None and self.clock() >= self._down_until
+
+    def _failed(self, exc: BaseException):
+        self.errors += 1
+        if self.clock() >= self._down_until:
+            print(f"shared cache unreachable, skipped for {self.retry_seconds:g}s: {exc!r}")
+        self._down_until = self.clock() + self.retry_seconds
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if not self.available():
+            return None
+
+        try:
+            value = await self.client.get(self.key(key))
+        except STORE_ERRORS as exc:
+            self._failed(exc)
+            return None
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes):
+        if not self.available():
+            return
+
+        try:
+            await self.client.set(self.key(key), value, ex=self.ttl)
+            self.writes += 1
+        except STORE_ERRORS as exc:
+            self._failed(exc)
+
+    # ------------------ invalidation ------------------
+
+    async def invalidate(self) -> int:
+        """Orphans every shared entry and, within check_seconds, every worker's L1."""
+        generation = int(await self.client.incr(self.generation_key))
+        self._adopt(generation)
+        return generation
+
+    def _adopt(self, generation: int):
+        if self.generation is not None and generation != self.generation:
+            # RefreshingCache.clear drops stale copies too, uncounted as evictions
+            for cache in self.l1:
+                cache.clear()
+            self.l1_clears += 1
+        self.generation = generation
+
+    async def check_generation(self):
+        try:
+            value = await self.client.get(self.generation_key)
+        except STORE_ERRORS as exc:
+            self._failed(exc)
+            return
+        self._down_until = 0.0
+        self._adopt(int(value or 0))
+
+    async def run(self):
+        while True:
+            await self.check_generation()
+            await asyncio.sleep(self.check_seconds)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        close = getattr(self.client, "aclose", None)
+        if close is not None:
+            await close()
+
+
+def connect(url: str = REDIS_URL):
+    """A redis.asyncio client for url, or None when no shared store is configured."""
+    if not url:
+        return None
+    if aioredis is None:
+        raise RuntimeError("REDIS_URL is set but the redis package is not installed")
+    return aioredis.Redis.from_url(
+        url,
+        socket_timeout=SHARED_CACHE_TIMEOUT,
+        socket_connect_timeout=SHARED_CACHE_TIMEOUT,
+    )
+
+
+async def invalidate_all(url: str = REDIS_URL) -> int:
+    client = connect(url)
+    if client is None:
+        raise SystemExit("REDIS_URL is not set; there is no shared cache to invalidate")
+
+    cache = SharedCache(client)
+    try:
+        return await cache.invalidate()
+    finally:
+        await cache.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Invalidate the shared response cache on every worker")
+    parser.add_argument("--url", default=REDIS_URL, help="Redis URL, defaults to REDIS_URL")
+    args = parser.parse_args()
+
+    print(f"shared cache generation is now {asyncio.run(invalidate_all(args.url))}")
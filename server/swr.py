@@ -0,0 +1,127 @@
+import asyncio
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from cachetools import LRUCache, TTLCache
+
+from singleflight import SingleFlight
+
+
+class RefreshingCache(TTLCache):
+    """
+    TTLCache that remembers when each entry was stored.
+
+    needs_refresh() is true once an entry is within refresh_ahead seconds
+    of expiring, so callers can reload it off the request path while it is
+    still served. Entries that do expire move to a bounded LRU of stale
+    copies, which stale() returns when a reload cannot reach upstream.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        refresh_ahead: float = 0,
+        stale_maxsize: Optional[int] = None,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(maxsize, ttl, timer)
+        self.refresh_ahead = min(refresh_ahead, ttl)
+        self.stale_copies = LRUCache(maxsize=maxsize if stale_maxsize is None else stale_maxsize)
+        self._stored_at: Dict[Hashable, float] = {}
+
+        # read by the /metrics collector
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._stored_at[key] = self.timer()
+        self.stale_copies.pop(key, None)
+
+    def __delitem__(self, key):
+        # TTLCache raises KeyError for an expired key after removing it
+        try:
+            super().__delitem__(key)
+        finally:
+            self._stored_at.pop(key, None)
+
+    def get(self, key, default=None):
+        if key in self:
+            self.hits += 1
+            return self[key]
+        self.misses += 1
+        return default
+
+    def popitem(self):
+        # only called to make room: size evictions, not expirations
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        self.expirations += len(expired)
+        for key, value in expired:
+            self._stored_at.pop(key, None)
+            if self.stale_copies.maxsize:
+                self.stale_copies[key] = value
+        return expired
+
+    def clear(self):
+        """
+        Drops every entry and its stale copy, for an invalidation: nothing
+        is counted as evicted or expired, and stale() has nothing to serve.
+        """
+        # TTLCache's own expire: everything is past an infinite time
+        TTLCache.expire(self, math.inf)
+        self.stale_copies.clear()
+        self._stored_at.clear()
+
+    def needs_refresh(self, key) -> bool:
+        stored_at = self._stored_at.get(key)
+        if stored_at is None or not self.refresh_ahead:
+            return False
+        return self.timer() - stored_at >= self.ttl - self.refresh_ahead
+
+    def stale(self, key) -> Optional[Any]:
+        """The last value stored under key, even if it has expired."""
+        if key in self:
+            return self[key]
+        self.expire()
+        return self.stale_copies.get(key)
+
+
+class Revalidator:
+    """
+    Reloads near-expiry cache entries in background tasks. A reload goes
+    through the same SingleFlight key as a request-path load, so a request
+    missing the entry meanwhile joins it instead of loading it again.
+    """
+
+    def __init__(self, cache: RefreshingCache, flight: SingleFlight):
+        self.cache = cache
+        self.flight = flight
+        self.tasks = set()
+        self.refreshed = 0
+        self.failed = 0
+
+    def maybe_refresh(self, key: Hashable, flight_key: str, load: Callable[[], Awaitable[Any]]):
+        if flight_key in self.flight or not self.cache.needs_refresh(key):
+            return
+
+        task = asyncio.create_task(self._refresh(flight_key, load))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _refresh(self, flight_key: str, load: Callable[[], Awaitable[Any]]):
+        try:
+            await self.flight.do(flight_key, load)
+            self.refreshed += 1
+        except Exception as exc:
+            # the entry is still served until it expires; the next hit retries
+            self.failed += 1
+            print(f"background refresh of {flight_key} failed: {exc!r}")
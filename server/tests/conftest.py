@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+# the server modules import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# keep tests off the vector store next to the server; tests open their own
+os.environ["VECTOR_STORE_PATH"] = ""
+
+
+class Clock:
+    """A settable clock for the timer/clock arguments: set .now to move time."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
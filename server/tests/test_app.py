@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+
+import app
+
+
+def no_db(*args):
+    raise AssertionError("local mode must not touch the database")
+
+
+@pytest.fixture
+def local_mode(monkeypatch):
+    monkeypatch.setattr(app, "EPHEMERIS_PROVIDER", "local")
+    monkeypatch.setattr(app, "EPHEMERIS_SOURCE", "local")
+    monkeypatch.setattr(app, "get_by_timestamp", no_db)
+    monkeypatch.setattr(app, "get_by_range", no_db)
+    monkeypatch.setattr(app.writer, "put", no_db)
+    app.cache.clear()
+    yield
+    app.cache.clear()
+
+
+def test_local_info_skips_the_database(local_mode):
+    data = asyncio.run(app.load_info("2026-01-06T00:00:00"))
+    assert data["timestamp"] == "2026-01-06T00:00:00"
+    assert app.cache["2026-01-06T00:00:00"] is data
+
+
+def test_local_calendar_skips_the_database(local_mode):
+    month = asyncio.run(app.load_calendar(2026, 2))
+    assert [day["timestamp"][:10] for day in month["days"]][::27] == ["2026-02-01", "2026-02-28"]
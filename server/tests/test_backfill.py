@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+import backfill
+from analytical import local_series
+
+
+@pytest.fixture
+def inserted(monkeypatch):
+    rows = []
+    monkeypatch.setattr(backfill, "insert_rows", rows.extend)
+    # the local series stands in for Horizons answers
+    monkeypatch.setattr(backfill, "get_horizons_series", local_series)
+    return rows
+
+
+def run(provider: str, checkpoint: str) -> int:
+    return backfill.backfill(
+        "2026-01-01T00:00:00", "2026-01-01T23:00:00", "1h",
+        provider, workers=2, rate=0, chunk_rows=10, checkpoint=checkpoint,
+    )
+
+
+def test_horizons_rows_are_written_and_checkpointed(inserted, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.json")
+    assert run("horizons", checkpoint) == 0
+
+    assert sorted(row["timestamp"] for row in inserted)[::23] == ["2026-01-01T00:00:00", "2026-01-01T23:00:00"]
+    assert len(inserted) == 24
+    with open(checkpoint) as f:
+        assert json.load(f)["done"] == [0, 1, 2]
+
+    # a rerun resumes: nothing left to do
+    assert run("horizons", checkpoint) == 0
+    assert len(inserted) == 24
+
+
+def test_local_rows_are_never_written(inserted, tmp_path):
+    checkpoint = tmp_path / "checkpoint.json"
+    assert run("local", str(checkpoint)) == 0
+    assert inserted == []
+    assert not checkpoint.exists()
@@ -0,0 +1,96 @@
+import threading
+from datetime import datetime
+
+import pytest
+
+import batcher
+from batcher import HorizonsBatcher
+from horizons_parser import HorizonsResponseError, HorizonsUnavailable
+
+
+class RecordingFetch:
+    """Answers every epoch but `missing`, recording each TLIST it was sent."""
+
+    def __init__(self, missing=()):
+        self.calls = []
+        self.missing = set(missing)
+        self.lock = threading.Lock()
+
+    def __call__(self, command, epochs, center):
+        epochs = list(epochs)
+        with self.lock:
+            self.calls.append((command, center, epochs))
+        return {dt: (dt.hour, dt.minute, 0.0) for dt in epochs if dt not in self.missing}
+
+
+def test_one_tlist_per_body_and_center():
+    fetch = RecordingFetch()
+    batch = HorizonsBatcher(fetch, window_ms=20)
+
+    futures = [
+        batch.submit("10", "2026-03-01T12:00:00"),
+        batch.submit("10", "2026-03-01T13:00:00"),
+        batch.submit("301", "2026-03-01T12:00:00"),
+        # the same epoch twice shares the row
+        batch.submit("10", "2026-03-01T12:00:00"),
+    ]
+
+    assert [f.result(timeout=5) for f in futures] == [(12, 0, 0.0), (13, 0, 0.0), (12, 0, 0.0), (12, 0, 0.0)]
+    assert sorted((command, center, len(epochs)) for command, center, epochs in fetch.calls) == [
+        ("10", "399", 2),
+        ("301", "399", 1),
+    ]
+    batch.shutdown()
+
+
+def test_long_lists_are_split(monkeypatch):
+    monkeypatch.setattr(batcher, "MAX_TLIST_SIZE", 2)
+    fetch = RecordingFetch()
+    batch = HorizonsBatcher(fetch, window_ms=20)
+
+    futures = [batch.submit("10", f"2026-03-01T{hour:02}:00:00") for hour in range(5)]
+
+    assert [f.result(timeout=5)[0] for f in futures] == [0, 1, 2, 3, 4]
+    assert sorted(len(epochs) for _, _, epochs in fetch.calls) == [1, 2, 2]
+    batch.shutdown()
+
+
+def test_missing_row_fails_only_its_callers():
+    fetch = RecordingFetch(missing={datetime(2026, 3, 1, 13)})
+    batch = HorizonsBatcher(fetch, window_ms=20)
+
+    ok = batch.submit("10", "2026-03-01T12:00:00")
+    missing = batch.submit("10", "2026-03-01T13:00:00")
+
+    assert ok.result(timeout=5) == (12, 0, 0.0)
+    with pytest.raises(HorizonsResponseError):
+        missing.result(timeout=5)
+    batch.shutdown()
+
+
+def test_failed_request_fails_every_caller():
+    def fetch(command, epochs, center):
+        raise HorizonsUnavailable()
+
+    batch = HorizonsBatcher(fetch, window_ms=20)
+    futures = [batch.submit("10", f"2026-03-01T{hour:02}:00:00") for hour in range(3)]
+
+    for future in futures:
+        with pytest.raises(HorizonsUnavailable):
+            future.result(timeout=5)
+    batch.shutdown()
+
+
+def test_shutdown_resolves_pending_and_later_submits():
+    fetch = RecordingFetch()
+    # a window that never closes by itself within the test
+    batch = HorizonsBatcher(fetch, window_ms=60_000)
+
+    pending = batch.submit("10", "2026-03-01T12:00:00")
+    batch.shutdown()
+    late = batch.submit("10", "2026-03-01T12:00:00")
+
+    for future in (pending, late):
+        with pytest.raises(HorizonsUnavailable):
+            future.result(timeout=1)
+    assert fetch.calls == []
@@ -0,0 +1,67 @@
+import pytest
+
+from breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from horizons_parser import HorizonsCircuitOpen
+
+
+def fail(breaker: CircuitBreaker, times: int):
+    for _ in range(times):
+        breaker.before_call()
+        breaker.after_call(False)
+
+
+def test_opens_after_threshold_failures_in_a_row(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30, clock=clock)
+
+    fail(breaker, 2)
+    breaker.before_call()
+    breaker.after_call(True)  # a success resets the count
+    fail(breaker, 2)
+    assert breaker.state == CLOSED
+
+    fail(breaker, 1)
+    assert breaker.state == OPEN
+    assert breaker.stats()["opened"] == 1
+
+
+def test_open_fails_fast_with_retry_after(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30, clock=clock)
+    fail(breaker, 1)
+
+    clock.now = 10.5
+    with pytest.raises(HorizonsCircuitOpen) as info:
+        breaker.before_call()
+    assert info.value.status_code == 503
+    assert info.value.headers == {"Retry-After": "20"}
+    assert breaker.rejected == 1
+
+
+def test_half_open_lets_one_trial_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30, clock=clock)
+    fail(breaker, 1)
+
+    clock.now = 30
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()
+    with pytest.raises(HorizonsCircuitOpen):
+        breaker.before_call()
+
+    breaker.after_call(True)
+    assert breaker.state == CLOSED
+    breaker.before_call()
+
+
+def test_failed_trial_opens_again(clock):
+    breaker = CircuitBreaker(failure_threshold=5, reset_seconds=30, clock=clock)
+    fail(breaker, 5)
+
+    clock.now = 31
+    fail(breaker, 1)  # one failed trial is enough, not another five
+    assert breaker.state == OPEN
+    assert breaker.opened == 2
+
+    # the reset period starts over from the failed trial
+    clock.now = 60
+    assert breaker.state == OPEN
+    clock.now = 61
+    assert breaker.state == HALF_OPEN
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from analytical import local_xyz_many
+from ephemeris import GRAHANAs, classified_snapshots, classify_arrays, classify_ephemeris, snapshot_differences
+from horizons import TIMESTAMP_FORMAT
+
+
+# 40 days of hourly samples from each start: every tithi and chandra rashi,
+# at least one surya rashi boundary, and both eclipses of each season
+# (2024-03-25 / 04-08, 2024-09-18 / 10-02, 2025-03-14 / 03-29)
+ECLIPSE_SEASONS = [datetime(2024, 3, 20), datetime(2024, 9, 15), datetime(2025, 3, 8)]
+HOURS = 40 * 24
+
+
+def classify_both(timestamps, surya, chandra):
+    surya_xyz = [tuple(v) for v in np.asarray(surya).tolist()]
+    chandra_xyz = [tuple(v) for v in np.asarray(chandra).tolist()]
+
+    scalar = [classify_ephemeris(ts, s, c) for ts, s, c in zip(timestamps, surya_xyz, chandra_xyz)]
+    batch = classified_snapshots(timestamps, surya_xyz, chandra_xyz)
+    return scalar, batch
+
+
+def assert_identical(scalar, batch):
+    assert len(batch) == len(scalar)
+    for a, b in zip(scalar, batch):
+        diff = snapshot_differences(a, b)
+        assert not diff, f"{a['timestamp']}: {', '.join(diff)} differ"
+
+
+@pytest.fixture(scope="module")
+def eclipse_seasons():
+    epochs = [start + timedelta(hours=i) for start in ECLIPSE_SEASONS for i in range(HOURS)]
+    timestamps = [dt.strftime(TIMESTAMP_FORMAT) for dt in epochs]
+    return timestamps, local_xyz_many("10", epochs), local_xyz_many("301", epochs)
+
+
+def test_eclipse_seasons_classify_identically(eclipse_seasons):
+    scalar, batch = classify_both(*eclipse_seasons)
+    assert_identical(scalar, batch)
+
+    # the samples reach what they are meant to cover
+    assert len({(s["paksha"], s["tithi"]) for s in scalar}) == 30
+    assert len({s["chandra_rashi"] for s in scalar}) == 12
+    assert {s["grahana"] for s in scalar} == set(GRAHANAs)
+
+
+def ecliptic(lon: float, lat: float, distance: float) -> tuple:
+    lon, lat = np.radians(lon), np.radians(lat)
+    return (
+        float(np.cos(lon) * np.cos(lat) * distance),
+        float(np.sin(lon) * np.cos(lat) * distance),
+        float(np.sin(lat) * distance),
+    )
+
+
+def test_boundaries_classify_identically():
+    # a hair either side of every tithi and rashi boundary, with the Moon on
+    # and off the ecliptic. Exactly on a boundary the two atan2s may round
+    # to different sides, the last-bit difference snapshot_differences allows for.
+    surya, chandra = [], []
+    for boundary in np.arange(0, 360, 6.0):
+        for nudge in (-1e-9, 1e-9):
+            for surya_lon in (0.0, 29.9999999, 90.0, 270.0):
+                for lat in (0.0, 0.4, 5.0):
+                    surya.append(ecliptic(surya_lon, 0.0, 1.5e8))
+                    chandra.append(ecliptic(surya_lon + boundary + nudge, lat, 3.8e5))
+    timestamps = [str(i) for i in range(len(surya))]
+
+    scalar, batch = classify_both(timestamps, surya, chandra)
+    assert_identical(scalar, batch)
+
+
+def test_longitude_rounding_to_360():
+    # atan2 a hair below 0 gives a longitude that % 360 rounds to 360.0;
+    # both paths must take that as Mesha and Pratipada, not the last index
+    below_zero = (3.8e5, -1e-12, 0.0)
+    scalar, batch = classify_both(
+        ["0", "1", "2"],
+        [(1.5e8, 0.0, 0.0), (1.5e8, -1e-12, 0.0), (1.5e8, -1e-12, 0.0)],
+        [below_zero, (3.8e5, 0.0, 0.0), below_zero],
+    )
+    assert_identical(scalar, batch)
+    assert {s["chandra_rashi"] for s in batch[::2]} == {"Mesha"}
+
+
+def test_arrays_match_scalar_indices(eclipse_seasons):
+    timestamps, surya, chandra = eclipse_seasons
+    classes = classify_arrays(surya, chandra)
+    scalar = classify_ephemeris(timestamps[0], tuple(surya[0]), tuple(chandra[0]))
+
+    assert GRAHANAs[classes["grahana"][0]] == scalar["grahana"]
+    assert classes["tithi"].dtype == np.int8
+    assert len(classes["tithi"]) == len(timestamps)
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+from analytical import get_local_xyz
+from db import COLUMNS, UPAVAAS_BITS, decode_row, encode_row
+from ephemeris import classify_ephemeris
+
+
+def classified(timestamp: str) -> dict:
+    return classify_ephemeris(timestamp, get_local_xyz("10", timestamp), get_local_xyz("301", timestamp))
+
+
+def round_trip(data: dict) -> dict:
+    return decode_row(dict(zip(COLUMNS, encode_row(data))))
+
+
+def test_round_trip_over_a_year():
+    # every 29 h over a year: each tithi, rashi, masa and ritu, and both eclipses of 2024-04
+    stamp = datetime(2024, 1, 1)
+    seen = set()
+    while stamp < datetime(2025, 1, 1):
+        data = classified(stamp.strftime("%Y-%m-%dT%H:%M:%S"))
+        assert round_trip(data) == data
+        seen.add((data["paksha"], data["tithi"]))
+        stamp += timedelta(hours=29)
+
+    assert len(seen) == 30
+    eclipse = classified("2024-04-08T18:17:00")
+    assert eclipse["grahana"] == "Surya"
+    assert round_trip(eclipse) == eclipse
+
+
+def test_upavaas_packs_into_bits():
+    data = classified("2024-04-08T18:17:00")
+    data["upavaas"] = [
+        {"name": name, "description": ""} for name in ("Ekadashi", "Makara Sankranti")
+    ]
+
+    row = dict(zip(COLUMNS, encode_row(data)))
+    assert row["upavaas"] == UPAVAAS_BITS["Ekadashi"] | UPAVAAS_BITS["Makara Sankranti"]
+    assert [u["name"] for u in decode_row(row)["upavaas"]] == ["Ekadashi", "Makara Sankranti"]
+
+
+def test_date_key_stands_in_for_timestamp():
+    data = classified("2024-04-08T00:00:00")
+    data["date"] = data.pop("timestamp")
+
+    assert encode_row(data)[0] == datetime(2024, 4, 8)
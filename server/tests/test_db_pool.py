@@ -0,0 +1,126 @@
+import threading
+import time
+
+import pymysql
+import pytest
+
+from db import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.open = True
+
+    def close(self):
+        self.open = False
+
+    def ping(self, reconnect=False):
+        if not self.open:
+            raise pymysql.err.OperationalError(2006, "MySQL server has gone away")
+
+
+def fake_connect(opened: list):
+    def connect():
+        conn = FakeConnection()
+        opened.append(conn)
+        return conn
+    return connect
+
+
+def test_reuses_released_connections():
+    opened = []
+    pool = ConnectionPool(fake_connect(opened), size=2)
+
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+
+    assert first is second
+    assert len(opened) == 1
+    assert pool.metrics()["checkouts"] == 2
+
+
+def test_times_out_when_every_connection_is_in_use():
+    pool = ConnectionPool(fake_connect([]), size=1, timeout=0.1)
+    held = pool.acquire()
+
+    started = time.monotonic()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    assert time.monotonic() - started >= 0.1
+
+    stats = pool.metrics()
+    assert (stats["timeouts"], stats["open"], stats["in_use"]) == (1, 1, 1)
+    pool.release(held)
+
+
+def test_discarded_connection_wakes_a_waiter():
+    opened = []
+    pool = ConnectionPool(fake_connect(opened), size=1, timeout=2.0)
+    holding = threading.Event()
+    waited = {}
+
+    def holder():
+        with pytest.raises(pymysql.err.OperationalError):
+            with pool.connection():
+                holding.set()
+                time.sleep(0.05)
+                raise pymysql.err.OperationalError(2013, "Lost connection to MySQL server during query")
+
+    def waiter():
+        holding.wait()
+        started = time.monotonic()
+        with pool.connection() as conn:
+            waited["seconds"] = time.monotonic() - started
+            waited["conn"] = conn
+
+    threads = [threading.Thread(target=holder), threading.Thread(target=waiter)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # the broken connection was replaced, well before the timeout
+    assert waited["seconds"] < 1.0
+    assert waited["conn"] is opened[1] and not opened[0].open
+    stats = pool.metrics()
+    assert (stats["discarded"], stats["timeouts"], stats["open"], stats["idle"]) == (1, 0, 1, 1)
+
+
+def test_failed_connect_frees_its_slot():
+    calls = []
+
+    def connect():
+        calls.append(1)
+        if len(calls) == 1:
+            raise pymysql.err.OperationalError(2003, "Can't connect")
+        return FakeConnection()
+
+    pool = ConnectionPool(connect, size=1, timeout=0.1)
+    with pytest.raises(pymysql.err.OperationalError):
+        pool.acquire()
+    assert pool.metrics()["open"] == 0
+    pool.release(pool.acquire())
+
+
+def test_non_connection_errors_keep_the_connection():
+    opened = []
+    pool = ConnectionPool(fake_connect(opened), size=1)
+
+    with pytest.raises(pymysql.err.OperationalError):
+        with pool.connection():
+            raise pymysql.err.OperationalError(1292, "Incorrect datetime value")
+
+    assert opened[0].open
+    assert pool.metrics()["idle"] == 1
+
+
+def test_closed_idle_connection_is_replaced():
+    opened = []
+    pool = ConnectionPool(fake_connect(opened), size=1, health_check=0)
+    pool.release(pool.acquire())
+    opened[0].close()
+
+    assert pool.acquire() is opened[1]
+    assert pool.metrics()["reconnects"] == 1
@@ -0,0 +1,43 @@
+from datetime import datetime
+
+import pytest
+
+from analytical import local_xyz_many
+from grahana import find_grahanas
+
+
+def analytical_source(dt: datetime):
+    return tuple(local_xyz_many("10", [dt])[0].tolist()), tuple(local_xyz_many("301", [dt])[0].tolist())
+
+
+@pytest.fixture(scope="module")
+def decade():
+    return find_grahanas(analytical_source, datetime(2020, 1, 1), datetime(2030, 1, 1))
+
+
+def test_finds_the_2024_eclipses(decade):
+    grahanas, _ = decade
+    found = [
+        (g["grahana"], g["type"], g["timestamp"][:10])
+        for g in grahanas
+        if g["timestamp"].startswith("2024")
+    ]
+    assert found == [
+        ("Chandra", "penumbral", "2024-03-25"),
+        ("Surya", "total", "2024-04-08"),
+        ("Chandra", "partial", "2024-09-18"),
+        ("Surya", "annular", "2024-10-02"),
+    ]
+
+
+def test_greatest_proximity_is_the_minimum(decade):
+    grahanas, _ = decade
+    eclipse = next(g for g in grahanas if g["timestamp"].startswith("2024-04-08"))
+    # 2024-04-08, greatest eclipse 18:17 UT
+    assert eclipse["timestamp"][:15] == "2024-04-08T18:1"
+
+
+def test_a_decade_takes_a_few_hundred_evaluations(decade):
+    grahanas, evaluations = decade
+    assert 40 <= len(grahanas) <= 55
+    assert evaluations < 450
@@ -0,0 +1,89 @@
+import pytest
+
+from horizons_parser import HorizonsParseError, HorizonsResponseError, parse_csv
+
+
+HEADER = """\
+*******************************************************************************
+Target body name: Moon (301)
+*******************************************************************************
+"""
+
+ROWS = """\
+2461041.500000000, A.D. 2026-Jan-01 00:00:00.0000, 1.0, 2.0, 3.0, 0.1, 0.2, 0.3,
+2461041.541666667, A.D. 2026-Jan-01 01:00:00.0000, 4.0, 5.0, 6.0, 0.4, 0.5, 0.6,
+"""
+
+
+def result(rows: str) -> str:
+    return f"{HEADER}$$SOE\n{rows}$$EOE\n*******\n"
+
+
+# $$SOE is on line 4, so the first row is line 5
+FIRST_ROW = 5
+
+
+def test_rows_and_columns():
+    table = parse_csv(result(ROWS))
+    assert len(table) == 2
+    assert table.values.tolist() == [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]
+
+    states = parse_csv(result(ROWS), vec_table="2")
+    assert states.values.shape == (2, 6)
+    assert states.values[1].tolist() == [4.0, 5.0, 6.0, 0.4, 0.5, 0.6]
+
+
+def test_epochs_round_to_the_second():
+    epochs = [epoch for epoch, _ in parse_csv(result(ROWS)).rows()]
+    assert [dt.isoformat() for dt in epochs] == ["2026-01-01T00:00:00", "2026-01-01T01:00:00"]
+
+
+def test_blank_lines_are_skipped():
+    assert len(parse_csv(result("\n" + ROWS + "\n"))) == 2
+
+
+def test_short_row_names_its_line_and_column_count():
+    rows = ROWS + "2461041.583333333, A.D. 2026-Jan-01 02:00:00.0000, 7.0, 8.0\n"
+    with pytest.raises(HorizonsParseError) as info:
+        parse_csv(result(rows))
+    assert info.value.line == FIRST_ROW + 2
+    assert info.value.reason == "expected 5 columns, got 4"
+    assert info.value.status_code == 502
+
+
+def test_velocities_need_more_columns():
+    rows = "2461041.500000000, A.D. 2026-Jan-01 00:00:00.0000, 1.0, 2.0, 3.0,\n"
+    parse_csv(result(rows))
+    with pytest.raises(HorizonsParseError) as info:
+        parse_csv(result(rows), vec_table="2")
+    # the trailing comma counts as an empty sixth field
+    assert info.value.reason == "expected 8 columns, got 6"
+    assert info.value.line == FIRST_ROW
+
+
+def test_non_numeric_value_names_its_line():
+    rows = ROWS.replace("5.0", "n.a.")
+    with pytest.raises(HorizonsParseError) as info:
+        parse_csv(result(rows))
+    assert (info.value.reason, info.value.line) == ("non-numeric value", FIRST_ROW + 1)
+    assert f"(line {FIRST_ROW + 1})" in info.value.detail
+
+
+def test_missing_eoe():
+    with pytest.raises(HorizonsParseError) as info:
+        parse_csv(f"{HEADER}$$SOE\n{ROWS}")
+    assert (info.value.reason, info.value.line) == ("missing $$EOE", FIRST_ROW - 1)
+
+
+def test_empty_block():
+    with pytest.raises(HorizonsParseError) as info:
+        parse_csv(result(""))
+    assert info.value.reason == "no rows between $$SOE and $$EOE"
+
+
+def test_refusal_carries_the_horizons_message():
+    text = "\n*****\nNo ephemeris for target \"Foo\" prior to A.D. 1900-JAN-01\n"
+    with pytest.raises(HorizonsResponseError) as info:
+        parse_csv(text)
+    assert not isinstance(info.value, HorizonsParseError)
+    assert "No ephemeris for target" in info.value.detail
@@ -0,0 +1,109 @@
+import asyncio
+import re
+
+import pytest
+
+import metrics
+from metrics import Counter, Gauge, Histogram, Collected, InFlightMiddleware, Registry
+
+
+SAMPLE_LINE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_]+="([^"\\]|\\.)*",?)*\})? (-?[0-9.e+-]+|\+Inf|NaN)$')
+
+
+def render(*metric_list) -> list:
+    registry = Registry()
+    for metric in metric_list:
+        registry.register(metric)
+    return registry.render().splitlines()
+
+
+def test_counter_and_gauge_exposition():
+    hits = Counter("hits_total", "Hits by route", ("route",))
+    hits.inc("/info")
+    hits.inc("/info", amount=2)
+    hits.inc('/odd"\nroute')
+    depth = Gauge("depth", "Queue depth")
+    depth.set(value=5)
+    depth.dec()
+
+    assert render(hits, depth) == [
+        "# HELP hits_total Hits by route",
+        "# TYPE hits_total counter",
+        'hits_total{route="/info"} 3',
+        'hits_total{route="/odd\\"\\nroute"} 1',
+        "# HELP depth Queue depth",
+        "# TYPE depth gauge",
+        "depth 4",
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    latency = Histogram("latency_seconds", "Latency", ("upstream",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, "horizons")
+
+    assert render(latency)[2:] == [
+        'latency_seconds_bucket{upstream="horizons",le="0.1"} 2',
+        'latency_seconds_bucket{upstream="horizons",le="1"} 3',
+        'latency_seconds_bucket{upstream="horizons",le="+Inf"} 4',
+        'latency_seconds_sum{upstream="horizons"} 3.65',
+        'latency_seconds_count{upstream="horizons"} 4',
+    ]
+
+
+def test_timer_observes_even_when_the_block_raises():
+    latency = Histogram("db_seconds", "DB time", buckets=(1.0,))
+    with pytest.raises(RuntimeError):
+        with latency.time():
+            raise RuntimeError()
+
+    assert "db_seconds_count 1" in render(latency)
+
+
+def test_broken_collector_does_not_break_the_scrape():
+    def broken():
+        raise OSError("gone")
+
+    up = Gauge("up", "Always 1")
+    up.set(value=1)
+    lines = render(Collected("broken", "Fails", "gauge", (), broken), up)
+
+    assert lines[0].startswith("# broken unavailable: OSError")
+    assert lines[-1] == "up 1"
+
+
+def test_registering_a_name_twice_fails():
+    registry = Registry()
+    registry.register(Counter("twice_total", "Once"))
+    with pytest.raises(ValueError):
+        registry.register(Counter("twice_total", "Twice"))
+
+
+def test_in_flight_and_status_counts():
+    seen_in_flight = []
+
+    async def endpoint(scope, receive, send):
+        seen_in_flight.append(metrics.HTTP_IN_FLIGHT.value())
+        await send({"type": "http.response.start", "status": 404, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    before = metrics.HTTP_REQUESTS.value("404")
+    asyncio.run(InFlightMiddleware(endpoint)({"type": "http"}, None, send))
+
+    assert seen_in_flight == [metrics.HTTP_IN_FLIGHT.value() + 1]
+    assert metrics.HTTP_REQUESTS.value("404") == before + 1
+
+
+def test_app_registry_renders_valid_exposition():
+    import app  # registers the app's own metrics and collectors
+
+    lines = metrics.REGISTRY.render().splitlines()
+    assert not [line for line in lines if line.split()[2:3] == ["unavailable:"]]
+
+    helped = {line.split()[2] for line in lines if line.startswith("# HELP")}
+    assert {"http_requests_total", "cache_events_total", "cache_entries"} <= helped
+    for line in lines:
+        assert line.startswith("# ") or SAMPLE_LINE.match(line), line
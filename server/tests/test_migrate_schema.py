@@ -0,0 +1,148 @@
+import json
+import re
+from datetime import datetime, timedelta
+
+import pytest
+
+import migrate_schema
+from db import ConnectionPool
+from ephemeris import classify_ephemeris
+
+
+def offset(zone: str) -> timedelta:
+    sign, hours, minutes = re.fullmatch(r"([+-])(\d\d):(\d\d)", zone).groups()
+    delta = timedelta(hours=int(hours), minutes=int(minutes))
+    return delta if sign == "+" else -delta
+
+
+class FakeMySQL:
+    """
+    Just enough of MySQL for migrate_schema: the legacy table's utc_stamp is
+    a TIMESTAMP, stored as an instant and converted through the session zone
+    on the way in and out, the way MySQL does it.
+    """
+
+    def __init__(self, global_zone: str):
+        self.global_zone = global_zone
+        self.instants = {}          # stored UTC instant -> legacy row
+        self.stamp_type = "timestamp"
+        self.copied = []
+
+    def write_legacy(self, session_zone: str, row: dict):
+        self.instants[row["utc_stamp"] - offset(session_zone)] = row
+
+    def connect(self):
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, server: FakeMySQL):
+        self.server = server
+        self.zone = server.global_zone
+        self.open = True
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.open = False
+
+
+class FakeCursor:
+    def __init__(self, conn: FakeConnection):
+        self.conn = conn
+        self.server = conn.server
+        self.result = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def local(self, instant: datetime) -> datetime:
+        return instant + offset(self.conn.zone)
+
+    def execute(self, sql, args=()):
+        self.result = []
+        if sql == "SET time_zone = @@global.time_zone":
+            self.conn.zone = self.server.global_zone
+        elif sql == "SET time_zone = %s":
+            self.conn.zone = args[0]
+        elif sql.startswith("SELECT @@session.time_zone"):
+            self.result = [{"zone": self.conn.zone}]
+        elif "information_schema" in sql:
+            self.result = [{"DATA_TYPE": self.server.stamp_type}]
+        elif sql.startswith("ALTER TABLE"):
+            # TIMESTAMP -> DATETIME keeps the value as the session renders it
+            self.server.widened = sorted(self.local(instant) for instant in self.server.instants)
+            self.server.stamp_type = "datetime"
+        elif sql.startswith("SELECT * FROM"):
+            rows = [
+                {**row, "utc_stamp": self.local(instant)}
+                for instant, row in sorted(self.server.instants.items())
+            ]
+            if "WHERE" in sql:
+                rows = [row for row in rows if row["utc_stamp"] > args[0]]
+            self.result = rows[:args[-1]]
+        elif not sql.startswith("CREATE TABLE"):
+            raise AssertionError(f"unexpected statement: {sql}")
+
+    def executemany(self, sql, rows):
+        assert sql.startswith(f"INSERT INTO {migrate_schema.TARGET_TABLE}")
+        self.server.copied.extend(rows)
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+
+def legacy_row(stamp: datetime) -> dict:
+    data = classify_ephemeris(stamp.isoformat(), (1.5e8, 0.0, 0.0), (0.0, 3.8e5, 0.0))
+    return {
+        **data,
+        "utc_stamp": stamp,
+        "surya_xyz": json.dumps(data["surya_xyz"]),
+        "chandra_xyz": json.dumps(data["chandra_xyz"]),
+        "upavaas": json.dumps(data["upavaas"]),
+    }
+
+
+STAMPS = [datetime(2026, 1, 1, hour) for hour in (0, 6, 23)]
+
+
+@pytest.fixture
+def server(monkeypatch):
+    # the old app's sessions ran in the server's default zone, not UTC
+    server = FakeMySQL(global_zone="+05:30")
+    for stamp in STAMPS:
+        server.write_legacy("+05:30", legacy_row(stamp))
+    monkeypatch.setattr(migrate_schema, "pool", ConnectionPool(server.connect, size=1))
+    return server
+
+
+def test_copy_keeps_the_written_values(server):
+    migrate_schema.migrate(batch_size=2, swap=False)
+    assert [row[0] for row in server.copied] == STAMPS
+
+
+def test_widen_keeps_the_written_values(server):
+    migrate_schema.widen_stamp()
+    assert server.widened == STAMPS
+
+
+def test_explicit_zone(server):
+    # rows written from UTC sessions on this server read back 5:30 later
+    # unless the zone they were written in is given
+    server.instants = {}
+    for stamp in STAMPS:
+        server.write_legacy("+00:00", legacy_row(stamp))
+
+    migrate_schema.migrate(batch_size=10, swap=False)
+    assert [row[0] for row in server.copied] == [stamp + timedelta(hours=5, minutes=30) for stamp in STAMPS]
+
+    server.copied = []
+    migrate_schema.migrate(batch_size=10, swap=False, zone="+00:00")
+    assert [row[0] for row in server.copied] == STAMPS
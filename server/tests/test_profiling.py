@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+import pytest
+
+import profiling
+from profiling import ProfilerMiddleware
+
+
+def busy_for(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+async def slow_endpoint(scope, receive, send):
+    busy_for(0.05)
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def call(headers):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "path": "/info", "headers": headers}
+    asyncio.run(ProfilerMiddleware(slow_endpoint)(scope, None, send))
+    return dict(sent[0]["headers"]), sent[1]["body"]
+
+
+@pytest.fixture
+def profiler(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "s3cret")
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 0)
+    monkeypatch.setattr(profiling, "PROFILE_INTERVAL_MS", 1)
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_token_profiles_the_request(profiler):
+    headers, body = call([(b"x-profile", b"s3cret")])
+
+    assert body == b"ok"
+    name = headers[b"x-profile"].decode()
+    assert name.endswith("-info.folded")
+
+    lines = (profiler / name).read_text().splitlines()
+    assert lines
+    _, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any("busy_for (test_profiling.py:" in line for line in lines)
+    # the lock is free again for the next request
+    assert not profiling._active.locked()
+
+
+def test_without_the_token_nothing_is_profiled(profiler):
+    for headers in ([], [(b"x-profile", b"wrong")]):
+        response_headers, body = call(headers)
+        assert b"x-profile" not in response_headers
+    assert list(profiler.iterdir()) == []
+
+
+def test_sample_rate_profiles_without_a_header(profiler, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "")
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 1.0)
+
+    headers, _ = call([])
+    assert (profiler / headers[b"x-profile"].decode()).exists()
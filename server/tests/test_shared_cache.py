@@ -0,0 +1,63 @@
+import asyncio
+
+from shared_cache import SharedCache
+from swr import RefreshingCache
+
+
+class FakeRedis:
+    """The get / set / incr SharedCache uses, in memory, values as bytes."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+
+def test_invalidate_then_read(clock):
+    store = FakeRedis()
+    l1 = RefreshingCache(maxsize=4, ttl=60, timer=clock)
+    worker = SharedCache(store, (l1,))
+    other = SharedCache(store, ())
+
+    async def scenario():
+        await worker.check_generation()
+        await worker.set("info_1", b"old")
+
+        l1["expired"] = "old"
+        clock.now = 61
+        l1["live"] = "old"
+        assert l1.stale("expired") == "old"
+
+        await other.check_generation()
+        await other.invalidate()
+        await worker.check_generation()
+
+        assert await worker.get("info_1") is None
+        assert l1.get("live") is None
+        assert l1.stale("live") is None and l1.stale("expired") is None
+
+    asyncio.run(scenario())
+    assert worker.l1_clears == 1
+    assert l1.evictions == 0
+    assert l1.expirations == 1  # the entry that expired on its own
+
+
+def test_clear_counts_nothing(clock):
+    cache = RefreshingCache(maxsize=4, ttl=60, refresh_ahead=10, timer=clock)
+    cache["a"] = 1
+    cache["b"] = 2
+    cache.clear()
+
+    assert len(cache) == 0
+    assert (cache.evictions, cache.expirations) == (0, 0)
+    assert not cache.needs_refresh("a")
+    cache["a"] = 3
+    assert cache["a"] == 3
@@ -0,0 +1,90 @@
+import asyncio
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_computation():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return {"answer": 42}
+
+        callers = [asyncio.ensure_future(flight.do("info_x", compute)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert "info_x" in flight and len(flight) == 1
+
+        release.set()
+        results = await asyncio.gather(*callers)
+        return calls, results, len(flight)
+
+    calls, results, inflight = asyncio.run(scenario())
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+    # done work is forgotten: the next miss computes afresh
+    assert inflight == 0
+
+
+def test_error_reaches_every_waiter_and_is_not_kept():
+    async def scenario():
+        flight = SingleFlight()
+        attempts = 0
+
+        async def compute():
+            nonlocal attempts
+            attempts += 1
+            await asyncio.sleep(0)
+            if attempts == 1:
+                raise RuntimeError("upstream down")
+            return "ok"
+
+        first = await asyncio.gather(
+            flight.do("k", compute), flight.do("k", compute), return_exceptions=True,
+        )
+        second = await flight.do("k", compute)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert [type(e) for e in first] == [RuntimeError, RuntimeError]
+    assert second == "ok"
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def compute():
+            await release.wait()
+            return "done"
+
+        leaver = asyncio.ensure_future(flight.do("k", compute))
+        stayer = asyncio.ensure_future(flight.do("k", compute))
+        await asyncio.sleep(0)
+
+        leaver.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return await stayer, leaver.cancelled()
+
+    assert asyncio.run(scenario()) == ("done", True)
+
+
+def test_keys_are_independent():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def compute(value):
+            await asyncio.sleep(0)
+            return value
+
+        return await asyncio.gather(
+            flight.do("a", lambda: compute("a")), flight.do("b", lambda: compute("b")),
+        )
+
+    assert asyncio.run(scenario()) == ["a", "b"]
@@ -0,0 +1,109 @@
+import asyncio
+
+from singleflight import SingleFlight
+from swr import RefreshingCache, Revalidator
+
+
+def test_needs_refresh_inside_the_refresh_window(clock):
+    cache = RefreshingCache(maxsize=4, ttl=60, refresh_ahead=10, timer=clock)
+    cache["a"] = 1
+
+    clock.now = 49
+    assert not cache.needs_refresh("a")
+    clock.now = 50
+    assert cache.needs_refresh("a")
+    assert not cache.needs_refresh("missing")
+
+    cache["a"] = 2  # a reload starts the window over
+    assert not cache.needs_refresh("a")
+
+
+def test_no_refresh_ahead_never_refreshes(clock):
+    cache = RefreshingCache(maxsize=4, ttl=60, timer=clock)
+    cache["a"] = 1
+    clock.now = 59
+    assert not cache.needs_refresh("a")
+
+
+def test_expired_entries_stay_available_as_stale(clock):
+    cache = RefreshingCache(maxsize=4, ttl=60, timer=clock)
+    cache["a"] = 1
+
+    clock.now = 61
+    assert cache.get("a") is None
+    assert cache.stale("a") == 1
+    assert cache.expirations == 1
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    cache["a"] = 2
+    assert cache.stale("a") == 2
+    assert "a" not in cache.stale_copies
+
+
+def test_stale_copies_are_bounded(clock):
+    cache = RefreshingCache(maxsize=4, ttl=60, stale_maxsize=1, timer=clock)
+    cache["a"] = 1
+    cache["b"] = 2
+
+    clock.now = 61
+    cache.expire()
+    assert len(cache.stale_copies) == 1
+    assert [cache.stale(key) is not None for key in "ab"].count(True) == 1
+
+
+def test_evictions_are_not_expirations(clock):
+    cache = RefreshingCache(maxsize=2, ttl=60, timer=clock)
+    for key in "abc":
+        cache[key] = key
+    assert (cache.evictions, cache.expirations) == (1, 0)
+
+
+def test_revalidator_reloads_in_the_background(clock):
+    cache = RefreshingCache(maxsize=4, ttl=60, refresh_ahead=10, timer=clock)
+    flight = SingleFlight()
+    revalidator = Revalidator(cache, flight)
+    loads = []
+
+    async def load():
+        loads.append(clock.now)
+        await asyncio.sleep(0)
+        cache["a"] = len(loads)
+        return cache["a"]
+
+    async def scenario():
+        cache["a"] = 0
+        revalidator.maybe_refresh("a", "load:a", load)  # still fresh
+        assert not revalidator.tasks
+
+        clock.now = 55
+        revalidator.maybe_refresh("a", "load:a", load)
+        await asyncio.sleep(0)
+        revalidator.maybe_refresh("a", "load:a", load)  # already reloading
+        assert len(revalidator.tasks) == 1
+        # a request-path miss meanwhile joins the same flight
+        assert await flight.do("load:a", load) == 1
+        await asyncio.gather(*revalidator.tasks)
+
+    asyncio.run(scenario())
+    assert loads == [55]
+    assert cache["a"] == 1
+    assert (revalidator.refreshed, revalidator.failed) == (1, 0)
+
+
+def test_failed_refresh_keeps_serving(clock, capsys):
+    cache = RefreshingCache(maxsize=4, ttl=60, refresh_ahead=10, timer=clock)
+    revalidator = Revalidator(cache, SingleFlight())
+
+    async def load():
+        raise ConnectionError("upstream down")
+
+    async def scenario():
+        cache["a"] = 0
+        clock.now = 55
+        revalidator.maybe_refresh("a", "load:a", load)
+        await asyncio.gather(*revalidator.tasks)
+
+    asyncio.run(scenario())
+    assert cache["a"] == 0
+    assert (revalidator.refreshed, revalidator.failed) == (0, 1)
+    assert "background refresh of load:a failed" in capsys.readouterr().out
@@ -0,0 +1,50 @@
+import math
+from datetime import datetime, timedelta
+
+from transitions import find_transitions
+
+
+START = datetime(2026, 3, 1)
+SURYA_LON = 10.0
+# the Moon gains exactly one tithi a day on a Sun that stands still
+CHANDRA_DEG_PER_DAY = 12.0
+
+
+def xyz(lon: float):
+    return (math.cos(math.radians(lon)), math.sin(math.radians(lon)), 0.0)
+
+
+def linear_source(chandra_lon_at_start: float):
+    def source(dt: datetime):
+        days = (dt - START) / timedelta(days=1)
+        return xyz(SURYA_LON), xyz(chandra_lon_at_start + CHANDRA_DEG_PER_DAY * days)
+
+    return source
+
+
+def stamp(timestamp: str) -> datetime:
+    return datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S")
+
+
+def assert_near(timestamp: str, expected: datetime):
+    assert abs(stamp(timestamp) - expected) <= timedelta(seconds=2), (timestamp, expected)
+
+
+def test_finds_each_boundary_to_the_second():
+    # elongation 6 deg at START: tithi changes at noon, chandra rashi at Moon 30 deg
+    found = find_transitions(linear_source(16.0), START, START + timedelta(days=2))
+
+    assert [(tr["event"], tr["previous"], tr["current"]) for tr in found] == [
+        ("tithi", "Pratipada", "Dwitiya"),
+        ("chandra_rashi", "Mesha", "Vrishabha"),
+        ("tithi", "Dwitiya", "Tritiya"),
+    ]
+    assert_near(found[0]["timestamp"], START + timedelta(hours=12))
+    assert_near(found[1]["timestamp"], START + timedelta(hours=28))
+    assert_near(found[2]["timestamp"], START + timedelta(hours=36))
+
+
+def test_quiet_range_has_no_transitions():
+    found = find_transitions(linear_source(16.0), START, START + timedelta(hours=6))
+    assert found == []
+
@@ -0,0 +1,61 @@
+import asyncio
+import math
+from datetime import datetime, timedelta
+
+from transitions import next_occurrences
+from type_info import MASAs, TITHIs, UPAVAASs
+from upavaas import lunar_match, matching_rules, rule_position, upavaas_at
+
+
+def brute_force(tithi_index: int, masa_index: int, surya_lon: float):
+    return tuple(
+        position for position, rule in enumerate(UPAVAASs)
+        if lunar_match(rule, tithi_index, masa_index)
+        and (not rule.surya_lon or rule.surya_lon[0] <= surya_lon < rule.surya_lon[1])
+    )
+
+
+def test_index_agrees_with_checking_every_rule():
+    for t in range(len(TITHIs)):
+        for m in range(len(MASAs)):
+            for surya_lon in (0.0, 269.9, 270.0, 285.0, 299.9, 300.0):
+                assert matching_rules(t, m, surya_lon) == brute_force(t, m, surya_lon), (t, m, surya_lon)
+
+
+def test_upavaas_at_names_the_rules():
+    # shukla ekadashi is TITHIs[10]; the Sun at 280 deg is in Makara, masa 9
+    assert [u["name"] for u in upavaas_at(10, 0, 10.0)] == ["Ekadashi"]
+    assert [u["name"] for u in upavaas_at(10, 9, 280.0)] == ["Ekadashi", "Makara Sankranti"]
+
+    assert UPAVAASs[rule_position(" makara SANKRANTI ")].name == "Makara Sankranti"
+    assert rule_position("no such fast") is None
+
+
+START = datetime(2026, 3, 1)
+SURYA_LON = 10.0
+
+
+def xyz(lon: float):
+    return (math.cos(math.radians(lon)), math.sin(math.radians(lon)), 0.0)
+
+
+def one_tithi_a_day(dt: datetime):
+    # a Sun that stands still and a Moon starting in conjunction with it
+    days = (dt - START) / timedelta(days=1)
+    return xyz(SURYA_LON), xyz(SURYA_LON + 12.0 * days)
+
+
+def test_next_occurrences_spans_the_rule():
+    async def make_source(start, stop):
+        return one_tithi_a_day
+
+    # Ekadashi is tithi 11 of either paksha: elongation 120-132 and 300-312 deg
+    occurrences = asyncio.run(next_occurrences(
+        make_source, rule_position(" ekadashi "), START, count=2, horizon=timedelta(days=60),
+    ))
+
+    assert len(occurrences) == 2
+    for occurrence, first_day in zip(occurrences, (10, 25)):
+        for key, expected in (("start", first_day), ("end", first_day + 1)):
+            found = datetime.strptime(occurrence[key], "%Y-%m-%dT%H:%M:%S")
+            assert abs(found - (START + timedelta(days=expected))) <= timedelta(seconds=2)
@@ -0,0 +1,119 @@
+import asyncio
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+import horizons
+from vector_store import HEADER, RECORD, VectorStore, VectorStoreError
+
+
+T0 = datetime(2026, 1, 1)
+
+
+def rows(n: int, start: int = 0, velocity: bool = False):
+    return [
+        (T0 + timedelta(hours=i), (i, i + 0.5, -i) + ((0.1, 0.2, 0.3) if velocity else ()))
+        for i in range(start, start + n)
+    ]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "vectors.bin")
+
+
+def test_round_trip(path):
+    store = VectorStore(path)
+    store.put("301", "399", rows(3))
+
+    assert len(store) == 3
+    assert store.get("301", "399", T0 + timedelta(hours=2)) == (2.0, 2.5, -2.0)
+    assert store.get_many("301", "399", [T0, T0 + timedelta(hours=1)]) == [(0.0, 0.5, 0.0), (1.0, 1.5, -1.0)]
+    # every row or nothing
+    assert store.get_many("301", "399", [T0, T0 + timedelta(hours=9)]) is None
+    assert store.get("10", "399", T0) is None
+
+
+def test_off_step_instants_are_not_stored(path):
+    store = VectorStore(path, step_seconds=60)
+    store.put("301", "399", [(T0 + timedelta(seconds=30), (1.0, 2.0, 3.0))])
+    assert len(store) == 0
+    assert store.get("301", "399", T0 + timedelta(seconds=30)) is None
+
+
+def test_velocities_replace_a_position_only_row(path):
+    store = VectorStore(path)
+    store.put("301", "399", rows(1))
+    assert store.get("301", "399", T0, velocity=True) is None
+
+    store.put("301", "399", rows(1, velocity=True))
+    assert store.get("301", "399", T0, velocity=True) == (0.0, 0.5, 0.0, 0.1, 0.2, 0.3)
+
+    # a stored state is not appended again
+    store.put("301", "399", rows(1))
+    store.put("301", "399", rows(1, velocity=True))
+    assert len(store) == 2
+
+
+def test_other_writers_appends_are_seen(path):
+    reader = VectorStore(path)
+    assert reader.get("301", "399", T0) is None
+
+    VectorStore(path).put("301", "399", rows(2))
+    assert reader.get("301", "399", T0 + timedelta(hours=1)) == (1.0, 1.5, -1.0)
+
+
+def test_reopen_after_partial_append(path):
+    VectorStore(path).put("301", "399", rows(2))
+
+    # a writer killed halfway through its third record
+    with open(path, "ab") as f:
+        f.write(b"\x01" * (RECORD.itemsize // 2))
+
+    store = VectorStore(path)
+    assert store.get_many("301", "399", [T0, T0 + timedelta(hours=1)]) == [(0.0, 0.5, 0.0), (1.0, 1.5, -1.0)]
+    assert len(store) == 2
+
+    # the next append drops the partial record before writing whole ones
+    store.put("301", "399", rows(1, start=2))
+    assert os.path.getsize(path) == HEADER.size + 3 * RECORD.itemsize
+    assert VectorStore(path).get("301", "399", T0 + timedelta(hours=2)) == (2.0, 2.5, -2.0)
+
+
+def test_stops_appending_at_max_records(path, capsys):
+    store = VectorStore(path, max_records=3)
+    store.put("301", "399", rows(2))
+    store.put("301", "399", rows(2, start=2))
+
+    assert store.full
+    assert len(store) == 3
+    assert store.get("301", "399", T0 + timedelta(hours=3)) is None
+    assert "no longer appending" in capsys.readouterr().out
+
+    store.put("301", "399", rows(1, start=4))
+    assert os.path.getsize(path) == HEADER.size + 3 * RECORD.itemsize
+
+
+def test_rejects_a_different_step(path):
+    VectorStore(path, step_seconds=1)
+    with pytest.raises(VectorStoreError, match="60s"):
+        VectorStore(path, step_seconds=60)
+
+
+def test_rejects_a_foreign_file(path):
+    with open(path, "wb") as f:
+        f.write(b"not a vector store".ljust(HEADER.size, b"\0"))
+    with pytest.raises(VectorStoreError, match="not a version"):
+        VectorStore(path)
+
+
+def test_async_store_access_runs_off_the_loop(monkeypatch, path):
+    monkeypatch.setattr(horizons, "VECTOR_STORE_PATH", path)
+
+    async def caller():
+        return threading.get_ident(), await horizons.off_loop(threading.get_ident)
+
+    loop_thread, store_thread = asyncio.run(caller())
+    assert store_thread != loop_thread
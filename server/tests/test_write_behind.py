@@ -0,0 +1,125 @@
+import threading
+import time
+
+from db import PoolTimeout
+from write_behind import WriteBehind
+
+
+def rows(n, start=0):
+    return [{"timestamp": f"row-{i}"} for i in range(start, start + n)]
+
+
+class RecordingWrite:
+    """Keeps every batch it accepts; raises whatever `fail` returns for a batch."""
+
+    def __init__(self, fail=lambda batch: None):
+        self.batches = []
+        self.fail = fail
+
+    def __call__(self, batch):
+        exc = self.fail(batch)
+        if exc is not None:
+            raise exc
+        self.batches.append([row["timestamp"] for row in batch])
+
+    def written(self):
+        return sorted(ts for batch in self.batches for ts in batch)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_shutdown_flushes_everything_queued_in_batches():
+    write = RecordingWrite()
+    writer = WriteBehind(write, batch_size=3, flush_interval=60)
+    for row in rows(7):
+        writer.put(row)
+
+    writer.start()
+    writer.shutdown()
+
+    assert write.written() == sorted(f"row-{i}" for i in range(7))
+    assert max(len(batch) for batch in write.batches) == 3
+    assert writer.stats["written"] == 7
+    assert writer.pending() == 0
+
+
+def test_partial_batch_is_flushed_after_the_interval():
+    write = RecordingWrite()
+    writer = WriteBehind(write, batch_size=100, flush_interval=0.05)
+    writer.start()
+
+    writer.put(rows(1)[0])
+    wait_for(lambda: write.batches)
+
+    assert write.batches == [["row-0"]]
+    writer.shutdown()
+
+
+def test_rows_beyond_max_pending_are_dropped():
+    writer = WriteBehind(RecordingWrite(), max_pending=2)
+    for row in rows(3):
+        writer.put(row)
+
+    assert writer.stats["queued"] == 2
+    assert writer.stats["dropped"] == 1
+
+
+def test_transient_failure_is_retried():
+    attempts = []
+
+    def fail(batch):
+        attempts.append(len(batch))
+        return PoolTimeout() if len(attempts) == 1 else None
+
+    write = RecordingWrite(fail)
+    writer = WriteBehind(write, backoff=0)
+    for row in rows(2):
+        writer.put(row)
+    writer.start()
+    writer.shutdown()
+
+    assert write.written() == ["row-0", "row-1"]
+    assert writer.stats["retries"] == 1
+    assert writer.stats["failed"] == 0
+
+
+def test_rejected_batch_is_split_down_to_the_bad_row():
+    write = RecordingWrite(lambda batch: ValueError("bad row") if any(r["timestamp"] == "row-2" for r in batch) else None)
+    writer = WriteBehind(write, batch_size=8, backoff=0)
+    for row in rows(8):
+        writer.put(row)
+    writer.start()
+    writer.shutdown()
+
+    assert write.written() == sorted(f"row-{i}" for i in range(8) if i != 2)
+    assert writer.stats["failed"] == 1
+    assert writer.stats["retries"] == 0
+
+
+def test_shutdown_does_not_hang_on_a_full_queue():
+    release = threading.Event()
+    write = RecordingWrite(lambda batch: release.wait(5) and None)
+    writer = WriteBehind(write, batch_size=1, flush_interval=0, max_pending=2)
+    writer.start()
+
+    # the thread is stuck writing the first row, the queue fills up behind it
+    writer.put(rows(1)[0])
+    wait_for(lambda: writer.pending() == 0)
+    for row in rows(2, start=1):
+        writer.put(row)
+    thread = writer._thread
+
+    started = time.monotonic()
+    writer.shutdown(timeout=0.2)
+    assert time.monotonic() - started < 2
+
+    # once the write comes back the thread still drains the queue and stops
+    release.set()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert write.written() == ["row-0", "row-1", "row-2"]
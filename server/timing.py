@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+
+# Where one request spent its time, sent back in a Server-Timing header
+# (shown per request in the browser's network panel). Code on the request
+# path wraps its phases in timing.phase(name); the timings are kept in a
+# context variable, so tasks and run_in_threadpool calls started by the
+# request add to the same header, while background work (the now window,
+# the write-behind queue, the TLIST batcher's thread) records nothing.
+# Phases may nest: classify includes upavaas, horizons includes parse.
+
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1") == "1"
+
+_current: ContextVar[Optional["Timings"]] = ContextVar("timings", default=None)
+
+
+class Timings:
+    """Per phase name, in first-seen order: total seconds and how many times it ran."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, List] = {}
+        # a phase can end on a threadpool thread while the loop records another
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            entry = self.phases.get(name)
+            if entry is None:
+                self.phases[name] = [seconds, 1]
+            else:
+                entry[0] += seconds
+                entry[1] += 1
+
+    def header(self) -> str:
+        with self._lock:
+            phases = [(name, seconds, count) for name, (seconds, count) in self.phases.items()]
+
+        parts = []
+        for name, seconds, count in phases:
+            part = f"{name};dur={seconds * 1e3:.3f}"
+            if count > 1:
+                part += f';desc="{count}x"'
+            parts.append(part)
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1e3:.3f}")
+        return ", ".join(parts)
+
+
+def current() -> Optional[Timings]:
+    return _current.get()
+
+
+def record(name: str, seconds: float):
+    """For callers that already measured the phase themselves."""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def phase(name: str):
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+class ServerTimingMiddleware:
+    """Plain ASGI middleware: collects the request's phases and adds the header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not SERVER_TIMING:
+            return await self.app(scope, receive, send)
+
+        timings = Timings()
+
+        async def send_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.header().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _current.set(timings)
+        try:
+            await self.app(scope, receive, send_timing)
+        finally:
+            _current.reset(token)
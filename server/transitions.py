@@ -0,0 +1,186 @@
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from ephemeris import cartesian_to_longitude
+from horizons import Vector, TIMESTAMP_FORMAT
+from type_info import TITHIs, MASAs, RASHIs
+from upavaas import matching_rules
+
+
+# (surya_xyz, chandra_xyz) at an instant; must be cheap, it is called a lot
+VectorSource = Callable[[datetime], Tuple[Vector, Vector]]
+
+# The fastest boundary is tithi (12 deg of elongation, never under ~19 h),
+# so a 6 h scan can not step over two boundaries of the same kind.
+SCAN_STEP = timedelta(hours=6)
+TOLERANCE = timedelta(seconds=1)
+
+
+# ------------------ indices ------------------
+
+def tithi_index(surya_lon: float, chandra_lon: float) -> int:
+    return min(int(((chandra_lon - surya_lon) % 360) // 12), 29)
+
+
+def paksha_index(surya_lon: float, chandra_lon: float) -> int:
+    return tithi_index(surya_lon, chandra_lon) // 15
+
+
+def surya_rashi_index(surya_lon: float, chandra_lon: float) -> int:
+    return min(int(surya_lon // 30), 11)
+
+
+def chandra_rashi_index(surya_lon: float, chandra_lon: float) -> int:
+    return min(int(chandra_lon // 30), 11)
+
+
+# event -> (index function, index -> label)
+EVENTS: Dict[str, Tuple[Callable[[float, float], int], Callable[[int], str]]] = {
+    "tithi": (tithi_index, lambda i: TITHIs[i].name.value),
+    "paksha": (paksha_index, lambda i: TITHIs[i * 15].paksha.value),
+    "surya_rashi": (surya_rashi_index, lambda i: RASHIs[i].value),
+    "chandra_rashi": (chandra_rashi_index, lambda i: RASHIs[i].value),
+    # masa follows the solar rashi, as in classify_ephemeris
+    "masa": (surya_rashi_index, lambda i: MASAs[i].value),
+}
+
+
+# ------------------ search ------------------
+
+class LongitudeProbe:
+    """Memoized (surya_lon, chandra_lon) lookups, counting evaluations."""
+
+    def __init__(self, source: VectorSource):
+        self.source = source
+        self.memo: Dict[datetime, Tuple[float, float]] = {}
+        self.evaluations = 0
+
+    def __call__(self, dt: datetime) -> Tuple[float, float]:
+        lons = self.memo.get(dt)
+        if lons is None:
+            surya_xyz, chandra_xyz = self.source(dt)
+            lons = (cartesian_to_longitude(*surya_xyz), cartesian_to_longitude(*chandra_xyz))
+            self.memo[dt] = lons
+            self.evaluations += 1
+        return lons
+
+
+def bisect_boundary(probe: LongitudeProbe, index, lo: datetime, hi: datetime, index_lo: int) -> datetime:
+    """First instant (to TOLERANCE) in (lo, hi] whose index differs from index_lo."""
+    while hi - lo > TOLERANCE:
+        mid = lo + (hi - lo) / 2
+        mid = mid.replace(microsecond=0)
+        if mid <= lo:
+            break
+        if index(*probe(mid)) == index_lo:
+            lo = mid
+        else:
+            hi = mid
+    return hi
+
+
+def find_transitions(
+    source: VectorSource,
+    start: datetime,
+    stop: datetime,
+    events=EVENTS,
+    scan_step: timedelta = SCAN_STEP,
+) -> List[Dict]:
+    """
+    Scan [start, stop] every scan_step and bisect each bracket where an
+    index changes. Each boundary costs about log2(scan_step / TOLERANCE)
+    evaluations (15 for the defaults) on top of the shared scan.
+    """
+    probe = LongitudeProbe(source)
+
+    samples = []
+    t = start
+    while t < stop:
+        samples.append(t)
+        t += scan_step
+    samples.append(stop)
+
+    transitions = []
+
+    for event, (index, label) in events.items():
+        a = samples[0]
+        index_a = index(*probe(a))
+
+        for b in samples[1:]:
+            index_b = index(*probe(b))
+
+            # loop in case a bracket still holds more than one boundary
+            while index_b != index_a:
+                at = bisect_boundary(probe, index, a, b, index_a)
+                index_at = index(*probe(at))
+                transitions.append({
+                    "event": event,
+                    "timestamp": at.strftime(TIMESTAMP_FORMAT),
+                    "previous": label(index_a),
+                    "current": label(index_at),
+                })
+                a, index_a = at, index_at
+
+            a, index_a = b, index_b
+
+    transitions.sort(key=lambda tr: tr["timestamp"])
+    return transitions
+
+
+# ------------------ upavaas occurrences ------------------
+
+# a first window that holds every monthly observance, doubled from there
+# for the rarer ones, each within what one grid fill can cover
+FIRST_WINDOW = timedelta(days=35)
+MAX_WINDOW = timedelta(days=366)
+
+
+def upavaas_event(position: int):
+    """EVENTS-style entry that is 1 while rule UPAVAASs[position] holds, else 0."""
+    def active(surya_lon: float, chandra_lon: float) -> int:
+        rules = matching_rules(
+            tithi_index(surya_lon, chandra_lon),
+            surya_rashi_index(surya_lon, chandra_lon),
+            surya_lon,
+        )
+        return int(position in rules)
+
+    return active, lambda i: i
+
+
+async def next_occurrences(
+    make_source: Callable[[datetime, datetime], Awaitable[VectorSource]],
+    position: int,
+    after: datetime,
+    count: int,
+    horizon: timedelta,
+) -> List[Dict]:
+    """
+    The next count spans (start, end) during which UPAVAASs[position]
+    holds, starting after `after`. Only the rule's own on/off boundaries
+    are searched, window by window; no instant is sampled per day.
+    """
+    events = {"upavaas": upavaas_event(position)}
+
+    occurrences = []
+    opened = None
+    start = after
+    window = FIRST_WINDOW
+
+    while len(occurrences) < count and start < after + horizon:
+        stop = start + window
+        source = await make_source(start, stop)
+
+        for tr in find_transitions(source, start, stop, events):
+            if tr["current"]:
+                opened = tr["timestamp"]
+            elif opened is not None:
+                occurrences.append({"start": opened, "end": tr["timestamp"]})
+                opened = None
+                if len(occurrences) == count:
+                    break
+
+        start = stop
+        window = min(window * 2, MAX_WINDOW)
+
+    return occurrences
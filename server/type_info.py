@@ -1,6 +1,6 @@
 from enum import Enum
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 
 class UpavaasType(Enum):
@@ -90,6 +90,8 @@ class Upavaas:
     tithi: Optional[Tithi] = None
     paksha: Optional[Paksha] = None
     masa: Optional[Masa] = None
+    # Sun's longitude interval [start, end) in degrees
+    surya_lon: Optional[Tuple[float, float]] = None
     description: str = ""
 
 
@@ -259,6 +261,28 @@ UPAVAASs: List[Upavaas] = [
     Upavaas(
         name="Makara Sankranti",
         upavaas_type=UpavaasType.SOLAR_BASED,
+        surya_lon=(270, 300),
         description="Observed when the Sun enters Makara Rashi, marking Uttarayana."
     ),
 ]
+
+
+# Storage codes: the position in each list is the TINYINT kept in
+# lunar_ephemeris (see db.sql). Only ever append to these.
+AYANAs: list[Ayana] = [
+    Ayana.UTTARAYANA,
+    Ayana.DAKSHINAYANA,
+]
+RITUs: list[Ritu] = [
+    Ritu.VASANTA,
+    Ritu.GRISHMA,
+    Ritu.VARSHA,
+    Ritu.SHARAD,
+    Ritu.HEMANTA,
+    Ritu.SHISHIRA,
+]
+GRAHANAs: list[str] = [
+    "None",
+    "Surya",
+    "Chandra",
+]
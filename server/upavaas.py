@@ -0,0 +1,77 @@
+from typing import Dict, List, Optional, Tuple
+
+from type_info import TITHIs, MASAs, UPAVAASs, Upavaas, TithiInfo, Paksha
+
+
+# UPAVAASs compiled once into a lookup on (tithi index into TITHIs, masa
+# index into MASAs). Each entry holds the positions in UPAVAASs of the
+# rules whose tithi/paksha/masa conditions hold there, split into rules
+# that need nothing else and rules that also need the Sun's longitude in
+# an interval. Positions keep the declared order of UPAVAASs.
+
+Interval = Tuple[float, float, int]
+
+
+def lunar_match(rule: Upavaas, tithi_index: int, masa_index: int) -> bool:
+    tithi = TITHIs[tithi_index]
+
+    if rule.tithi and rule.tithi != tithi.name:
+        return False
+    if rule.paksha and rule.paksha != tithi.paksha:
+        return False
+    if rule.masa and rule.masa != MASAs[masa_index]:
+        return False
+    return True
+
+
+def compile_rules() -> Dict[Tuple[int, int], Tuple[Tuple[int, ...], Tuple[Interval, ...]]]:
+    index = {}
+
+    for t in range(len(TITHIs)):
+        for m in range(len(MASAs)):
+            always = []
+            solar = []
+            for position, rule in enumerate(UPAVAASs):
+                if not lunar_match(rule, t, m):
+                    continue
+                if rule.surya_lon:
+                    solar.append((rule.surya_lon[0], rule.surya_lon[1], position))
+                else:
+                    always.append(position)
+            index[(t, m)] = (tuple(always), tuple(solar))
+
+    return index
+
+
+RULE_INDEX = compile_rules()
+
+POSITIONS = {rule.name.lower(): position for position, rule in enumerate(UPAVAASs)}
+MASA_POSITIONS = {masa: i for i, masa in enumerate(MASAs)}
+
+# one shared, read-only payload per rule, like db.upavaas_for_bits
+PAYLOADS = tuple({"name": rule.name, "description": rule.description} for rule in UPAVAASs)
+
+
+def matching_rules(tithi_index: int, masa_index: int, surya_lon: float) -> Tuple[int, ...]:
+    """Positions in UPAVAASs of every rule that holds, in declared order."""
+    always, solar = RULE_INDEX[(tithi_index, masa_index)]
+    if not solar:
+        return always
+
+    hits = [position for start, end, position in solar if start <= surya_lon < end]
+    if not hits:
+        return always
+    return tuple(sorted(always + tuple(hits)))
+
+
+def upavaas_at(tithi_index: int, masa_index: int, surya_lon: float) -> List[dict]:
+    return [PAYLOADS[p] for p in matching_rules(tithi_index, masa_index, surya_lon)]
+
+
+def tithi_position(tithi: TithiInfo) -> int:
+    # cheaper than hashing the dataclass
+    return tithi.index - 1 + (15 if tithi.paksha is Paksha.KRISHNA else 0)
+
+
+def rule_position(name: str) -> Optional[int]:
+    return POSITIONS.get(name.strip().lower())
@@ -0,0 +1,261 @@
+import math
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; appends are then only serialized in-process
+    fcntl = None
+
+
+# Raw Horizons vectors kept on disk so a restarted worker does not download
+# them again. The file is a 64-byte header followed by fixed-size records,
+# appended in arrival order:
+#
+#   header   magic b"LVEC", version, step seconds, record size (little-endian u32)
+#   record   body i4, center i4, epoch i8, x y z vx vy vz f8
+#
+# epoch counts steps since 1970-01-01 UTC; instants off the step are not
+# stored. Velocities are NaN for rows that came from a position-only query.
+# Readers map the file read-only with np.memmap, so every worker process
+# shares the page cache and vectors are read in place. Each process keeps
+# its own (body, center, epoch) -> record index and extends it from the
+# new tail of the file when a lookup misses. Writers append whole records
+# under an exclusive flock; a later record for the same key wins.
+#
+# Both the file and the index grow with every new row until the store holds
+# VECTOR_STORE_MAX_RECORDS records (64 bytes each on disk, roughly 200 more
+# per process for the index); after that it is only read. Delete the file
+# to start over. Opening, flock and appends are blocking file I/O: async
+# callers go through a thread (see horizons.py).
+
+MAGIC = b"LVEC"
+VERSION = 1
+HEADER = struct.Struct("<4sIII48x")
+
+RECORD = np.dtype([
+    ("body", "<i4"),
+    ("center", "<i4"),
+    ("epoch", "<i8"),
+    ("state", "<f8", (6,)),
+])
+
+UNIX_EPOCH = datetime(1970, 1, 1)
+
+# next to this module unless set; empty disables the store
+VECTOR_STORE_PATH = os.getenv(
+    "VECTOR_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "state_vectors.bin")
+)
+VECTOR_STORE_STEP_SECONDS = int(os.getenv("VECTOR_STORE_STEP_SECONDS", "1"))
+# 500k records: 32 MB on disk, about 100 MB of index per process
+VECTOR_STORE_MAX_RECORDS = int(os.getenv("VECTOR_STORE_MAX_RECORDS", "500000"))
+
+Key = Tuple[int, int, int]
+
+
+class VectorStoreError(Exception):
+    pass
+
+
+class VectorStore:
+    def __init__(self, path: str, step_seconds: int = 1, max_records: int = VECTOR_STORE_MAX_RECORDS):
+        self.path = path
+        self.step = step_seconds
+        self.max_records = max_records
+        self.full = False
+
+        self._lock = threading.Lock()
+        self._index: Dict[Key, int] = {}
+        self._records: Optional[np.memmap] = None
+        self._count = 0
+
+        self._open()
+
+    def _open(self):
+        with open(self.path, "a+b") as f:
+            with _locked(f):
+                f.seek(0, os.SEEK_END)
+                if f.tell() == 0:
+                    f.write(HEADER.pack(MAGIC, VERSION, self.step, RECORD.itemsize))
+                    f.flush()
+                f.seek(0)
+                header = f.read(HEADER.size)
+
+        if len(header) < HEADER.size:
+            raise VectorStoreError(f"{self.path}: truncated header")
+
+        magic, version, step, record_size = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.itemsize:
+            raise VectorStoreError(f"{self.path}: not a version {VERSION} vector store")
+        if step != self.step:
+            raise VectorStoreError(f"{self.path}: written with a {step}s step, not {self.step}s")
+
+    def __len__(self) -> int:
+        return self._count
+
+    # ------------------ keys ------------------
+
+    def key(self, command: str, center: str, dt: datetime) -> Optional[Key]:
+        seconds = (dt - UNIX_EPOCH).total_seconds()
+        epoch, rest = divmod(seconds, self.step)
+        if rest:
+            return None
+        return int(command), int(center), int(epoch)
+
+    # ------------------ reads ------------------
+
+    def _refresh(self):
+        """Map the file again if another writer grew it, and index the new tail."""
+        with open(self.path, "rb") as f:
+            # shared lock: an append in progress is either all there or not at all
+            with _locked(f, shared=True):
+                size = os.fstat(f.fileno()).st_size
+        count = (size - HEADER.size) // RECORD.itemsize
+        if count <= self._count:
+            return
+
+        records = np.memmap(self.path, dtype=RECORD, mode="r", offset=HEADER.size, shape=(count,))
+        tail = records[self._count:]
+
+        keys = zip(tail["body"].tolist(), tail["center"].tolist(), tail["epoch"].tolist())
+        for position, key in enumerate(keys, self._count):
+            self._index[key] = position
+
+        self._records = records
+        self._count = count
+
+    def _find(self, key: Key) -> Optional[np.ndarray]:
+        position = self._index.get(key)
+        if position is None:
+            self._refresh()
+            position = self._index.get(key)
+            if position is None:
+                return None
+        return self._records[position]["state"]
+
+    def _has_velocity(self, position: int) -> bool:
+        return not np.isnan(self._records[position]["state"][3])
+
+    def get(self, command: str, center: str, dt: datetime, velocity: bool = False) -> Optional[tuple]:
+        """xyz, or the full state when velocity is True; None when not stored."""
+        found = self.get_many(command, center, [dt], velocity)
+        return found[0] if found else None
+
+    def get_many(
+        self,
+        command: str,
+        center: str,
+        epochs: Sequence[datetime],
+        velocity: bool = False,
+    ) -> Optional[List[tuple]]:
+        """Every requested row in order, or None if any one is missing."""
+        keys = [self.key(command, center, dt) for dt in epochs]
+        if None in keys:
+            return None
+
+        rows = []
+        with self._lock:
+            for key in keys:
+                state = self._find(key)
+                if state is None:
+                    return None
+                values = state.tolist()
+                if not velocity:
+                    rows.append(tuple(values[:3]))
+                elif math.isnan(values[3]):  # stored from a position-only query
+                    return None
+                else:
+                    rows.append(tuple(values))
+        return rows
+
+    # ------------------ writes ------------------
+
+    def put(self, command: str, center: str, rows: Iterable[Tuple[datetime, tuple]]):
+        """Append (epoch, xyz) or (epoch, state) rows that are not stored yet."""
+        body = int(command)
+        origin = int(center)
+
+        if self.full:
+            return
+
+        fresh = []
+        with self._lock:
+            self._refresh()
+            for dt, values in rows:
+                key = self.key(command, center, dt)
+                if key is None:
+                    continue
+                position = self._index.get(key)
+                # a stored state is only replaced to add velocities it lacks
+                if position is not None and (len(values) == 3 or self._has_velocity(position)):
+                    continue
+                fresh.append((key[2], values))
+
+        if not fresh:
+            return
+
+        records = np.zeros(len(fresh), dtype=RECORD)
+        records["body"] = body
+        records["center"] = origin
+        records["epoch"] = [epoch for epoch, _ in fresh]
+        records["state"] = np.nan
+        for i, (_, values) in enumerate(fresh):
+            records["state"][i, :len(values)] = values
+
+        with open(self.path, "r+b") as f:
+            with _locked(f):
+                size = f.seek(0, os.SEEK_END)
+                # a writer killed mid-append leaves a partial record; drop it
+                whole = HEADER.size + (size - HEADER.size) // RECORD.itemsize * RECORD.itemsize
+                if whole != size:
+                    f.truncate(whole)
+                    f.seek(whole)
+
+                room = self.max_records - (whole - HEADER.size) // RECORD.itemsize
+                if room < len(records):
+                    if not self.full:
+                        print(f"{self.path}: {self.max_records} records, no longer appending")
+                    self.full = True
+                    records = records[:max(room, 0)]
+                f.write(records.tobytes())
+
+        # index what was just written, so replaced states are not read stale
+        with self._lock:
+            self._refresh()
+
+
+@contextmanager
+def _locked(f, shared: bool = False):
+    """flock on an open file for the duration of a with block."""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+    try:
+        yield f
+    finally:
+        f.flush()
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+_store: Optional[VectorStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> Optional[VectorStore]:
+    """The process-wide store, opened on first use. None when VECTOR_STORE_PATH is empty."""
+    global _store
+
+    if not VECTOR_STORE_PATH:
+        return None
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = VectorStore(VECTOR_STORE_PATH, VECTOR_STORE_STEP_SECONDS)
+    return _store
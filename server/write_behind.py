@@ -0,0 +1,158 @@
+import queue
+import threading
+import time
+from typing import Callable
+
+from db import PoolTimeout, is_connection_error
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Worth another attempt: the tunnel or the server blinked, or the pool was busy."""
+    return isinstance(exc, PoolTimeout) or is_connection_error(exc)
+
+_STOP = object()
+
+
+class WriteBehind:
+    """
+    Takes computed rows off the request path. A background thread groups
+    them into batches, flushed when `batch_size` rows are waiting or
+    `flush_interval` seconds have passed, and writes each batch with one
+    call. Transient failures are retried with backoff; a batch the server
+    rejects is split in halves until the rows at fault are isolated, so
+    one bad row does not cost the rest of its batch. At most
+    `max_pending` rows are held; beyond that new rows are dropped, which
+    is safe because every row can be recomputed.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[list[dict]], None],
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        max_pending: int = 10_000,
+        retries: int = 3,
+        backoff: float = 0.5,
+    ):
+        self.write = write
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.backoff = backoff
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._stopping = threading.Event()
+        self._thread = None
+
+        self.stats = {
+            "queued": 0,
+            "written": 0,
+            "dropped": 0,
+            "retries": 0,
+            "failed": 0,
+            "batches": 0,
+        }
+
+    def start(self):
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+
+    def put(self, row: dict):
+        try:
+            self._queue.put_nowait(row)
+            self.stats["queued"] += 1
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _next_batch(self):
+        """Blocks for the first row, then collects until full or the interval ends."""
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                row = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if row is _STOP:
+                return batch, True
+            batch.append(row)
+
+        return batch, False
+
+    def _flush(self, batch: list[dict]):
+        for attempt in range(self.retries + 1):
+            try:
+                self.write(batch)
+                self.stats["written"] += len(batch)
+                self.stats["batches"] += 1
+                return
+            except Exception as exc:
+                if not is_transient(exc):
+                    return self._reject(batch, exc)
+                if attempt == self.retries:
+                    print(f"write-behind: giving up on {len(batch)} rows: {exc!r}")
+                    break
+                self.stats["retries"] += 1
+                time.sleep(self.backoff * 2 ** attempt)
+
+        self.stats["failed"] += len(batch)
+
+    def _reject(self, batch: list[dict], exc: Exception):
+        """The server refused the batch: retry its halves, drop single rows."""
+        if len(batch) == 1:
+            print(f"write-behind: dropping row {batch[0].get('timestamp')}: {exc!r}")
+            self.stats["failed"] += 1
+            return
+
+        middle = len(batch) // 2
+        self._flush(batch[:middle])
+        self._flush(batch[middle:])
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if batch:
+                self._flush(batch)
+            stopping = stopping or self._stopping.is_set()
+
+        # drain whatever arrived before shutdown
+        rest = []
+        while True:
+            try:
+                row = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is not _STOP:
+                rest.append(row)
+
+        for i in range(0, len(rest), self.batch_size):
+            self._flush(rest[i:i + self.batch_size])
+
+    def shutdown(self, timeout: float = 10.0):
+        """Flushes everything queued so far, then stops the thread."""
+        if self._thread is None:
+            return
+
+        self._stopping.set()
+        # wakes the thread if it waits on an empty queue; a full queue has
+        # rows for it to take, and it checks _stopping after each batch
+        try:
+            self._queue.put_nowait(_STOP)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None